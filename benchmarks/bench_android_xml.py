@@ -0,0 +1,66 @@
+"""
+Compares the Android strings.xml parsing paths.
+
+Usage: python benchmarks/bench_android_xml.py [string count]
+"""
+import os
+import sys
+import tempfile
+import time
+
+from lxml import etree
+
+from locawise import androidutils
+
+
+def create_strings_xml(count: int) -> str:
+    lines = ['<?xml version="1.0" encoding="utf-8"?>', '<resources>']
+    for i in range(count):
+        if i % 10 == 0:
+            lines.append(f'    <string name="formatted_{i}">Hello <b>%1$s</b>, you have %2$d new messages &amp; alerts</string>')
+        else:
+            lines.append(f'    <string name="string_{i}">Plain string number {i} with some text</string>')
+    lines.append('    <plurals name="items">')
+    lines.append('        <item quantity="one">%d item</item>')
+    lines.append('        <item quantity="other">%d items</item>')
+    lines.append('    </plurals>')
+    lines.append('</resources>')
+    return '\n'.join(lines)
+
+
+def parse_by_serializing(file_content: str) -> dict[str, str]:
+    """the parsing path before the inner content of nodes was built directly"""
+    parser = etree.XMLParser(encoding='UTF-8', remove_comments=True, strip_cdata=False)
+    tree = etree.ElementTree(etree.fromstring(file_content.encode('UTF-8'), parser=parser))
+    return androidutils._parse_xml_tree(tree, may_contain_cdata=True)
+
+
+def measure(name: str, func, *args, repeat: int = 5) -> dict[str, str]:
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args)
+        best = min(best, time.perf_counter() - start)
+    print(f'{name:<28} {best * 1000:10.1f} ms')
+    return result
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 30_000
+    content = create_strings_xml(count)
+    with tempfile.TemporaryDirectory() as temp_dir:
+        file_path = os.path.join(temp_dir, 'strings.xml')
+        with open(file_path, 'w', encoding='UTF-8') as f:
+            f.write(content)
+
+        print(f'{count} strings, {len(content) / 1024 / 1024:.1f} MiB')
+        expected = measure('tostring + regex', parse_by_serializing, content)
+        actual = measure('parse_xml_string', androidutils.parse_xml_string, content)
+        streamed = measure('parse_xml_file_streaming', androidutils.parse_xml_file_streaming, file_path)
+
+    assert actual == expected and streamed == expected, 'parsing paths disagree'
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,49 @@
+"""
+Measures the memory held by a source file and its target languages as dicts, the way they are parsed, and as
+catalogues sharing one key table.
+
+Usage: python benchmarks/bench_catalogue.py [key count] [language count]
+"""
+import sys
+import tracemalloc
+
+from locawise.catalogue import Catalogue
+from locawise.serialization import serialize, LocalizationFormat
+
+
+def parse_pairs(key_count: int, language: int) -> dict[str, str]:
+    # every parsed file has its own copy of each key
+    return {f'section{i // 100}.key{i}'.encode().decode(): f'Translated value {i} in language {language}'
+            for i in range(key_count)}
+
+
+def load_dicts(key_count: int, language_count: int) -> list[dict[str, str]]:
+    return [parse_pairs(key_count, language) for language in range(language_count + 1)]
+
+
+def load_catalogues(key_count: int, language_count: int) -> list[Catalogue]:
+    source = Catalogue.from_pairs(parse_pairs(key_count, 0))
+    return [source] + [Catalogue.from_pairs(parse_pairs(key_count, language), key_table=source.key_table)
+                       for language in range(1, language_count + 1)]
+
+
+def measure(name: str, func, *args):
+    tracemalloc.start()
+    result = func(*args)
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f'{name:<12} {current / 2 ** 20:10.1f} MiB held, {peak / 2 ** 20:10.1f} MiB peak')
+    return result
+
+
+def main():
+    key_count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    language_count = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    print(f'{key_count} keys, {language_count} target languages')
+    dicts = measure('dicts', load_dicts, key_count, language_count)
+    catalogues = measure('catalogues', load_catalogues, key_count, language_count)
+    assert serialize(catalogues[-1], LocalizationFormat.PROPERTIES) == serialize(dicts[-1], LocalizationFormat.PROPERTIES)
+
+
+if __name__ == '__main__':
+    main()
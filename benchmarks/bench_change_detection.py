@@ -0,0 +1,57 @@
+"""
+Compares change detection and lock file creation that hash every pair twice, once per call, with hashing every pair once
+and sharing the digests.
+
+Usage: python benchmarks/bench_change_detection.py [pair count]
+"""
+import sys
+import time
+
+from locawise.diffutils import retrieve_nom_source_keys
+from locawise.lockfile import hash_key_value_pair, hash_key_value_pairs, create_lock_file_content
+
+
+def detect_changes_per_pair(lock_hashes: set[str], source_dict: dict[str, str]) -> tuple[set[str], str]:
+    """the path before the digests were shared"""
+    nom_keys = set()
+    for k, v in source_dict.items():
+        if hash_key_value_pair(k, v) not in lock_hashes:
+            nom_keys.add(k)
+
+    content = ""
+    for k, v in source_dict.items():
+        content += hash_key_value_pair(k, v) + "\n"
+    return nom_keys, content
+
+
+def detect_changes_once(lock_hashes: set[str], source_dict: dict[str, str]) -> tuple[set[str], str]:
+    source_hashes = hash_key_value_pairs(source_dict)
+    nom_keys = retrieve_nom_source_keys(lock_hashes, source_dict, source_hashes=source_hashes)
+    return nom_keys, create_lock_file_content(source_dict, source_hashes)
+
+
+def measure(name: str, func, *args, repeat: int = 3):
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args)
+        best = min(best, time.perf_counter() - start)
+    print(f'{name:<24} {best * 1000:10.1f} ms')
+    return result
+
+
+def main():
+    pair_count = int(sys.argv[1]) if len(sys.argv) > 1 else 500_000
+    source_dict = {f'section{i // 100}_/key{i}': f'Source value {i} with some text' for i in range(pair_count)}
+    # one percent of the pairs changed since the last run
+    lock_hashes = {hash_key_value_pair(k, v if i % 100 else 'old value') for i, (k, v) in enumerate(source_dict.items())}
+
+    print(f'{pair_count} pairs')
+    expected = measure('hash per call', detect_changes_per_pair, lock_hashes, source_dict)
+    actual = measure('hash once', detect_changes_once, lock_hashes, source_dict)
+    assert actual == expected, 'change detection paths disagree'
+
+
+if __name__ == '__main__':
+    main()
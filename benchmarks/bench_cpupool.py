@@ -0,0 +1,73 @@
+"""
+Parses and serializes a set of localization files inline and on worker processes, and measures how long the event loop
+is blocked meanwhile.
+
+Usage: python benchmarks/bench_cpupool.py [file count] [key count] [workers]
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+from locawise import cpupool
+from locawise.parsing import parse
+from locawise.serialization import serialize_and_save
+
+
+async def measure_event_loop_lag(stop: asyncio.Event) -> float:
+    """the longest time a 1 ms sleep took, i.e. how long other tasks such as LLM requests had to wait"""
+    longest = 0.0
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(0.001)
+        longest = max(longest, time.perf_counter() - start)
+    return longest
+
+
+async def localize_files(file_paths: list[str]):
+    async def localize_file(file_path: str):
+        pairs = await parse(file_path)
+        await serialize_and_save(pairs, file_path)
+
+    await asyncio.gather(*(localize_file(file_path) for file_path in file_paths))
+
+
+async def measure(name: str, file_paths: list[str]):
+    stop = asyncio.Event()
+    lag = asyncio.create_task(measure_event_loop_lag(stop))
+    start = time.perf_counter()
+    await localize_files(file_paths)
+    elapsed = time.perf_counter() - start
+    stop.set()
+    print(f'{name:<16} {elapsed * 1000:10.1f} ms, event loop blocked for up to {await lag * 1000:.1f} ms')
+
+
+def main():
+    file_count = int(sys.argv[1]) if len(sys.argv) > 1 else 40
+    key_count = int(sys.argv[2]) if len(sys.argv) > 2 else 10_000
+    workers = int(sys.argv[3]) if len(sys.argv) > 3 else os.cpu_count()
+    with tempfile.TemporaryDirectory() as temp_dir:
+        file_paths = []
+        for i in range(file_count):
+            extension = ['properties', 'json', 'xml'][i % 3]
+            file_paths.append(os.path.join(temp_dir, f'{i}.{extension}'))
+            pairs = {f'section{k // 100}_/key{k}': f'Translated value {k} with <b>markup</b> & text'
+                     for k in range(key_count)}
+            if extension != 'json':
+                pairs = {key.replace('_/', '.'): value.replace('<b>', '').replace('</b>', '').replace('&', 'and')
+                         for key, value in pairs.items()}
+            asyncio.run(serialize_and_save(pairs, file_paths[-1]))
+
+        print(f'{file_count} files of {key_count} keys')
+        asyncio.run(measure('inline', file_paths))
+        # the workers are forked before the event loop starts any thread
+        cpupool.configure(workers)
+        try:
+            asyncio.run(measure(f'{workers} workers', file_paths))
+        finally:
+            cpupool.shutdown()
+
+
+if __name__ == '__main__':
+    main()
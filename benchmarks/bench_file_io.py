@@ -0,0 +1,89 @@
+"""
+Compares reading and writing through aiofiles with the bulk reads and writes of fileutils.
+
+Usage: python benchmarks/bench_file_io.py [lock file line count] [file count]
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+import aiofiles
+import xxhash
+
+from locawise import fileutils, lockfile
+
+
+async def read_lock_file_by_line(file_path: str) -> set[str]:
+    """the lock file reading path before whole-file reads"""
+    key_value_hashes = set()
+    async with aiofiles.open(file_path, 'r', encoding='UTF-8') as f:
+        async for line in f:
+            line = line.rstrip('\n\r')
+            if line:
+                key_value_hashes.add(line)
+    return key_value_hashes
+
+
+async def read_files_with_aiofiles(file_paths: list[str]) -> list[str]:
+    async def read(file_path: str) -> str:
+        async with aiofiles.open(file_path, mode='r', encoding='UTF-8') as f:
+            return await f.read()
+
+    return await asyncio.gather(*(read(file_path) for file_path in file_paths))
+
+
+async def write_files_with_aiofiles(file_paths: list[str], content: str):
+    async def write(file_path: str):
+        async with aiofiles.open(file_path, mode='w', encoding='UTF-8') as f:
+            await f.write(content)
+
+    await asyncio.gather(*(write(file_path) for file_path in file_paths))
+
+
+async def read_files(file_paths: list[str]) -> list[str]:
+    return await asyncio.gather(*(fileutils.read_file(file_path) for file_path in file_paths))
+
+
+async def write_files(file_paths: list[str], content: str):
+    async with fileutils.AtomicWriteBatch() as batch:
+        await asyncio.gather(*(batch.stage(file_path, content) for file_path in file_paths))
+        await batch.commit()
+
+
+async def measure(name: str, func, *args, repeat: int = 5):
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = await func(*args)
+        best = min(best, time.perf_counter() - start)
+    print(f'{name:<28} {best * 1000:10.1f} ms')
+    return result
+
+
+async def main():
+    line_count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    file_count = int(sys.argv[2]) if len(sys.argv) > 2 else 40
+    with tempfile.TemporaryDirectory() as temp_dir:
+        lock_file_path = os.path.join(temp_dir, 'i18n.lock')
+        with open(lock_file_path, 'w', encoding='UTF-8') as f:
+            f.writelines(f'{xxhash.xxh32_hexdigest(str(i))}\n' for i in range(line_count))
+
+        print(f'lock file with {line_count} lines')
+        expected = await measure('aiofiles, line by line', read_lock_file_by_line, lock_file_path)
+        actual = await measure('read_lock_file', lockfile.read_lock_file, lock_file_path)
+        assert actual == expected, 'lock file reading paths disagree'
+
+        content = ''.join(f'key.{i}=Some translated value number {i}\n' for i in range(5_000))
+        file_paths = [os.path.join(temp_dir, f'messages_{i}.properties') for i in range(file_count)]
+        print(f'{file_count} files of {len(content) / 1024:.0f} KiB')
+        await measure('aiofiles write', write_files_with_aiofiles, file_paths, content)
+        await measure('AtomicWriteBatch', write_files, file_paths, content)
+        await measure('aiofiles read', read_files_with_aiofiles, file_paths)
+        await measure('read_file', read_files, file_paths)
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,64 @@
+"""
+Compares the prompts of a localization run that sends the whole glossary with every chunk to sending each chunk only the
+glossary entries its values use, and measures the time the glossary index takes to select them.
+
+Usage: python benchmarks/bench_glossary.py [term count] [pair count] [chunk size]
+"""
+import random
+import sys
+import time
+
+from locawise.dictutils import chunk_dict
+from locawise.localization.glossary import GlossaryIndex
+from locawise.localization.prompts import generate_system_prompt, generate_user_prompt
+
+
+def prompt_size_with_whole_glossary(glossary: dict[str, str], chunks: list[dict[str, str]]) -> int:
+    """the path before the glossary was filtered per chunk"""
+    system_prompt = generate_system_prompt(context='', glossary=glossary, tone='')
+    return sum(len(system_prompt) + len(generate_user_prompt(chunk, 'tr')) for chunk in chunks)
+
+
+def prompt_size_with_chunk_glossary(glossary: dict[str, str], chunks: list[dict[str, str]]) -> int:
+    index = GlossaryIndex(glossary)
+    system_prompt = generate_system_prompt(context='', glossary={}, tone='')
+    return sum(len(system_prompt) + len(generate_user_prompt(chunk, 'tr', glossary=index.select(chunk.values())))
+               for chunk in chunks)
+
+
+def measure(name: str, func, *args, repeat: int = 3):
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args)
+        best = min(best, time.perf_counter() - start)
+    print(f'{name:<24} {best * 1000:10.1f} ms, {result:,} prompt characters')
+    return result
+
+
+def main():
+    term_count = int(sys.argv[1]) if len(sys.argv) > 1 else 1_500
+    pair_count = int(sys.argv[2]) if len(sys.argv) > 2 else 10_000
+    chunk_size = int(sys.argv[3]) if len(sys.argv) > 3 else 300
+    randomizer = random.Random(0)
+    glossary = {f'term{i} product': f'translation of term {i} with a description for the translator'
+                for i in range(term_count)}
+    words = ['the', 'open', 'settings', 'account', 'save', 'your', 'changes', 'to', 'continue', 'with']
+    pairs = {}
+    for i in range(pair_count):
+        text = ' '.join(randomizer.choices(words, k=12))
+        if i % 20 == 0:
+            # a few values use a glossary term
+            text += f' term{randomizer.randrange(term_count)} product'
+        pairs[f'key{i}'] = text
+    chunks = chunk_dict(pairs, chunk_size)
+
+    print(f'{term_count} glossary terms, {pair_count} pairs in {len(chunks)} chunks')
+    whole = measure('whole glossary', prompt_size_with_whole_glossary, glossary, chunks)
+    selected = measure('glossary per chunk', prompt_size_with_chunk_glossary, glossary, chunks)
+    assert selected < whole, 'per chunk prompts are not smaller'
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+"""
+Compares the tokens of the regular prompts, indented JSON under the flattened keys, with compact prompts, minified JSON
+under positional ids, for deeply nested keys. Counts are exact with tiktoken installed (locawise[tokens]) and estimated
+from the text length otherwise.
+
+Usage: python benchmarks/bench_prompt_tokens.py [pair count] [chunk size] [model]
+"""
+import json
+import sys
+import time
+
+from locawise.dictutils import chunk_dict
+from locawise.localization.prompts import generate_user_prompt
+from locawise.tokenutils import estimate_token_count, tiktoken
+
+
+def count_regular_tokens(chunks: list[dict[str, str]], model: str) -> tuple[int, int]:
+    """input tokens of the user prompts and output tokens of answers echoing every key"""
+    input_tokens = sum(estimate_token_count(generate_user_prompt(chunk, 'Turkish'), model) for chunk in chunks)
+    output_tokens = sum(estimate_token_count(json.dumps(chunk, ensure_ascii=False, indent=4), model)
+                        for chunk in chunks)
+    return input_tokens, output_tokens
+
+
+def count_compact_tokens(chunks: list[dict[str, str]], model: str) -> tuple[int, int]:
+    input_tokens = 0
+    output_tokens = 0
+    for chunk in chunks:
+        encoded_chunk = {str(index): value for index, value in enumerate(chunk.values())}
+        input_tokens += estimate_token_count(generate_user_prompt(encoded_chunk, 'Turkish', compact=True), model)
+        output_tokens += estimate_token_count(json.dumps(encoded_chunk, ensure_ascii=False, separators=(',', ':')),
+                                              model)
+    return input_tokens, output_tokens
+
+
+def measure(name: str, func, *args):
+    start = time.perf_counter()
+    input_tokens, output_tokens = func(*args)
+    elapsed = time.perf_counter() - start
+    print(f'{name:<10} {input_tokens:>10,} input tokens {output_tokens:>10,} output tokens ({elapsed * 1000:.1f} ms)')
+    return input_tokens + output_tokens
+
+
+def main():
+    pair_count = int(sys.argv[1]) if len(sys.argv) > 1 else 5_000
+    chunk_size = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    model = sys.argv[3] if len(sys.argv) > 3 else 'gpt-4o'
+    pairs = {f'app_/settings_/section{i // 100}_/group{i // 10}_/item{i}_/label': f'Save changes to item {i}'
+             for i in range(pair_count)}
+    chunks = chunk_dict(pairs, chunk_size)
+
+    counting = 'tiktoken' if tiktoken else 'estimated from the text length'
+    print(f'{pair_count} pairs in {len(chunks)} chunks, {model} tokens {counting}')
+    regular = measure('regular', count_regular_tokens, chunks, model)
+    compact = measure('compact', count_compact_tokens, chunks, model)
+    assert compact < regular, 'compact prompts are not smaller'
+
+
+if __name__ == '__main__':
+    main()
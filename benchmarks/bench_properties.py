@@ -0,0 +1,67 @@
+"""
+Compares parsing and writing a large .properties bundle through jproperties with the single-pass codec of
+propertiesutils.
+
+Usage: python benchmarks/bench_properties.py [line count]
+"""
+import io
+import sys
+import time
+
+import jproperties
+
+from locawise.propertiesutils import parse_properties, serialize_properties
+
+
+def parse_with_jproperties(content: str) -> dict[str, str]:
+    """the parsing path before propertiesutils"""
+    properties = jproperties.Properties()
+    properties.load(content, encoding='UTF-8')
+    return {key: value for key, (value, _) in properties.items()}
+
+
+def serialize_with_jproperties(pairs: dict[str, str]) -> str:
+    """the writing path before propertiesutils"""
+    properties = jproperties.Properties()
+    properties.properties = pairs
+    properties._key_order.extend(pairs)
+    with io.BytesIO() as output_stream:
+        properties.store(output_stream, encoding='utf-8', strict=True, strip_meta=True, timestamp=False)
+        return output_stream.getvalue().decode('utf-8')
+
+
+def measure(name: str, func, *args, repeat: int = 3):
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args)
+        best = min(best, time.perf_counter() - start)
+    print(f'{name:<24} {best * 1000:10.1f} ms')
+    return result
+
+
+def main():
+    line_count = int(sys.argv[1]) if len(sys.argv) > 1 else 80_000
+    lines = []
+    for i in range(line_count):
+        if i % 50 == 0:
+            lines.append(f'# section {i // 50}')
+        elif i % 97 == 0:
+            lines.append(f'section{i // 50}.multi{i} = first part of a long value \\\n    continued on the next line')
+        else:
+            lines.append(f'section{i // 50}.key{i}=Translated value {i} with \\u00e7 escapes: and = separators')
+    content = '\n'.join(lines) + '\n'
+    print(f'{line_count} lines, {len(content) / 1024:.0f} KiB')
+
+    expected = measure('jproperties parse', parse_with_jproperties, content)
+    actual = measure('parse_properties', parse_properties, content)
+    assert actual == expected, 'parsers disagree'
+
+    expected = measure('jproperties store', serialize_with_jproperties, actual)
+    actual = measure('serialize_properties', serialize_properties, actual)
+    assert actual == expected, 'writers disagree'
+
+
+if __name__ == '__main__':
+    main()
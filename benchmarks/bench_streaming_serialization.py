@@ -0,0 +1,69 @@
+"""
+Compares serializing a target file whole, the way it was done before streaming, and then writing it with writing chunks
+as they are serialized, in time and in peak memory.
+
+Usage: python benchmarks/bench_streaming_serialization.py [key count]
+"""
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from locawise.androidutils import serialize_to_xml
+from locawise.dictutils import unflatten_dict
+from locawise.fileutils import write_to_file_sync, read_file_sync
+from locawise.localization.format import detect_format, LocalizationFormat
+from locawise.propertiesutils import serialize_properties
+from locawise.serialization import iter_serialized
+
+
+def measure(name: str, func, *args, repeat: int = 3):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        best = min(best, time.perf_counter() - start)
+    # traced separately, tracemalloc slows everything down
+    tracemalloc.start()
+    func(*args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f'{name:<28} {best * 1000:10.1f} ms, {peak / 2 ** 20:8.1f} MiB peak')
+
+
+def write_whole(pairs: dict[str, str], file_path: str):
+    """the writing path before streaming"""
+    match detect_format(file_path):
+        case LocalizationFormat.PROPERTIES:
+            content = serialize_properties(pairs)
+        case LocalizationFormat.JSON:
+            content = json.dumps(unflatten_dict(pairs), ensure_ascii=False, indent=2)
+        case _:
+            content = serialize_to_xml(pairs)
+    write_to_file_sync(file_path, content)
+
+
+def write_streamed(pairs: dict[str, str], file_path: str):
+    write_to_file_sync(file_path, iter_serialized(pairs, detect_format(file_path)))
+
+
+def main():
+    key_count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for file_name in ['messages.properties', 'messages.json', 'strings.xml']:
+            pairs = {f'section{i // 100}_/key{i}': f'Translated value {i} with some text & markup' for i in range(key_count)}
+            if file_name != 'messages.json':
+                pairs = {key.replace('_/', '.'): value for key, value in pairs.items()}
+            whole_path = os.path.join(temp_dir, f'whole_{file_name}')
+            streamed_path = os.path.join(temp_dir, f'streamed_{file_name}')
+
+            print(f'{file_name}, {key_count} keys')
+            measure('serialize, then write', write_whole, pairs, whole_path)
+            measure('write while serializing', write_streamed, pairs, streamed_path)
+            assert read_file_sync(whole_path) == read_file_sync(streamed_path), 'written files differ'
+
+
+if __name__ == '__main__':
+    main()
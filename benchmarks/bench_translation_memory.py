@@ -0,0 +1,74 @@
+"""
+Compares finding the existing translations similar to new values, near-copies of translated values with one word
+replaced, by scoring every translated value with the trigram index of the translation memory, and measures the time it
+takes to build the index.
+
+Usage: python benchmarks/bench_translation_memory.py [translated count] [new count]
+"""
+import random
+import sys
+import time
+
+from locawise.localization.memory import TranslationMemory, normalize
+
+
+def find_similar_brute_force(source: dict[str, str], translations: dict[str, str], texts: list[str]) -> int:
+    """scores the text against every translated value"""
+    trigrams = {key: _trigrams(value) for key, value in source.items() if key in translations}
+    found = 0
+    for text in texts:
+        text_trigrams = _trigrams(text)
+        scored = []
+        for key, value_trigrams in trigrams.items():
+            shared = len(text_trigrams & value_trigrams)
+            similarity = shared / (len(text_trigrams) + len(value_trigrams) - shared)
+            if similarity >= 0.5 and normalize(source[key]) != normalize(text):
+                scored.append(similarity)
+        found += min(2, len(scored))
+    return found
+
+
+def find_similar_with_index(memory: TranslationMemory, translations: dict[str, str], texts: list[str]) -> int:
+    return sum(len(memory.find_similar(text, translations, set())) for text in texts)
+
+
+def _trigrams(text: str) -> frozenset[str]:
+    padded = f'  {normalize(text).casefold()} '
+    return frozenset(padded[i:i + 3] for i in range(len(padded) - 2))
+
+
+def measure(name: str, func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    elapsed = time.perf_counter() - start
+    print(f'{name:<12} {elapsed * 1000:10.1f} ms, {result:,} similar values')
+    return result
+
+
+def main():
+    translated_count = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    new_count = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    randomizer = random.Random(0)
+    words = [''.join(randomizer.choices('abcdefghijklmnopqrstuvwxyz', k=randomizer.randint(3, 9)))
+             for _ in range(2_000)]
+    source = {f'key{i}': ' '.join(randomizer.choices(words, k=randomizer.randint(2, 8))).capitalize()
+              for i in range(translated_count)}
+    translations = {key: f'translation of {value}' for key, value in source.items()}
+    # near-copies of translated values with one word replaced
+    texts = []
+    for _ in range(new_count):
+        text_words = source[f'key{randomizer.randrange(translated_count)}'].split()
+        text_words[randomizer.randrange(len(text_words))] = randomizer.choice(words)
+        texts.append(' '.join(text_words))
+
+    start = time.perf_counter()
+    memory = TranslationMemory(source)
+    print(f'{translated_count} translated values indexed in {(time.perf_counter() - start) * 1000:.1f} ms, '
+          f'{new_count} new values')
+    brute_force = measure('brute force', find_similar_brute_force, source, translations, texts)
+    indexed = measure('index', find_similar_with_index, memory, translations, texts)
+    assert indexed == brute_force, 'the index finds other values than scoring every value'
+
+
+if __name__ == '__main__':
+    main()
@@ -2,25 +2,93 @@ import argparse
 import asyncio
 import logging
 import os
+import sys
+import time
+from typing import Coroutine
 
+from locawise import cpupool, scheduling
+from locawise.batch import BatchLLMStrategy, OpenAiBatchBackend
 from locawise.envutils import generate_localization_file_name
-from locawise.llm import LLMContext, create_strategy
-from locawise.localization.config import read_localization_config_yaml
-from locawise.lockfile import write_lock_file
-from locawise.processor import create_source_processor
+from locawise.errors import BudgetExceededError, LocalizationError
+from locawise.fileutils import AtomicWriteBatch
+from locawise.llm import LLMContext, create_strategy, create_strategies, create_strategy_key
+from locawise.localization.config import read_localization_config_yaml, LocalizationConfig
+from locawise.lockfile import write_lock_file, write_source_values_file, create_language_lock_file_path, \
+    remove_language_lock_files
+from locawise.parsecache import ParseCache
+from locawise.planner import create_localization_plan, LocalizationPlan
+from locawise.scheduling import AimdLimit, PriorityLimiter, read_learned_limits, write_learned_limits
+from locawise.processor import create_source_processor, SourceProcessor
+from locawise.server import LocalizationCoalescer, LocalizationServer
+from locawise.sharding import Shard, parse_shard, create_key_filter, create_source_digest, write_shard_results, \
+    read_shard_results
+from locawise.watch import FileWatcher
+
+_PARSE_CACHE_DIRECTORY = os.path.join('.locawise', 'cache')
+
+_LEARNED_LIMITS_FILE = os.path.join('.locawise', 'concurrency.json')
+
+_SOURCE_VALUES_FILE = os.path.join('.locawise', 'source-values.json')
+
+_SHARD_DIRECTORY = os.path.join('.locawise', 'shards')
 
 
 async def main():
     logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
     logging.getLogger("httpx").setLevel(logging.WARNING)
 
+    if len(sys.argv) > 1 and sys.argv[1] == 'serve':
+        await serve(sys.argv[2:])
+        return
+    if len(sys.argv) > 1 and sys.argv[1] == 'merge':
+        await merge(sys.argv[2:])
+        return
+
     parser = argparse.ArgumentParser(
         description='Process localization files based on configuration.',
         epilog='Example: python3 main.py config.yaml'
     )
     parser.add_argument("config_path", help="Path to the YAML configuration file")
+    parser.add_argument("--batch", action="store_true",
+                        help="Send all translation requests as a single provider batch job. Cheaper but slower, "
+                             "suited for large non-urgent runs. Only supported for OpenAI.")
+    parser.add_argument("--batch-job-id", default=None,
+                        help="Resume the batch job with the given id instead of submitting the same requests again. "
+                             "Implies --batch.")
+    parser.add_argument("--watch", action="store_true",
+                        help="Keep running and localize the keys that changed whenever the source file is saved.")
+    parser.add_argument("--parse-cache", action="store_true",
+                        help=f"Keep parsed localization files in {_PARSE_CACHE_DIRECTORY} next to the configuration "
+                             f"file so that unchanged files are not parsed again in the next run.")
+    parser.add_argument("--fsync", action="store_true",
+                        help="Flush the localization and lock files to disk before finishing a run, so that they "
+                             "survive a power loss. Slower on some file systems.")
+    parser.add_argument("--workers", type=int, default=0,
+                        help="Parse and serialize localization files on this many worker processes so that runs with "
+                             "many target languages use every core. By default this work runs on the main process.")
+    parser.add_argument("--plan", action="store_true",
+                        help="Print the keys, requests and estimated tokens and cost of the run per language without "
+                             "localizing anything.")
+    parser.add_argument("--deadline", type=float, default=None,
+                        help="Seconds the run may take. Languages are localized in order of their priority and saved "
+                             "as soon as they are done, and no request is started that is not expected to finish in "
+                             "time. Languages that could not be finished are left for the next run.")
+    parser.add_argument("--shard", default=None, metavar="I/N",
+                        help="Localize only the I-th of N shards of the keys, e.g. 2/8, and save the results in the "
+                             "shard directory instead of the localization files. Run every shard, on as many machines "
+                             "as you like, then assemble the localization files with 'locawise merge'.")
+    parser.add_argument("--shard-dir", default=_SHARD_DIRECTORY,
+                        help=f"The directory the results of shards are saved in, relative to the configuration file. "
+                             f"Defaults to {_SHARD_DIRECTORY}.")
     args = parser.parse_args()
+    cpupool.configure(args.workers)
+    try:
+        await _run(parser, args)
+    finally:
+        cpupool.shutdown()
 
+
+async def _run(parser: argparse.ArgumentParser, args: argparse.Namespace):
     # Run the async main function
     config_path = args.config_path
 
@@ -29,6 +97,408 @@ async def main():
     logging.info(f'Setting current working directory to {config_directory}')
     os.chdir(config_directory)
 
+    source_lang_file_path = _find_source_lang_file_path(config, config_directory)
+
+    logging.info(f'Localizing {source_lang_file_path}')
+
+    deadline = None
+    if args.deadline is not None:
+        if args.watch or args.batch or args.batch_job_id:
+            parser.error('--deadline cannot be combined with --watch or --batch')
+        deadline = time.monotonic() + args.deadline
+
+    shard: Shard | None = None
+    if args.shard is not None:
+        if args.watch or args.batch or args.batch_job_id or args.deadline is not None:
+            parser.error('--shard cannot be combined with --watch, --batch or --deadline')
+        try:
+            shard = parse_shard(args.shard)
+        except ValueError as e:
+            parser.error(str(e))
+
+    batch_strategy: BatchLLMStrategy | None = None
+    if args.batch or args.batch_job_id:
+        if args.watch:
+            parser.error('--batch cannot be combined with --watch')
+        batch_strategy = BatchLLMStrategy(OpenAiBatchBackend(model=config.llm_model), job_id=args.batch_job_id)
+        llm_context = LLMContext(batch_strategy)
+    else:
+        llm_context = await _create_llm_context(config, config_directory, deadline=deadline)
+    try:
+        lock_file_name = 'i18n.lock'
+        lock_file_path = os.path.join(config_directory, config.localization_root_path, lock_file_name)
+        parse_cache: ParseCache | None = None
+        if args.parse_cache:
+            parse_cache = ParseCache(cache_dir=os.path.join(config_directory, _PARSE_CACHE_DIRECTORY))
+        elif args.watch:
+            parse_cache = ParseCache()
+        processor = await create_source_processor(llm_context,
+                                                  source_file_path=source_lang_file_path,
+                                                  lock_file_path=lock_file_path,
+                                                  context=config.context,
+                                                  tone=config.tone,
+                                                  glossary=config.glossary,
+                                                  parse_cache=parse_cache,
+                                                  write_mode=config.write_mode,
+                                                  compact_prompts=config.compact_prompts,
+                                                  source_values_path=_find_source_values_path(config,
+                                                                                              config_directory),
+                                                  translation_memory=config.translation_memory,
+                                                  target_lang_codes=config.target_lang_codes)
+
+        if args.plan or config.max_tokens is not None or config.max_cost is not None:
+            plan = await create_localization_plan(processor,
+                                                  _find_target_paths(config, config_directory),
+                                                  model=_find_model(llm_context))
+            if args.plan:
+                print(plan.describe())
+                return
+            await _check_budget(plan, config)
+
+        if shard is not None:
+            await localize_shard(processor, config, config_directory, shard, args.shard_dir, fsync=args.fsync)
+        elif deadline is not None:
+            await localize_each_language(processor, config, config_directory, lock_file_path, fsync=args.fsync)
+        else:
+            await localize_all(processor,
+                               config,
+                               config_directory,
+                               lock_file_path,
+                               batch_strategy=batch_strategy,
+                               fsync=args.fsync)
+        logging.info('All tasks have finished.')
+
+        if args.watch:
+            await watch_source(processor, config, config_directory, lock_file_path, source_lang_file_path,
+                               fsync=args.fsync)
+    finally:
+        # the connection pools are closed while the event loop still runs
+        await llm_context.close()
+        await _save_learned_limits(llm_context, config_directory)
+
+
+async def localize_all(processor: SourceProcessor,
+                       config: LocalizationConfig,
+                       config_directory: str,
+                       lock_file_path: str,
+                       batch_strategy: BatchLLMStrategy | None = None,
+                       fsync: bool = False):
+    """
+    Localizes every target language, then moves all target files and the lock file into place at once. Nothing is
+    written when any of the languages fails.
+    """
+    async with AtomicWriteBatch(fsync=fsync) as write_batch:
+        async with asyncio.TaskGroup() as tg:
+            for target_lang_code, target_path in _find_target_paths(config, config_directory).items():
+                logging.info(f'Creating task for {target_lang_code}')
+                localization = processor.localize_to_target_language(target_path,
+                                                                     target_lang_code,
+                                                                     write_batch=write_batch)
+                if batch_strategy:
+                    localization = batch_strategy.track(localization)
+                tg.create_task(_with_language_priority(config, target_lang_code, localization))
+
+            if batch_strategy:
+                tg.create_task(batch_strategy.run())
+
+        # staged last so that the lock never records translations whose files were not saved
+        await _write_lock_files(processor, config, config_directory, lock_file_path, write_batch)
+        await write_batch.commit()
+
+
+async def localize_each_language(processor: SourceProcessor,
+                                 config: LocalizationConfig,
+                                 config_directory: str,
+                                 lock_file_path: str,
+                                 fsync: bool = False):
+    """
+    Localizes every target language and moves each target file into place as soon as its language is done, so the
+    languages that are finished are kept when others fail or run out of time. Each target file is saved with a lock file
+    of its language, so that the next run only localizes the languages that were not finished. The lock file of all
+    languages is only written when every language succeeded.
+
+    :raises LocalizationError: some of the languages failed, the others were saved
+    """
+    failed_lang_codes: dict[str, Exception] = {}
+
+    async def localize_language(target_lang_code: str, target_path: str):
+        try:
+            async with AtomicWriteBatch(fsync=fsync) as write_batch:
+                await processor.localize_to_target_language(target_path, target_lang_code, write_batch=write_batch)
+                await write_lock_file(create_language_lock_file_path(lock_file_path, target_lang_code),
+                                      processor.source_dict,
+                                      write_batch=write_batch,
+                                      key_value_hashes=processor.source_hashes)
+                await write_batch.commit()
+            logging.info(f'Saved {target_path}')
+        except Exception as e:
+            logging.error(f'Could not localize {target_lang_code}. {e}')
+            failed_lang_codes[target_lang_code] = e
+
+    async with asyncio.TaskGroup() as tg:
+        for target_lang_code, target_path in _find_target_paths(config, config_directory).items():
+            logging.info(f'Creating task for {target_lang_code}')
+            tg.create_task(_with_language_priority(config,
+                                                   target_lang_code,
+                                                   localize_language(target_lang_code, target_path)))
+
+    if failed_lang_codes:
+        raise LocalizationError(f'Could not localize {sorted(failed_lang_codes)}, the other languages were saved') \
+            from next(iter(failed_lang_codes.values()))
+
+    async with AtomicWriteBatch(fsync=fsync) as write_batch:
+        await _write_lock_files(processor, config, config_directory, lock_file_path, write_batch)
+        await write_batch.commit()
+
+
+async def localize_shard(processor: SourceProcessor,
+                         config: LocalizationConfig,
+                         config_directory: str,
+                         shard: Shard,
+                         shard_directory: str,
+                         fsync: bool = False):
+    """
+    Localizes the keys of the shard for every target language and saves them in the shard directory, where merge
+    picks them up. The localization files and the lock file are left as they are.
+    """
+    key_filter = create_key_filter(shard)
+    source_digest = create_source_digest(processor.source_hashes)
+    shard_directory = os.path.join(config_directory, shard_directory)
+    async with AtomicWriteBatch(fsync=fsync) as write_batch:
+        tasks = {}
+        async with asyncio.TaskGroup() as tg:
+            for target_lang_code, target_path in _find_target_paths(config, config_directory).items():
+                logging.info(f'Creating task for {target_lang_code} of shard {shard.index}/{shard.count}')
+                localization = processor.localize_shard(target_path, target_lang_code, key_filter)
+                tasks[target_lang_code] = tg.create_task(_with_language_priority(config, target_lang_code,
+                                                                                 localization))
+
+        for target_lang_code, task in tasks.items():
+            await write_shard_results(shard_directory, shard, target_lang_code, source_digest, task.result(),
+                                      write_batch)
+        await write_batch.commit()
+
+
+async def merge_shards(processor: SourceProcessor,
+                       config: LocalizationConfig,
+                       config_directory: str,
+                       lock_file_path: str,
+                       shard_count: int,
+                       shard_directory: str,
+                       fsync: bool = False):
+    """
+    Saves every target file with the results of all shards, then the lock file, all at once. Nothing is written when
+    the results of a shard are missing or out of date.
+
+    :raises LocalizationError:
+    """
+    source_digest = create_source_digest(processor.source_hashes)
+    shard_directory = os.path.join(config_directory, shard_directory)
+    async with AtomicWriteBatch(fsync=fsync) as write_batch:
+        for target_lang_code, target_path in _find_target_paths(config, config_directory).items():
+            localized_pairs = await read_shard_results(shard_directory, shard_count, target_lang_code, source_digest)
+            await processor.merge_target_language(target_path, localized_pairs, write_batch=write_batch,
+                                                  target_lang_code=target_lang_code)
+        await _write_lock_files(processor, config, config_directory, lock_file_path, write_batch)
+        await write_batch.commit()
+
+
+async def _write_lock_files(processor: SourceProcessor,
+                            config: LocalizationConfig,
+                            config_directory: str,
+                            lock_file_path: str,
+                            write_batch: AtomicWriteBatch):
+    source_values_path = _find_source_values_path(config, config_directory)
+    if source_values_path:
+        # the source values a lock records are written with it
+        await write_source_values_file(source_values_path, processor.source_dict, write_batch=write_batch)
+    await write_lock_file(lock_file_path,
+                          processor.source_dict,
+                          write_batch=write_batch,
+                          key_value_hashes=processor.source_hashes)
+    # the lock file now records every language
+    write_batch.after_commit(lambda: remove_language_lock_files(lock_file_path, config.target_lang_codes))
+
+
+def _find_source_values_path(config: LocalizationConfig, config_directory: str) -> str | None:
+    if not config.minimal_edits:
+        return None
+    return os.path.join(config_directory, _SOURCE_VALUES_FILE)
+
+
+async def _with_language_priority(config: LocalizationConfig, target_lang_code: str, localization: Coroutine):
+    # higher configured priorities go first
+    scheduling.prioritize(-config.language_priorities.get(target_lang_code, 0))
+    return await localization
+
+
+async def watch_source(processor: SourceProcessor,
+                       config: LocalizationConfig,
+                       config_directory: str,
+                       lock_file_path: str,
+                       source_lang_file_path: str,
+                       fsync: bool = False):
+    """
+    Localizes the changed keys whenever the source file changes. The config, LLM clients, source dict and parsed
+    target files are kept in memory between runs.
+    """
+    # the nom keys read from the lock file have been localized by the initial run
+    _mark_localized(processor)
+    watcher = FileWatcher(source_lang_file_path)
+    async for _ in watcher.changes():
+        logging.info(f'{source_lang_file_path} has changed')
+        try:
+            processor.update_source(await processor.parse_cache.parse(source_lang_file_path))
+            await localize_all(processor, config, config_directory, lock_file_path, fsync=fsync)
+            _mark_localized(processor)
+            logging.info('All tasks have finished. Waiting for changes.')
+        except Exception as e:
+            # keep watching, the file might have been saved in the middle of an edit
+            logging.exception(f'Localization failed, waiting for the next change. {e}')
+
+
+def _mark_localized(processor: SourceProcessor):
+    processor.nom_keys = set()
+    if processor.previous_source_values is not None:
+        processor.previous_source_values = {}
+    processor.language_nom_keys = {}
+    processor.language_previous_source_values = {}
+
+
+async def merge(argv: list[str]):
+    parser = argparse.ArgumentParser(
+        prog='locawise merge',
+        description='Assemble the localization files and the lock file from the results of every shard of a run with '
+                    '--shard. No LLM requests are made.',
+        epilog='Example: python3 -m locawise merge i18n.yaml --shards 8'
+    )
+    parser.add_argument("config_path", help="Path to the YAML configuration file")
+    parser.add_argument("--shards", type=int, required=True, help="The number of shards, N of --shard I/N")
+    parser.add_argument("--shard-dir", default=_SHARD_DIRECTORY,
+                        help=f"The directory the results of the shards were saved in, relative to the configuration "
+                             f"file. Defaults to {_SHARD_DIRECTORY}.")
+    parser.add_argument("--fsync", action="store_true",
+                        help="Flush the localization and lock files to disk before finishing.")
+    args = parser.parse_args(argv)
+    if args.shards < 1:
+        parser.error('--shards must be at least 1')
+
+    config = await read_localization_config_yaml(args.config_path)
+    config_directory = os.path.dirname(os.path.abspath(args.config_path))
+    lock_file_path = os.path.join(config_directory, config.localization_root_path, 'i18n.lock')
+    processor = await create_source_processor(None,
+                                              source_file_path=_find_source_lang_file_path(config, config_directory),
+                                              lock_file_path=lock_file_path,
+                                              write_mode=config.write_mode,
+                                              target_lang_codes=config.target_lang_codes)
+    await merge_shards(processor, config, config_directory, lock_file_path, args.shards, args.shard_dir,
+                       fsync=args.fsync)
+    logging.info(f'Merged the results of {args.shards} shards.')
+
+
+async def serve(argv: list[str]):
+    parser = argparse.ArgumentParser(
+        prog='locawise serve',
+        description='Serve localization as an HTTP API using the context, tone, glossary and LLM settings of a '
+                    'configuration file.',
+        epilog='Example: python3 -m locawise serve i18n.yaml --port 8080'
+    )
+    parser.add_argument("config_path", help="Path to the YAML configuration file")
+    parser.add_argument("--host", default="127.0.0.1", help="Interface to listen on")
+    parser.add_argument("--port", type=int, default=8080, help="Port to listen on")
+    args = parser.parse_args(argv)
+
+    config = await read_localization_config_yaml(args.config_path)
+    config_directory = os.path.dirname(os.path.abspath(args.config_path))
+    llm_context = await _create_llm_context(config, config_directory)
+    coalescer = LocalizationCoalescer(llm_context,
+                                      context=config.context,
+                                      tone=config.tone,
+                                      glossary=config.glossary,
+                                      compact_prompts=config.compact_prompts)
+    try:
+        await LocalizationServer(coalescer).serve(args.host, args.port)
+    finally:
+        await llm_context.close()
+        await _save_learned_limits(llm_context, config_directory)
+
+
+def _find_target_paths(config: LocalizationConfig, config_directory: str) -> dict[str, str]:
+    target_paths = {}
+    for target_lang_code in config.target_lang_codes:
+        target_file_name = generate_localization_file_name(target_lang_code, config.file_name_pattern)
+        target_paths[target_lang_code] = os.path.join(config_directory, config.localization_root_path, target_file_name)
+    return target_paths
+
+
+def _find_model(llm_context: LLMContext) -> str | None:
+    # requests go to the first strategy unless it fails, batch strategies send them with the model of their backend
+    strategy = llm_context.strategy
+    return getattr(strategy, 'model', None) or getattr(getattr(strategy, 'backend', None), 'model', None)
+
+
+async def _check_budget(plan: LocalizationPlan, config: LocalizationConfig):
+    """
+    :raises BudgetExceededError: the run would exceed max-tokens or max-cost and it was not confirmed
+    """
+    if config.max_cost is not None and plan.cost is None:
+        logging.warning(f'The price of {plan.model} is unknown, max-cost cannot be checked.')
+    violations = plan.find_budget_violations(max_tokens=config.max_tokens, max_cost=config.max_cost)
+    if not violations:
+        logging.info(f'Estimated {plan.total_tokens:,} tokens for {plan.key_count:,} keys, within budget')
+        return
+
+    message = 'The run would exceed its budget: ' + ', '.join(violations)
+    print(plan.describe())
+    if sys.stdin.isatty():
+        answer = await asyncio.to_thread(input, f'{message}. Continue? [y/N] ')
+        if answer.strip().lower() in ('y', 'yes'):
+            return
+    raise BudgetExceededError(message)
+
+
+async def _create_llm_context(config: LocalizationConfig,
+                              config_directory: str,
+                              deadline: float | None = None) -> LLMContext:
+    if config.llm_models:
+        llm_strategies = create_strategies(config.llm_models,
+                                           location=config.llm_location,
+                                           max_connections=config.max_concurrent_requests)
+    else:
+        llm_strategies = [create_strategy(model=config.llm_model,
+                                          location=config.llm_location,
+                                          max_connections=config.max_concurrent_requests)]
+    limiter = None
+    if config.max_concurrent_requests is not None or deadline is not None:
+        limiter = PriorityLimiter(config.max_concurrent_requests, deadline=deadline)
+
+    concurrency_limits = None
+    if config.adaptive_concurrency:
+        learned_limits = await read_learned_limits(os.path.join(config_directory, _LEARNED_LIMITS_FILE))
+        # max-concurrent-requests caps every learned limit and their sum, it is also the size of the connection pools
+        concurrency_limits = [AimdLimit(limit=learned_limits.get(create_strategy_key(strategy)),
+                                        maximum=config.max_concurrent_requests)
+                              for strategy in llm_strategies]
+    return LLMContext(llm_strategies,
+                      hedge=config.llm_hedging,
+                      limiter=limiter,
+                      concurrency_limits=concurrency_limits,
+                      max_concurrency=config.max_concurrent_requests)
+
+
+async def _save_learned_limits(llm_context: LLMContext, config_directory: str):
+    learned_limits = llm_context.learned_limits()
+    if not learned_limits:
+        return
+    file_path = os.path.join(config_directory, _LEARNED_LIMITS_FILE)
+    try:
+        # keep the limits of the models this run did not use
+        await write_learned_limits(file_path, await read_learned_limits(file_path) | learned_limits)
+    except OSError as e:
+        logging.warning(f'Could not save the learned concurrency limits to {file_path}. {e}')
+
+
+def _find_source_lang_file_path(config: LocalizationConfig, config_directory: str) -> str:
     source_lang_file_name = generate_localization_file_name(config.source_lang_code, config.file_name_pattern)
     source_lang_file_path = os.path.join(config_directory, config.localization_root_path, source_lang_file_name)
 
@@ -40,29 +510,7 @@ async def main():
             source_lang_file_path = os.path.join(config_directory, config.localization_root_path,
                                                  config.file_name_pattern.replace('messages_{language}',
                                                                                   'messages'))
-
-    logging.info(f'Localizing {source_lang_file_path}')
-
-    llm_strategy = create_strategy(model=config.llm_model, location=config.llm_location)
-    llm_context = LLMContext(llm_strategy)
-    lock_file_name = 'i18n.lock'
-    lock_file_path = os.path.join(config_directory, config.localization_root_path, lock_file_name)
-    processor = await create_source_processor(llm_context,
-                                              source_file_path=source_lang_file_path,
-                                              lock_file_path=lock_file_path,
-                                              context=config.context,
-                                              tone=config.tone,
-                                              glossary=config.glossary)
-
-    async with asyncio.TaskGroup() as tg:
-        for target_lang_code in config.target_lang_codes:
-            logging.info(f'Creating task for {target_lang_code}')
-            target_file_name = generate_localization_file_name(target_lang_code, config.file_name_pattern)
-            target_path = os.path.join(config_directory, config.localization_root_path, target_file_name)
-            tg.create_task(processor.localize_to_target_language(target_path, target_lang_code))
-
-        tg.create_task(write_lock_file(lock_file_path, processor.source_dict))
-    logging.info('All tasks have finished.')
+    return source_lang_file_path
 
 
 if __name__ == "__main__":
@@ -1,6 +1,7 @@
 import logging
 import re
 from collections import namedtuple, OrderedDict
+from collections.abc import Mapping, Iterator
 
 from lxml import etree
 
@@ -15,18 +16,58 @@ _ITEM_TAG: str = 'item'
 _STRING_ARRAY_ITEM_SEPARATOR = '_/_'
 _PLURALS_ITEM_SEPARATOR = '___'
 
+_CDATA_START = '<![CDATA['
+
 _TranslationPair = namedtuple('TranslationPair', ['key', 'value'])
 
+# a plurals or string-array resource, whose items are stored under separate keys
+_ResourceGroup = namedtuple('ResourceGroup', ['tag', 'name', 'item_attrib'])
+
+_PAIRS_PER_CHUNK = 1024
+
 
 def parse_xml_string(file_content: str) -> dict[str, str]:
+    may_contain_cdata = _CDATA_START in file_content
     file_content = file_content.encode("UTF-8")
     parser = etree.XMLParser(encoding='UTF-8', remove_comments=True, strip_cdata=False)
     content = etree.fromstring(file_content, parser=parser)
     tree = etree.ElementTree(content)
-    return _parse_xml_tree(tree)
+    return _parse_xml_tree(tree, may_contain_cdata=may_contain_cdata)
 
 
-def _parse_xml_tree(tree: etree.ElementTree) -> dict[str, str]:
+def parse_xml_file_streaming(file_path: str) -> dict[str, str]:
+    """
+    Parses a strings.xml file incrementally, every resource is released right after it is parsed so that the whole
+    tree is never held in memory.
+    """
+    may_contain_cdata = _file_contains(file_path, _CDATA_START.encode('UTF-8'))
+    result: dict[str, str] = OrderedDict()
+    root = None
+    depth = 0
+    for event, node in etree.iterparse(file_path, events=('start', 'end'), remove_comments=True, strip_cdata=False):
+        if event == 'start':
+            if root is None:
+                root = node
+                if root.tag.lower() != _RESOURCES_TAG:
+                    raise MalformedAndroidStringsXMLError("Expecting root tag to be <resources> tag.")
+            depth += 1
+            continue
+
+        depth -= 1
+        if depth != 1:
+            continue
+
+        for pair in _parse_resource_node(node, may_contain_cdata):
+            result[pair.key] = pair.value
+
+        node.clear()
+        while node.getprevious() is not None:
+            del root[0]
+
+    return result
+
+
+def _parse_xml_tree(tree: etree.ElementTree, may_contain_cdata: bool = True) -> dict[str, str]:
     result: dict[str, str] = OrderedDict()
 
     root = tree.getroot()
@@ -35,31 +76,33 @@ def _parse_xml_tree(tree: etree.ElementTree) -> dict[str, str]:
         raise MalformedAndroidStringsXMLError("Expecting root tag to be <resources> tag.")
 
     for node in root:
-        tag = node.tag.lower()
-
-        if tag == _STRING_TAG:
-            pairs = _parse_string_node(node)
-        elif tag == _PLURALS_TAG:
-            pairs = _parse_plurals_tree(node)
-        elif tag == _STRING_ARRAY_TAG:
-            pairs = _parse_string_array_tree(node)
-        else:
-            logging.warning(f"Unrecognized XML item {node}")
-            continue
-
-        for pair in pairs:
+        for pair in _parse_resource_node(node, may_contain_cdata):
             result[pair.key] = pair.value
 
     return result
 
 
-def _parse_string_node(node) -> list[_TranslationPair]:
+def _parse_resource_node(node, may_contain_cdata: bool) -> list[_TranslationPair]:
+    tag = node.tag.lower()
+
+    if tag == _STRING_TAG:
+        return _parse_string_node(node, may_contain_cdata)
+    elif tag == _PLURALS_TAG:
+        return _parse_plurals_tree(node, may_contain_cdata)
+    elif tag == _STRING_ARRAY_TAG:
+        return _parse_string_array_tree(node, may_contain_cdata)
+    else:
+        logging.warning(f"Unrecognized XML item {node}")
+        return []
+
+
+def _parse_string_node(node, may_contain_cdata: bool = True) -> list[_TranslationPair]:
     tag = node.tag.lower()
     if tag != _STRING_TAG:
         raise ValueError(f"Expected tag: {_STRING_TAG} actual tag: {tag}")
 
     key = node.attrib['name']
-    value = _extract_inner_content(node)
+    value = _extract_inner_content(node, may_contain_cdata)
     if key is None:
         raise MalformedAndroidStringsXMLError("Expecting <string> tag to contain a name attribute.")
 
@@ -68,7 +111,7 @@ def _parse_string_node(node) -> list[_TranslationPair]:
     return [pair]
 
 
-def _parse_string_array_tree(node) -> list[_TranslationPair]:
+def _parse_string_array_tree(node, may_contain_cdata: bool = True) -> list[_TranslationPair]:
     tag = node.tag.lower()
     if tag != _STRING_ARRAY_TAG:
         raise ValueError(f"Expected tag: {_STRING_ARRAY_TAG} actual tag: {tag}")
@@ -79,7 +122,7 @@ def _parse_string_array_tree(node) -> list[_TranslationPair]:
         child_tag = child.tag.lower()
         if child_tag == _ITEM_TAG:
             key = array_name + _STRING_ARRAY_ITEM_SEPARATOR + str(index)
-            value = _extract_inner_content(child)
+            value = _extract_inner_content(child, may_contain_cdata)
             pair = _TranslationPair(key=key, value=value)
             translation_pairs.append(pair)
         else:
@@ -88,7 +131,7 @@ def _parse_string_array_tree(node) -> list[_TranslationPair]:
     return translation_pairs
 
 
-def _parse_plurals_tree(node) -> list[_TranslationPair]:
+def _parse_plurals_tree(node, may_contain_cdata: bool = True) -> list[_TranslationPair]:
     tag = node.tag.lower()
     if tag != _PLURALS_TAG:
         raise ValueError(f"Expected tag: {_PLURALS_TAG} actual tag: {tag}")
@@ -98,7 +141,7 @@ def _parse_plurals_tree(node) -> list[_TranslationPair]:
     for child in node:
         child_tag = child.tag.lower()
         if child_tag == _ITEM_TAG:
-            value = _extract_inner_content(child)
+            value = _extract_inner_content(child, may_contain_cdata)
             quantity = child.attrib.get('quantity')
             if quantity is None:
                 raise MalformedAndroidStringsXMLError(
@@ -113,7 +156,37 @@ def _parse_plurals_tree(node) -> list[_TranslationPair]:
     return translation_pairs
 
 
-def _extract_inner_content(node) -> str:
+def _extract_inner_content(node, may_contain_cdata: bool = True) -> str:
+    """
+    Returns the markup between the start and end tags of node, exactly as etree.tostring would serialize it.
+    """
+    # lxml does not expose whether text came from a CDATA section, and children serialized on their own repeat the
+    # namespace declarations of their ancestors. Only the full serialization is correct in those cases.
+    if may_contain_cdata or (len(node) and node.nsmap):
+        return _extract_inner_content_by_serializing(node)
+
+    parts = [_escape_text(node.text)] if node.text else []
+    for child in node:
+        # includes the tail of the child
+        parts.append(etree.tostring(child, encoding='unicode'))
+    return ''.join(parts)
+
+
+def _escape_text(text: str) -> str:
+    return text.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;').replace('\r', '&#13;')
+
+
+def _file_contains(file_path: str, pattern: bytes, chunk_size: int = 1024 * 1024) -> bool:
+    with open(file_path, 'rb') as f:
+        overlap = b''
+        while chunk := f.read(chunk_size):
+            if pattern in chunk or pattern in overlap + chunk[:len(pattern) - 1]:
+                return True
+            overlap = chunk[-(len(pattern) - 1):]
+    return False
+
+
+def _extract_inner_content_by_serializing(node) -> str:
     # Convert the entire element to string
     xml_content = etree.tostring(node, encoding='unicode')
     if '/>' in xml_content and '</' not in xml_content:
@@ -130,14 +203,92 @@ def _extract_inner_content(node) -> str:
 
 
 # Building XML #
-def serialize_to_xml(pairs: dict[str, str]) -> str:
+def serialize_to_xml(pairs: Mapping[str, str]) -> str:
     tree = _build_xml_tree(pairs)
     etree.indent(tree, space='    ')
     _bytes = etree.tostring(tree, encoding='utf-8', xml_declaration=True)
     return _bytes.decode('utf-8')
 
 
-def _build_xml_tree(pairs: dict[str, str]):
+def iter_serialized_xml(pairs: Mapping[str, str], chunk_size: int = _PAIRS_PER_CHUNK) -> Iterator[str]:
+    """
+    Yields serialize_to_xml(pairs) in chunks, one resource element is built and serialized at a time instead of the
+    whole tree. The items of a plurals or string-array resource have to be adjacent for that, otherwise the tree is
+    built as usual.
+    """
+    if not _has_adjacent_resource_items(pairs):
+        yield serialize_to_xml(pairs)
+        return
+
+    yield "<?xml version='1.0' encoding='utf-8'?>\n"
+    if not pairs:
+        yield '<resources/>'
+        return
+
+    yield '<resources>'
+    # complete resource elements, serialized chunk_size at a time
+    elements = []
+    group_element = None
+    for key, value in pairs.items():
+        group = _find_resource_group(key)
+        if group_element is not None and (group is None or group.name != group_element.get('name')):
+            elements.append(group_element)
+            group_element = None
+
+        if group is None:
+            elements.append(_create_string_element(key, value))
+        else:
+            if group_element is None:
+                group_element = etree.Element(group.tag, {'name': group.name})
+            item = etree.SubElement(group_element, 'item', attrib=group.item_attrib)
+            item.text = value
+
+        if len(elements) >= chunk_size:
+            yield _serialize_resource_elements(elements)
+            elements = []
+
+    if group_element is not None:
+        elements.append(group_element)
+    if elements:
+        yield _serialize_resource_elements(elements)
+    yield '\n</resources>'
+
+
+def _find_resource_group(key: str) -> _ResourceGroup | None:
+    # the same split as _build_xml_tree
+    if _PLURALS_ITEM_SEPARATOR in key:
+        split = key.split(_PLURALS_ITEM_SEPARATOR)
+        return _ResourceGroup('plurals', split[0], {'quantity': split[1]})
+    if _STRING_ARRAY_ITEM_SEPARATOR in key:
+        return _ResourceGroup('string-array', key.split(_STRING_ARRAY_ITEM_SEPARATOR)[0], {})
+    return None
+
+
+def _has_adjacent_resource_items(pairs: Mapping[str, str]) -> bool:
+    closed_names = set()
+    current_name = None
+    for key in pairs:
+        group = _find_resource_group(key)
+        name = group.name if group else None
+        if name != current_name:
+            if current_name is not None:
+                closed_names.add(current_name)
+            if name is not None and name in closed_names:
+                return False
+            current_name = name
+    return True
+
+
+def _serialize_resource_elements(elements: list) -> str:
+    # under a root of their own the elements get the same indentation as in the whole tree, without the root tags
+    root = etree.Element(_RESOURCES_TAG)
+    root.extend(elements)
+    etree.indent(root, space='    ')
+    content = etree.tostring(root, encoding='unicode')
+    return content[len('<resources>'):-len('\n</resources>')]
+
+
+def _build_xml_tree(pairs: Mapping[str, str]):
     root = etree.Element('resources')
     plurals_and_string_arrays = {}
 
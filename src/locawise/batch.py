@@ -0,0 +1,345 @@
+import asyncio
+import contextvars
+import json
+import logging
+import os
+import uuid
+from abc import ABC, abstractmethod
+from collections import namedtuple
+from enum import Enum
+from typing import Any, Coroutine
+
+import openai
+import xxhash
+
+from locawise.envutils import retrieve_openai_api_key
+from locawise.errors import BatchJobError, LLMApiError
+from locawise.fileutils import read_file, write_to_file
+from locawise.llm import LLMStrategy, _parse_json_text
+
+_DEFAULT_POLL_INTERVAL_SECONDS = 30
+
+_OPENAI_BATCH_ENDPOINT = '/v1/responses'
+
+_OPENAI_BATCH_COMPLETION_WINDOW = '24h'
+
+BatchRequest = namedtuple('BatchRequest', ['custom_id', 'system_prompt', 'user_prompt'])
+
+# set by BatchLLMStrategy.track so that calls made by child tasks know which producer they belong to
+_current_producer: contextvars.ContextVar[int | None] = contextvars.ContextVar('batch_producer', default=None)
+
+
+class BatchStatus(Enum):
+    IN_PROGRESS = 'in_progress'
+    COMPLETED = 'completed'
+    FAILED = 'failed'
+
+
+class BatchBackend(ABC):
+    @abstractmethod
+    async def submit(self, requests: list[BatchRequest]) -> str:
+        """
+        :return: job id
+        """
+        pass
+
+    @abstractmethod
+    async def retrieve_status(self, job_id: str) -> BatchStatus:
+        pass
+
+    @abstractmethod
+    async def retrieve_results(self, job_id: str) -> dict[str, str]:
+        """
+        :return: custom id to output text, failed requests are omitted
+        """
+        pass
+
+    async def close(self):
+        pass
+
+
+class OpenAiBatchBackend(BatchBackend):
+    def __init__(self, model: str | None = None):
+        self.client = openai.AsyncClient(api_key=retrieve_openai_api_key(), max_retries=3)
+        if not model:
+            self.model = 'gpt-4.1-mini'
+        else:
+            self.model = model
+        self.temperature = 0
+
+    async def submit(self, requests: list[BatchRequest]) -> str:
+        content = create_batch_input_content(requests, model=self.model, temperature=self.temperature)
+        try:
+            input_file = await self.client.files.create(file=('locawise-batch.jsonl', content.encode('UTF-8')),
+                                                        purpose='batch')
+            batch = await self.client.batches.create(input_file_id=input_file.id,
+                                                     endpoint=_OPENAI_BATCH_ENDPOINT,
+                                                     completion_window=_OPENAI_BATCH_COMPLETION_WINDOW)
+        except openai.OpenAIError as e:
+            raise BatchJobError("Batch job could not be submitted") from e
+        return batch.id
+
+    async def close(self):
+        await self.client.close()
+
+    async def retrieve_status(self, job_id: str) -> BatchStatus:
+        try:
+            batch = await self.client.batches.retrieve(job_id)
+        except openai.OpenAIError as e:
+            raise BatchJobError(f"Batch job status could not be retrieved job_id={job_id}") from e
+
+        match batch.status:
+            case 'completed':
+                return BatchStatus.COMPLETED
+            case 'failed' | 'expired' | 'cancelled' | 'cancelling':
+                return BatchStatus.FAILED
+            case _:
+                return BatchStatus.IN_PROGRESS
+
+    async def retrieve_results(self, job_id: str) -> dict[str, str]:
+        try:
+            batch = await self.client.batches.retrieve(job_id)
+            if not batch.output_file_id:
+                return {}
+            output = await self.client.files.content(batch.output_file_id)
+        except openai.OpenAIError as e:
+            raise BatchJobError(f"Batch job results could not be retrieved job_id={job_id}") from e
+
+        return parse_batch_output_content(output.text)
+
+
+class LocalBatchBackend(BatchBackend):
+    """
+    Stand-in for a provider batch API. Jobs are files in a directory using the same input and output line formats as
+    OpenAI's Batch API, and are executed with the given strategy the first time their status is retrieved.
+    """
+
+    def __init__(self, directory: str, strategy: LLMStrategy):
+        self.directory = directory
+        self.strategy = strategy
+
+    async def submit(self, requests: list[BatchRequest]) -> str:
+        job_id = f'batch_{uuid.uuid4().hex}'
+        await write_to_file(self._input_path(job_id), create_batch_input_content(requests, model='local'))
+        await write_to_file(self._status_path(job_id), BatchStatus.IN_PROGRESS.value)
+        return job_id
+
+    async def retrieve_status(self, job_id: str) -> BatchStatus:
+        try:
+            status = BatchStatus(await read_file(self._status_path(job_id)))
+        except FileNotFoundError as e:
+            raise BatchJobError(f"Unknown batch job job_id={job_id}") from e
+
+        if status == BatchStatus.IN_PROGRESS:
+            await self._execute(job_id)
+            status = BatchStatus.COMPLETED
+            await write_to_file(self._status_path(job_id), status.value)
+        return status
+
+    async def retrieve_results(self, job_id: str) -> dict[str, str]:
+        try:
+            return parse_batch_output_content(await read_file(self._output_path(job_id)))
+        except FileNotFoundError:
+            return {}
+
+    async def _execute(self, job_id: str):
+        lines = []
+        for line in (await read_file(self._input_path(job_id))).splitlines():
+            if not line.strip():
+                continue
+            request = json.loads(line)
+            body = request['body']
+            try:
+                pairs = await self.strategy.call(body['instructions'], body['input'])
+                lines.append(_create_output_line(request['custom_id'], json.dumps(pairs, ensure_ascii=False)))
+            except LLMApiError as e:
+                lines.append(json.dumps({'custom_id': request['custom_id'], 'response': None,
+                                         'error': {'message': repr(e)}}))
+        await write_to_file(self._output_path(job_id), '\n'.join(lines) + '\n')
+
+    def _input_path(self, job_id: str) -> str:
+        return os.path.join(self.directory, f'{job_id}.input.jsonl')
+
+    def _output_path(self, job_id: str) -> str:
+        return os.path.join(self.directory, f'{job_id}.output.jsonl')
+
+    def _status_path(self, job_id: str) -> str:
+        return os.path.join(self.directory, f'{job_id}.status')
+
+
+class BatchLLMStrategy(LLMStrategy):
+    """
+    Defers calls into a single provider batch job.
+
+    Calls block until their result is available. Producers (e.g. one localization task per target language) are
+    registered with track; once every producer is either finished or waiting on deferred calls, run submits all
+    pending calls as one job, polls it and hands the results back to the callers.
+    Custom ids are derived from the prompts, so passing the job id of an earlier run resumes it without resubmitting.
+    """
+
+    def __init__(self,
+                 backend: BatchBackend,
+                 job_id: str | None = None,
+                 poll_interval: float = _DEFAULT_POLL_INTERVAL_SECONDS):
+        self.backend = backend
+        self.job_id = job_id
+        self.poll_interval = poll_interval
+        self._pending: dict[str, list[asyncio.Future]] = {}
+        self._requests: dict[str, BatchRequest] = {}
+        self._waiting_producers: dict[int, int] = {}
+        self._running_producers: set[int] = set()
+        self._changed = asyncio.Event()
+
+    async def call(self, system_prompt: str, user_prompt: str) -> dict[str, str]:
+        custom_id = create_custom_id(system_prompt, user_prompt)
+        future = asyncio.get_running_loop().create_future()
+        self._pending.setdefault(custom_id, []).append(future)
+        self._requests[custom_id] = BatchRequest(custom_id, system_prompt, user_prompt)
+
+        producer = _current_producer.get()
+        if producer is not None:
+            self._waiting_producers[producer] = self._waiting_producers.get(producer, 0) + 1
+        self._changed.set()
+        try:
+            return await future
+        finally:
+            if producer is not None:
+                self._waiting_producers[producer] -= 1
+
+    async def close(self):
+        await self.backend.close()
+
+    def track(self, coro: Coroutine) -> Coroutine:
+        """
+        Registers a producer. Must be called for every producer before run is started.
+        """
+        producer = id(coro)
+        self._running_producers.add(producer)
+        return self._track(producer, coro)
+
+    async def _track(self, producer: int, coro: Coroutine) -> Any:
+        _current_producer.set(producer)
+        try:
+            return await coro
+        finally:
+            self._running_producers.discard(producer)
+            self._changed.set()
+
+    async def run(self):
+        """
+        Submits and resolves batch jobs until every tracked producer has finished.
+        """
+        while self._running_producers or self._pending:
+            await self._changed.wait()
+            self._changed.clear()
+            if not self._pending or not self._all_producers_waiting():
+                continue
+
+            # calls of the same producer are issued in the same event loop iteration, give them a chance to arrive
+            pending_count = -1
+            while pending_count != len(self._pending):
+                pending_count = len(self._pending)
+                await asyncio.sleep(0)
+
+            await self._resolve_pending_calls()
+
+    def _all_producers_waiting(self) -> bool:
+        return all(self._waiting_producers.get(producer, 0) > 0 for producer in self._running_producers)
+
+    async def _resolve_pending_calls(self):
+        pending, self._pending = self._pending, {}
+        requests, self._requests = self._requests, {}
+
+        results: dict[str, str] = {}
+        if self.job_id:
+            logging.info(f'Resuming batch job job_id={self.job_id}')
+            results = await self._wait_for_results(self.job_id)
+            self.job_id = None
+
+        missing_requests = [request for custom_id, request in requests.items() if custom_id not in results]
+        if missing_requests:
+            job_id = await self.backend.submit(missing_requests)
+            logging.info(f'Submitted batch job with {len(missing_requests)} requests. job_id={job_id} '
+                         f'Pass this job id to resume if the run is interrupted.')
+            results.update(await self._wait_for_results(job_id))
+
+        for custom_id, futures in pending.items():
+            for future in futures:
+                if future.done():
+                    continue
+                if custom_id not in results:
+                    future.set_exception(LLMApiError(f'Batch request failed custom_id={custom_id}'))
+                    continue
+                try:
+                    future.set_result(_parse_json_text(results[custom_id]))
+                except Exception as e:
+                    future.set_exception(e)
+
+    async def _wait_for_results(self, job_id: str) -> dict[str, str]:
+        while True:
+            status = await self.backend.retrieve_status(job_id)
+            if status == BatchStatus.COMPLETED:
+                return await self.backend.retrieve_results(job_id)
+            if status == BatchStatus.FAILED:
+                raise BatchJobError(f'Batch job failed job_id={job_id}')
+
+            logging.info(f'Batch job is in progress job_id={job_id}')
+            await asyncio.sleep(self.poll_interval)
+
+
+def create_custom_id(system_prompt: str, user_prompt: str) -> str:
+    return xxhash.xxh3_128_hexdigest(f'{system_prompt}\0{user_prompt}')
+
+
+def create_batch_input_content(requests: list[BatchRequest], model: str, temperature: float = 0) -> str:
+    lines = []
+    for request in requests:
+        lines.append(json.dumps({
+            'custom_id': request.custom_id,
+            'method': 'POST',
+            'url': _OPENAI_BATCH_ENDPOINT,
+            'body': {
+                'model': model,
+                'instructions': request.system_prompt,
+                'input': request.user_prompt,
+                'temperature': temperature,
+            },
+        }, ensure_ascii=False))
+    return '\n'.join(lines) + '\n'
+
+
+def parse_batch_output_content(content: str) -> dict[str, str]:
+    results = {}
+    for line in content.splitlines():
+        if not line.strip():
+            continue
+        output = json.loads(line)
+        response = output.get('response')
+        if not response or response.get('status_code') != 200:
+            logging.warning(f"Batch request failed custom_id={output.get('custom_id')} error={output.get('error')}")
+            continue
+
+        results[output['custom_id']] = _extract_output_text(response['body'])
+    return results
+
+
+def _extract_output_text(body: dict) -> str:
+    texts = []
+    for item in body.get('output', []):
+        if item.get('type') != 'message':
+            continue
+        for content in item.get('content', []):
+            if content.get('type') == 'output_text':
+                texts.append(content['text'])
+    return ''.join(texts)
+
+
+def _create_output_line(custom_id: str, text: str) -> str:
+    return json.dumps({
+        'custom_id': custom_id,
+        'response': {
+            'status_code': 200,
+            'body': {'output': [{'type': 'message', 'content': [{'type': 'output_text', 'text': text}]}]},
+        },
+        'error': None,
+    }, ensure_ascii=False)
@@ -0,0 +1,136 @@
+from collections.abc import Mapping, MutableMapping, ItemsView, ValuesView, Iterable, Iterator
+
+
+class KeyTable:
+    """
+    The keys of a source file in their order. A key id is the position of the key, the catalogues of the source and of
+    every target language hold their values at these positions, so each key is stored once however many languages
+    there are.
+    """
+    __slots__ = ('keys', '_ids')
+
+    def __init__(self, keys: Iterable[str]):
+        self.keys: list[str] = list(keys)
+        self._ids: dict[str, int] = {key: key_id for key_id, key in enumerate(self.keys)}
+        if len(self._ids) != len(self.keys):
+            raise ValueError('Keys of a key table must be unique')
+
+    def get_id(self, key: str) -> int | None:
+        return self._ids.get(key)
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def __reduce__(self):
+        # the ids are rebuilt instead of being pickled for worker processes
+        return KeyTable, (self.keys,)
+
+
+class Catalogue(MutableMapping[str, str]):
+    """
+    A flat localization file, i.e. key-value pairs, whose keys come from a key table shared with the source file and
+    the other languages. Values are held in a list indexed by key id, None for the keys the file does not have.
+    Iteration follows the order of the key table, i.e. of the source file.
+
+    Keys outside the key table cannot be added, setting one raises KeyError.
+    """
+    __slots__ = ('key_table', '_values', '_size')
+
+    def __init__(self, key_table: KeyTable, values: list[str | None] | None = None):
+        """
+        :param values: a value or None for every key of the table, the catalogue owns the list
+        """
+        if values is None:
+            values = [None] * len(key_table)
+        elif len(values) != len(key_table):
+            raise ValueError(f'Expected {len(key_table)} values, got {len(values)}')
+        self.key_table = key_table
+        self._values = values
+        self._size = len(values) - values.count(None)
+
+    @classmethod
+    def from_pairs(cls, pairs: Mapping[str, str], key_table: KeyTable | None = None) -> 'Catalogue':
+        """
+        Creates a catalogue over a new key table of the keys of pairs, or over the given key table. Pairs whose key is not
+        in the given table are left out, e.g. the outdated keys of a target file.
+        """
+        if key_table is None:
+            return cls(KeyTable(pairs.keys()), list(pairs.values()))
+        if isinstance(pairs, Catalogue) and pairs.key_table is key_table:
+            return pairs.copy()
+
+        values: list[str | None] = [None] * len(key_table)
+        get_id = key_table.get_id
+        for key, value in pairs.items():
+            key_id = get_id(key)
+            if key_id is not None:
+                values[key_id] = value
+        return cls(key_table, values)
+
+    def missing_keys(self, other: Mapping[str, str]) -> set[str]:
+        """
+        The keys of this catalogue that other does not have.
+        """
+        if isinstance(other, Catalogue) and other.key_table is self.key_table:
+            return {key for key, value, other_value in zip(self.key_table.keys, self._values, other._values)
+                    if value is not None and other_value is None}
+        return {key for key in self if key not in other}
+
+    def copy(self) -> 'Catalogue':
+        return Catalogue(self.key_table, self._values.copy())
+
+    def __getitem__(self, key: str) -> str:
+        key_id = self.key_table.get_id(key)
+        value = None if key_id is None else self._values[key_id]
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key: str, value: str):
+        key_id = self.key_table.get_id(key)
+        if key_id is None:
+            raise KeyError(f'{key} is not in the key table')
+        if value is None:
+            raise ValueError('Catalogue values cannot be None')
+        if self._values[key_id] is None:
+            self._size += 1
+        self._values[key_id] = value
+
+    def __delitem__(self, key: str):
+        key_id = self.key_table.get_id(key)
+        if key_id is None or self._values[key_id] is None:
+            raise KeyError(key)
+        self._values[key_id] = None
+        self._size -= 1
+
+    def __contains__(self, key: object) -> bool:
+        key_id = self.key_table.get_id(key)
+        return key_id is not None and self._values[key_id] is not None
+
+    def __iter__(self) -> Iterator[str]:
+        return (key for key, value in zip(self.key_table.keys, self._values) if value is not None)
+
+    def __len__(self) -> int:
+        return self._size
+
+    def items(self) -> ItemsView[str, str]:
+        return _CatalogueItemsView(self)
+
+    def values(self) -> ValuesView[str]:
+        return _CatalogueValuesView(self)
+
+    def __repr__(self) -> str:
+        return f'Catalogue({dict(self.items())!r})'
+
+
+class _CatalogueItemsView(ItemsView):
+    def __iter__(self):
+        # without a key lookup per item, serializers iterate over every pair
+        catalogue: Catalogue = self._mapping
+        return ((key, value) for key, value in zip(catalogue.key_table.keys, catalogue._values) if value is not None)
+
+
+class _CatalogueValuesView(ValuesView):
+    def __iter__(self):
+        catalogue: Catalogue = self._mapping
+        return (value for value in catalogue._values if value is not None)
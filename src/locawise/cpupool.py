@@ -0,0 +1,68 @@
+import asyncio
+import logging
+import multiprocessing
+import sys
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable, Any
+
+# parsing and serialization jobs run here when configured, inline on the event loop otherwise
+_executor: Executor | None = None
+
+
+def configure(workers: int):
+    """
+    Runs CPU heavy jobs on the given number of worker processes, or threads when the interpreter has no GIL.
+    0 runs them inline. Call it before starting any thread so that the workers can be forked.
+    """
+    global _executor
+    shutdown()
+    if workers <= 0:
+        return
+
+    if _is_free_threaded():
+        _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='locawise-cpu')
+        logging.info(f'Parsing and serializing on {workers} threads')
+    else:
+        context = multiprocessing.get_context(_start_method())
+        if context.get_start_method() == 'forkserver':
+            # imported once by the server instead of by every worker
+            context.set_forkserver_preload(['locawise.parsing', 'locawise.serialization'])
+        _executor = ProcessPoolExecutor(max_workers=workers, mp_context=context)
+        # a forking pool starts all of its workers on the first submission, do it while this is the only thread
+        _executor.submit(int).result()
+        logging.info(f'Parsing and serializing on {workers} processes')
+
+
+def is_enabled() -> bool:
+    return _executor is not None
+
+
+async def run(func: Callable[..., Any], *args) -> Any:
+    """
+    Runs func on the configured workers. func must be a module level function, and its arguments and result must be
+    picklable, i.e. plain dicts and strings.
+    """
+    if _executor is None:
+        return func(*args)
+    return await asyncio.get_running_loop().run_in_executor(_executor, func, *args)
+
+
+def shutdown():
+    global _executor
+    if _executor is not None:
+        _executor.shutdown()
+        _executor = None
+
+
+def _start_method() -> str:
+    # forked workers start instantly with every module already imported, but forking a process that runs threads is
+    # unsafe, and a fresh interpreter spends more than a second importing the LLM clients
+    if sys.platform == 'linux' and threading.active_count() == 1:
+        return 'fork'
+    return 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+
+
+def _is_free_threaded() -> bool:
+    is_gil_enabled = getattr(sys, '_is_gil_enabled', None)
+    return is_gil_enabled is not None and not is_gil_enabled()
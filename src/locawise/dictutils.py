@@ -1,5 +1,6 @@
 import itertools
 from collections import OrderedDict
+from collections.abc import Mapping
 from itertools import batched
 from typing import Any
 
@@ -40,7 +41,7 @@ def flatten_dict(_dict: dict[str, Any], level_separator: str = '_/') -> dict[str
     return flatten_dict_recursive('', _dict)
 
 
-def unflatten_dict(_dict: dict[str, str], level_separator: str = '_/') -> dict[str, Any]:
+def unflatten_dict(_dict: Mapping[str, str], level_separator: str = '_/') -> dict[str, Any]:
     result = OrderedDict()
     for k, v in _dict.items():
         nodes = k.split(level_separator)
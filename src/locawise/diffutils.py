@@ -1,19 +1,28 @@
-from locawise.lockfile import hash_key_value_pair
+from collections.abc import Mapping
 
+from locawise.catalogue import Catalogue
+from locawise.lockfile import hash_key_value_pairs
 
-def retrieve_nom_source_keys(key_value_hashes: set[str], source_dict: dict[str, str]) -> set[str]:
-    """nom stands for new or modified"""
-    nom_keys = set()
-    for k, v in source_dict.items():
-        _hash = hash_key_value_pair(k, v)
-        if _hash not in key_value_hashes:
-            nom_keys.add(k)
 
-    return nom_keys
+def retrieve_nom_source_keys(key_value_hashes: set[str],
+                             source_dict: Mapping[str, str],
+                             source_hashes: list[str] | None = None) -> set[str]:
+    """
+    nom stands for new or modified
 
+    :param key_value_hashes: the digests read from the lock file
+    :param source_hashes: the digests of source_dict when they were already computed by hash_key_value_pairs
+    """
+    if source_hashes is None:
+        source_hashes = hash_key_value_pairs(source_dict)
+    return {k for k, _hash in zip(source_dict, source_hashes) if _hash not in key_value_hashes}
 
-def retrieve_keys_to_be_localized(source_dict: dict[str, str],
-                                  target_dict: dict[str, str],
+
+def retrieve_keys_to_be_localized(source_dict: Mapping[str, str],
+                                  target_dict: Mapping[str, str],
                                   nom_keys: set[str]) -> set[str]:
-    missing_target_keys = source_dict.keys() - target_dict.keys()
+    if isinstance(source_dict, Catalogue):
+        missing_target_keys = source_dict.missing_keys(target_dict)
+    else:
+        missing_target_keys = source_dict.keys() - target_dict.keys()
     return missing_target_keys | nom_keys
@@ -45,3 +45,20 @@ class LocalizationFileAlreadyUpToDateError(Exception):
 
 class MalformedAndroidStringsXMLError(Exception):
     pass
+
+
+class BatchJobError(Exception):
+    pass
+
+
+class BudgetExceededError(Exception):
+    pass
+
+
+class DeadlineExceededError(Exception):
+    pass
+
+
+# an object key that occurs twice in a JSON document
+class DuplicateJsonObjectKeyError(ValueError):
+    pass
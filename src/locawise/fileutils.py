@@ -1,21 +1,186 @@
+import asyncio
+import inspect
+import logging
 import os
+import stat
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Any, Iterable, Awaitable
 
-import aiofiles
+_IO_WORKERS = 4
+
+# files are read and written whole in a single job on this pool, so a run makes one thread hop per file and its IO does
+# not queue behind other work on the default executor
+_io_executor = ThreadPoolExecutor(max_workers=_IO_WORKERS, thread_name_prefix='locawise-io')
+
+
+async def run_io(func: Callable[..., Any], *args) -> Any:
+    return await asyncio.get_running_loop().run_in_executor(_io_executor, func, *args)
 
 
 async def read_file(file_path: str) -> str:
-    async with aiofiles.open(file_path, mode='r', encoding='UTF-8') as f:
-        contents = await f.read()
-        return contents
+    return await run_io(read_file_sync, file_path)
+
+
+def read_file_sync(file_path: str) -> str:
+    # a single read() decodes the whole file at once
+    with open(file_path, mode='r', encoding='UTF-8') as f:
+        return f.read()
+
+
+async def write_to_file(file_path: str, content: str | Iterable[str], fsync: bool = False):
+    """
+    Replaces the file atomically, readers see either the old or the new content but never a partially written file.
+
+    :param content: the content, or chunks of it that are consumed on the IO thread as they are written
+    """
+    await run_io(write_to_file_sync, file_path, content, fsync)
+
+
+def write_to_file_sync(file_path: str, content: str | Iterable[str], fsync: bool = False):
+    temp_path = _write_temp_file(file_path, content)
+    try:
+        _replace_all([(file_path, temp_path)], fsync)
+    except BaseException:
+        _remove_quietly(temp_path)
+        raise
+
+
+async def remove_file(file_path: str):
+    """
+    Removes the file, a file that does not exist is not an error.
+    """
+    await run_io(_remove_if_exists, file_path)
+
+
+def _remove_if_exists(file_path: str):
+    try:
+        os.remove(file_path)
+    except FileNotFoundError:
+        pass
+
+
+class AtomicWriteBatch:
+    """
+    Writes several files as one unit. Contents are staged in temporary files next to their targets and only moved into
+    place by commit(), in the order they were staged, so a failure or cancellation before the commit leaves every target
+    untouched. Stage the file that records the state of the others, e.g. the lock file, last.
+    """
+
+    def __init__(self, fsync: bool = False):
+        self.fsync = fsync
+        # target path -> temporary path
+        self._staged: dict[str, str] = {}
+        self._commit_callbacks: list[Callable[[], Awaitable[None] | None]] = []
+
+    async def stage(self, file_path: str, content: str | Iterable[str]):
+        temp_path = await run_io(_write_temp_file, file_path, content)
+        previous_temp_path = self._staged.pop(file_path, None)
+        if previous_temp_path is not None:
+            _remove_quietly(previous_temp_path)
+        self._staged[file_path] = temp_path
 
+    def after_commit(self, callback: Callable[[], Awaitable[None] | None]):
+        """
+        Registers a callback to run once the staged files are in place. Callbacks returning an awaitable are awaited.
+        """
+        self._commit_callbacks.append(callback)
 
-async def write_to_file(file_path: str, content: str):
-    # Extract the directory path
+    async def commit(self):
+        staged = list(self._staged.items())
+        self._staged.clear()
+        try:
+            await run_io(_replace_all, staged, self.fsync)
+        except BaseException:
+            for _, temp_path in staged:
+                _remove_quietly(temp_path)
+            raise
+
+        callbacks = self._commit_callbacks
+        self._commit_callbacks = []
+        for callback in callbacks:
+            result = callback()
+            if inspect.isawaitable(result):
+                await result
+
+    def discard(self):
+        for temp_path in self._staged.values():
+            _remove_quietly(temp_path)
+        self._staged.clear()
+        self._commit_callbacks.clear()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        # whatever was not committed is thrown away
+        self.discard()
+
+
+def _write_temp_file(file_path: str, content: str | Iterable[str]) -> str:
     directory = os.path.dirname(file_path)
 
     # Create the directory if it doesn't exist
     if directory and not os.path.exists(directory):
-        os.makedirs(directory)
+        os.makedirs(directory, exist_ok=True)
+
+    # the temporary file is created in the same directory since a rename is only atomic within a file system
+    temp_path = os.path.join(directory, f'.{os.path.basename(file_path)}.{uuid.uuid4().hex[:12]}.tmp')
+    try:
+        with open(temp_path, mode="x", encoding='UTF-8') as f:
+            if isinstance(content, str):
+                f.write(content)
+            else:
+                f.writelines(content)
+        _copy_mode(file_path, temp_path)
+    except BaseException:
+        _remove_quietly(temp_path)
+        raise
+    return temp_path
+
+
+def _replace_all(staged: list[tuple[str, str]], fsync: bool):
+    if fsync:
+        # data first, so that no rename can be persisted before the content it points to
+        for _, temp_path in staged:
+            _fsync_file(temp_path)
+
+    for file_path, temp_path in staged:
+        os.replace(temp_path, file_path)
+
+    if fsync:
+        for directory in {os.path.dirname(os.path.abspath(file_path)) for file_path, _ in staged}:
+            _fsync_directory(directory)
+
+
+def _copy_mode(source_path: str, target_path: str):
+    try:
+        os.chmod(target_path, stat.S_IMODE(os.stat(source_path).st_mode))
+    except FileNotFoundError:
+        pass
+
+
+def _fsync_file(file_path: str):
+    with open(file_path, 'rb') as f:
+        os.fsync(f.fileno())
+
+
+def _fsync_directory(directory: str):
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        # directories cannot be opened on some platforms, e.g. Windows
+        return
+    try:
+        os.fsync(fd)
+    except OSError as e:
+        logging.debug(f'Could not fsync {directory}. {e!r}')
+    finally:
+        os.close(fd)
+
 
-    async with aiofiles.open(file_path, mode="w", encoding='UTF-8') as f:
-        await f.write(content)
+def _remove_quietly(file_path: str):
+    try:
+        os.remove(file_path)
+    except OSError:
+        pass
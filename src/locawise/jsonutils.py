@@ -0,0 +1,349 @@
+import json
+import re
+from collections import namedtuple
+from collections.abc import Mapping
+from json.decoder import scanstring
+from json.encoder import encode_basestring
+from typing import Any, Iterator, TextIO
+
+from locawise.dictutils import unflatten_dict
+from locawise.errors import UnsupportedLocalizationKeyError, DuplicateJsonObjectKeyError
+
+_DEFAULT_CHUNK_SIZE = 1024 * 1024
+
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+
+_SCALAR_END = re.compile(r'[ \t\n\r,}\]]')
+
+_DECODER = json.JSONDecoder()
+
+_INDENT = '  '
+
+_PAIRS_PER_CHUNK = 1024
+
+# what json.dumps uses with ensure_ascii=False
+_encode_string = encode_basestring
+
+# a key or string value without escapes, followed by the colon for keys
+_PLAIN_KEY = re.compile(r'"([^"\\\x00-\x1f]*)"[ \t\n\r]*:[ \t\n\r]*')
+
+_PLAIN_STRING = re.compile(r'"([^"\\\x00-\x1f]*)"')
+
+# start is the position of the member's key, value_start and end delimit its value. separator is the whitespace in
+# front of the member, after the opening brace or the preceding comma.
+JsonMember = namedtuple('JsonMember', ['key', 'value', 'start', 'value_start', 'end', 'separator', 'parent'])
+
+# open and close are the positions of the braces, member is the member holding the object (None for the root)
+JsonObject = namedtuple('JsonObject', ['prefix', 'open', 'close', 'members', 'member'])
+
+
+def iter_flattened_json(file: TextIO,
+                        level_separator: str = '_/',
+                        chunk_size: int = _DEFAULT_CHUNK_SIZE) -> Iterator[tuple[str, Any]]:
+    """
+    Yields the same pairs as flatten_dict(json.load(file)) without materializing the document. Only nested objects are
+    walked incrementally, any other value (strings, numbers, arrays...) is decoded as a whole.
+
+    :raises ValueError: the content is not a valid JSON object
+    :raises DuplicateJsonObjectKeyError: a key occurs twice in an object and one of its values is an object. json.load
+    keeps only the last value, whose pairs would have to replace the ones already yielded.
+    :raises UnsupportedLocalizationKeyError: a key contains the level separator
+    """
+    return _JsonObjectStream(file, chunk_size).iter_flattened(level_separator)
+
+
+class _JsonObjectStream:
+    def __init__(self, file: TextIO, chunk_size: int):
+        self.file = file
+        self.chunk_size = chunk_size
+        self.buffer = ''
+        self.position = 0
+        self.eof = False
+
+    def iter_flattened(self, level_separator: str) -> Iterator[tuple[str, Any]]:
+        self._consume('{')
+        # prefixes of the objects that are currently open, and whether the members they have so far are objects
+        prefixes = ['']
+        members: list[dict[str, bool]] = [{}]
+        first_member = True
+        while prefixes:
+            char = self._peek()
+            if char == '}':
+                self.position += 1
+                prefixes.pop()
+                members.pop()
+                first_member = False
+                continue
+
+            if not first_member:
+                self._consume(',')
+
+            if self._peek() != '"':
+                raise ValueError(f'Expecting property name enclosed in double quotes at {self._describe_position()}')
+            key = self._read_string()
+            if level_separator in key:
+                raise UnsupportedLocalizationKeyError(f'{level_separator} is not allowed in keys. Please change it.')
+            self._consume(':')
+
+            value_start = self._peek()
+            is_object = value_start == '{'
+            # a value replacing a value is taken care of by the dict of the pairs, anything involving an object is not
+            was_object = members[-1].get(key)
+            if was_object is not None and (was_object or is_object):
+                raise DuplicateJsonObjectKeyError(f'Duplicate key {prefixes[-1] + key}')
+            members[-1][key] = is_object
+
+            if is_object:
+                self.position += 1
+                prefixes.append(prefixes[-1] + key + level_separator)
+                members.append({})
+                first_member = True
+            elif not value_start:
+                raise ValueError('Expecting value at the end of the file')
+            else:
+                yield prefixes[-1] + key, self._read_value()
+                first_member = False
+
+        if self._peek():
+            raise ValueError(f'Extra data at {self._describe_position()}')
+
+    def _fill(self) -> bool:
+        if self.eof:
+            return False
+
+        chunk = self.file.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+
+        self.buffer = self.buffer[self.position:] + chunk
+        self.position = 0
+        return True
+
+    def _peek(self) -> str:
+        """skips whitespace and returns the next character, or an empty string at the end of the file"""
+        while True:
+            if self.position < len(self.buffer):
+                char = self.buffer[self.position]
+                if char not in ' \t\n\r':
+                    return char
+                self.position = _WHITESPACE.match(self.buffer, self.position).end()
+                if self.position < len(self.buffer):
+                    return self.buffer[self.position]
+            if not self._fill():
+                return ''
+
+    def _consume(self, char: str):
+        if self._peek() != char:
+            raise ValueError(f'Expecting {char!r} at {self._describe_position()}')
+        self.position += 1
+
+    def _read_string(self) -> str:
+        while True:
+            try:
+                value, end = scanstring(self.buffer, self.position + 1, True)
+                self.position = end
+                return value
+            except json.JSONDecodeError:
+                # the string might continue in the next chunk
+                if not self._fill():
+                    raise
+
+    def _read_value(self) -> Any:
+        if self.buffer[self.position] not in '"[':
+            # numbers and literals are not self delimiting, make sure they are not cut off at the end of the buffer
+            while not _SCALAR_END.search(self.buffer, self.position) and self._fill():
+                pass
+
+        while True:
+            try:
+                value, end = _DECODER.raw_decode(self.buffer, self.position)
+                self.position = end
+                return value
+            except json.JSONDecodeError:
+                # strings and arrays might continue in the next chunk
+                if not self._fill():
+                    raise
+
+    def _describe_position(self) -> str:
+        return f'{self.buffer[self.position:self.position + 20]!r}'
+
+
+def iter_unflattened_json(pairs: Mapping[str, Any],
+                          level_separator: str = '_/',
+                          chunk_size: int = _PAIRS_PER_CHUNK) -> Iterator[str]:
+    """
+    Yields json.dumps(unflatten_dict(pairs), ensure_ascii=False, indent=2) in chunks without building the nested dicts.
+    That takes the keys of every object to be adjacent, which they are for pairs read from a JSON file, and string
+    values. Other pairs are unflattened and dumped as usual.
+    """
+    if not _is_writable_in_one_pass(pairs, level_separator):
+        yield json.dumps(unflatten_dict(pairs, level_separator), ensure_ascii=False, indent=2)
+        return
+
+    if not pairs:
+        yield '{}'
+        return
+
+    chunk = ['{']
+    # keys of the open objects below the root, and whether the innermost open object has no member yet
+    path: list[str] = []
+    is_first_member = True
+    # the flattened key prefix of the innermost open object, and the indentation of its members
+    prefix = ''
+    indent = _INDENT
+    for key, value in pairs.items():
+        leaf = key[len(prefix):]
+        if not key.startswith(prefix) or level_separator in leaf:
+            nodes = key.split(level_separator)
+            common = _common_prefix_length(path, nodes)
+            while len(path) > common:
+                path.pop()
+                chunk.append(f'\n{_INDENT * (len(path) + 1)}}}')
+                is_first_member = False
+
+            for node in nodes[common:-1]:
+                separator = '\n' if is_first_member else ',\n'
+                chunk.append(f'{separator}{_INDENT * (len(path) + 1)}{_encode_string(node)}: {{')
+                path.append(node)
+                is_first_member = True
+
+            leaf = nodes[-1]
+            prefix = ''.join(node + level_separator for node in path)
+            indent = _INDENT * (len(path) + 1)
+
+        separator = '\n' if is_first_member else ',\n'
+        chunk.append(f'{separator}{indent}{_encode_string(leaf)}: {_encode_string(value)}')
+        is_first_member = False
+        if len(chunk) >= chunk_size:
+            yield ''.join(chunk)
+            chunk = []
+
+    while path:
+        path.pop()
+        chunk.append(f'\n{_INDENT * (len(path) + 1)}}}')
+    chunk.append('\n}')
+    yield ''.join(chunk)
+
+
+def _is_writable_in_one_pass(pairs: Mapping[str, Any], level_separator: str) -> bool:
+    closed_paths = set()
+    path: list[str] = []
+    prefix = ''
+    for key, value in pairs.items():
+        if type(value) is not str:
+            return False
+        # a member of the same object as the previous key
+        if key.startswith(prefix) and level_separator not in key[len(prefix):]:
+            continue
+
+        nodes = key.split(level_separator)
+        common = _common_prefix_length(path, nodes)
+        while len(path) > common:
+            closed_paths.add(tuple(path))
+            path.pop()
+
+        for node in nodes[common:-1]:
+            path.append(node)
+            # an object that was already closed, or a key that is both a value and an object
+            if tuple(path) in closed_paths or level_separator.join(path) in pairs:
+                return False
+        prefix = ''.join(node + level_separator for node in path)
+    return True
+
+
+def _common_prefix_length(path: list[str], nodes: list[str]) -> int:
+    # the last node is the key of a value, never an object on the path
+    length = 0
+    limit = min(len(path), len(nodes) - 1)
+    while length < limit and path[length] == nodes[length]:
+        length += 1
+    return length
+
+
+def scan_json_spans(content: str, level_separator: str = '_/') -> tuple[dict[str, JsonMember], dict[str, JsonObject]]:
+    """
+    Locates every member of a JSON document. Returns the leaf members by flattened key, i.e. the keys of
+    flatten_dict(json.loads(content)), and the objects by their flattened key prefix ('' for the root object).
+
+    :raises ValueError: the content is not a valid JSON object or has duplicate keys
+    :raises UnsupportedLocalizationKeyError: a key contains the level separator
+    """
+    leaves: dict[str, JsonMember] = {}
+    objects: dict[str, JsonObject] = {}
+    position = _WHITESPACE.match(content, 0).end()
+    if content[position:position + 1] != '{':
+        raise ValueError('Expecting a JSON object')
+
+    # (prefix, open, members) of the objects that are currently open
+    stack: list[tuple[str, int, list[JsonMember]]] = [('', position, [])]
+    position += 1
+    separator_start = position
+    first_member = True
+    while stack:
+        position = _WHITESPACE.match(content, position).end()
+        char = content[position:position + 1]
+        if char == '}':
+            prefix, open_position, members = stack.pop()
+            position += 1
+            member = None
+            if stack:
+                # the end of an object member is only known once the object is closed
+                parent_members = stack[-1][2]
+                member = parent_members[-1]._replace(end=position)
+                parent_members[-1] = member
+            objects[prefix] = JsonObject(prefix, open_position, position - 1, members, member)
+            first_member = False
+            continue
+
+        if not first_member:
+            if char != ',':
+                raise ValueError(f'Expecting \',\' at {position}')
+            separator_start = position + 1
+            position = _WHITESPACE.match(content, separator_start).end()
+            char = content[position:position + 1]
+        if char != '"':
+            raise ValueError(f'Expecting property name enclosed in double quotes at {position}')
+
+        start = position
+        plain_key = _PLAIN_KEY.match(content, position)
+        if plain_key is not None:
+            key = plain_key.group(1)
+            value_start = plain_key.end()
+        else:
+            key, position = scanstring(content, position + 1, True)
+            position = _WHITESPACE.match(content, position).end()
+            if content[position:position + 1] != ':':
+                raise ValueError(f'Expecting \':\' at {position}')
+            value_start = _WHITESPACE.match(content, position + 1).end()
+        if level_separator in key:
+            raise UnsupportedLocalizationKeyError(f'{level_separator} is not allowed in keys. Please change it.')
+
+        prefix, _, members = stack[-1]
+        flattened_key = prefix + key
+        if flattened_key in leaves or flattened_key + level_separator in objects:
+            raise ValueError(f'Duplicate key {flattened_key}')
+
+        separator = content[separator_start:start]
+        if content[value_start:value_start + 1] == '{':
+            members.append(JsonMember(flattened_key, None, start, value_start, None, separator, prefix))
+            stack.append((flattened_key + level_separator, value_start, []))
+            position = value_start + 1
+            separator_start = position
+            first_member = True
+            continue
+
+        plain_string = _PLAIN_STRING.match(content, value_start)
+        if plain_string is not None:
+            value, position = plain_string.group(1), plain_string.end()
+        else:
+            value, position = _DECODER.raw_decode(content, value_start)
+        member = JsonMember(flattened_key, value, start, value_start, position, separator, prefix)
+        members.append(member)
+        leaves[flattened_key] = member
+        first_member = False
+
+    if _WHITESPACE.match(content, position).end() != len(content):
+        raise ValueError(f'Extra data at {position}')
+
+    return leaves, objects
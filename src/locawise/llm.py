@@ -1,7 +1,13 @@
+import asyncio
+import importlib.util
 import json
 import logging
+import math
 import re
+import statistics
+import time
 from abc import ABC, abstractmethod
+from collections import deque
 
 import httpx
 import openai
@@ -10,32 +16,271 @@ from google.genai import types
 from google.genai.errors import APIError
 from openai import APIStatusError, OpenAIError
 from tenacity import retry, stop_after_attempt, retry_if_exception_type, \
-    wait_random_exponential
+    wait_random_exponential, AsyncRetrying, RetryCallState
 
 from locawise.envutils import retrieve_openai_api_key,retrieve_google_api_key
 from locawise.errors import InvalidLLMOutputError, LLMApiError, TransientLLMApiError
+from locawise.scheduling import AimdLimit, PriorityLimiter
 
 _NON_RETRYABLE_ERROR_STATUS_CODES = [400, 401, 403, 404, 409, 422]
 
+_TRANSIENT_ERROR_ATTEMPTS = 8
+
+_TRANSIENT_ERROR_WAIT = wait_random_exponential(multiplier=5, exp_base=3, max=300, min=15)
+
+# an invalid answer is asked for again right away, a few times, it is not a sign of load
+_INVALID_OUTPUT_ATTEMPTS = 3
+
+# number of recent calls a strategy's routing statistics are computed over
+_STATS_WINDOW_SIZE = 50
+
+# hedging needs a somewhat stable latency distribution before its p95 means anything
+_MIN_SAMPLES_FOR_HEDGING = 5
+
+_HEDGE_PERCENTILE = 0.95
+
+_ERROR_RATE_PENALTY = 4
+
+# httpx' default pool size, used when the number of concurrent requests is not limited
+_DEFAULT_MAX_CONNECTIONS = 100
+
+# idle connections are kept open between the chunks of a run, or the requests of the server, instead of httpx' 5 seconds
+_KEEPALIVE_EXPIRY_SECONDS = 120
+
 
 class LLMStrategy(ABC):
-    @retry(stop=stop_after_attempt(8),
-           wait=wait_random_exponential(multiplier=5, exp_base=3, max=300, min=15),
+    @retry(stop=stop_after_attempt(_TRANSIENT_ERROR_ATTEMPTS),
+           wait=_TRANSIENT_ERROR_WAIT,
            retry=retry_if_exception_type(TransientLLMApiError))
     @abstractmethod
     async def call(self, system_prompt: str, user_prompt: str) -> dict[str, str]:
         pass
 
+    async def close(self):
+        """
+        Releases the connections of the strategy.
+        """
+        pass
+
+
+class _StrategyStats:
+    """
+    Rolling latency and error statistics of a single strategy, used for routing and hedging decisions.
+    """
+
+    def __init__(self, window_size: int = _STATS_WINDOW_SIZE):
+        self.latencies: deque[float] = deque(maxlen=window_size)
+        self.failures: deque[bool] = deque(maxlen=window_size)
+        self.in_flight = 0
+
+    def record_success(self, latency: float):
+        self.latencies.append(latency)
+        self.failures.append(False)
+
+    def record_failure(self):
+        self.failures.append(True)
+
+    @property
+    def error_rate(self) -> float:
+        if not self.failures:
+            return 0.0
+        return sum(self.failures) / len(self.failures)
+
+    def latency_percentile(self, percentile: float) -> float | None:
+        if len(self.latencies) < _MIN_SAMPLES_FOR_HEDGING:
+            return None
+        ordered = sorted(self.latencies)
+        index = min(len(ordered) - 1, int(percentile * len(ordered)))
+        return ordered[index]
+
+    def score(self) -> float:
+        """lower is better, strategies without any samples score 0 so that they get explored"""
+        if not self.failures:
+            expected_latency = 0.0
+        elif not self.latencies:
+            expected_latency = math.inf
+        else:
+            expected_latency = statistics.fmean(self.latencies)
+        return expected_latency * (1 + _ERROR_RATE_PENALTY * self.error_rate)
+
 
 class LLMContext:
-    def __init__(self, strategy: LLMStrategy):
-        self.strategy = strategy
+    """
+    Routes calls to a pool of strategies.
+
+    Every call goes to the strategy with the best recent latency and error rate, and fails over to the remaining
+    strategies on LLMApiError. When hedging is enabled, a call that has not finished after the p95 latency of its
+    strategy is duplicated to the next best strategy and whichever answers first wins. With a limiter, the duplicate
+    needs a slot of its own and the call is not duplicated when none is free.
+    Calls failing with a TransientLLMApiError are retried with an exponential backoff, calls with an invalid answer are
+    retried a few times without waiting.
+    With a limiter, calls wait for a slot of the limiter in order of their priority. A retried call gives up its slot
+    during the backoff and waits for a slot again.
+    With concurrency limits, the limit of the limiter is the sum of the limits learned for the strategies from the
+    outcome of their calls, capped at max_concurrency. It grows while calls succeed at a stable latency and shrinks on
+    transient errors, e.g. rate limits, and rising latencies.
+    """
+
+    def __init__(self,
+                 strategy: LLMStrategy | list[LLMStrategy],
+                 hedge: bool = False,
+                 limiter: PriorityLimiter | None = None,
+                 concurrency_limits: list[AimdLimit] | None = None,
+                 max_concurrency: int | None = None):
+        """
+        :param concurrency_limits: one per strategy, in the same order
+        :param max_concurrency: the most concurrent calls the concurrency limits add up to, None for no cap
+        """
+        strategies = list(strategy) if isinstance(strategy, list) else [strategy]
+        if not strategies:
+            raise ValueError("LLMContext requires at least one strategy")
+
+        self.strategies = strategies
+        self.strategy = strategies[0]
+        self.hedge = hedge
+        self.limiter = limiter
+        self._stats = [_StrategyStats() for _ in strategies]
+        self.concurrency_limits = concurrency_limits
+        self.max_concurrency = max_concurrency
+        if concurrency_limits is not None:
+            if len(concurrency_limits) != len(strategies):
+                raise ValueError("LLMContext requires a concurrency limit for every strategy")
+            if self.limiter is None:
+                self.limiter = PriorityLimiter()
+            self._update_max_concurrency()
 
     async def call(self, system_prompt: str, user_prompt: str) -> dict[str, str]:
         """
         :raise LLMApiError
+        :raise DeadlineExceededError: the deadline of the limiter passed
          """
-        return await self.strategy.call(system_prompt, user_prompt)
+        # retried here rather than by the strategies, so that a retry waits for a slot of the limit the error reduced
+        retrying = AsyncRetrying(stop=_stop_retrying,
+                                 wait=_wait_before_retry,
+                                 retry=retry_if_exception_type(TransientLLMApiError),
+                                 reraise=True)
+        async for attempt in retrying:
+            with attempt:
+                return await self._call_once(system_prompt, user_prompt)
+
+    async def _call_once(self, system_prompt: str, user_prompt: str) -> dict[str, str]:
+        if self.limiter is None:
+            return await self._route(system_prompt, user_prompt)
+        async with self.limiter.acquire():
+            return await self._route(system_prompt, user_prompt)
+
+    async def _route(self, system_prompt: str, user_prompt: str) -> dict[str, str]:
+        ranking = self._rank_strategies()
+        if len(ranking) == 1:
+            return await self._call_strategy(ranking[0], system_prompt, user_prompt)
+
+        last_error: LLMApiError | None = None
+        for position, index in enumerate(ranking):
+            try:
+                if self.hedge and position + 1 < len(ranking):
+                    return await self._hedged_call(index, ranking[position + 1], system_prompt, user_prompt)
+                return await self._call_strategy(index, system_prompt, user_prompt)
+            except LLMApiError as e:
+                logging.warning(f"LLM strategy {type(self.strategies[index]).__name__} failed, trying the next one.")
+                last_error = e
+
+        raise last_error
+
+    async def close(self):
+        for strategy in self.strategies:
+            await strategy.close()
+
+    def learned_limits(self) -> dict[str, float]:
+        """
+        The concurrency limit learned for every strategy, by the key of the strategy.
+        """
+        if self.concurrency_limits is None:
+            return {}
+        return {create_strategy_key(strategy): limit.limit
+                for strategy, limit in zip(self.strategies, self.concurrency_limits)}
+
+    def _rank_strategies(self) -> list[int]:
+        return sorted(range(len(self.strategies)),
+                      key=lambda i: (self._stats[i].score(), self._stats[i].in_flight, i))
+
+    async def _call_strategy(self, index: int, system_prompt: str, user_prompt: str) -> dict[str, str]:
+        stats = self._stats[index]
+        stats.in_flight += 1
+        start = time.monotonic()
+        try:
+            result = await self.strategies[index].call(system_prompt, user_prompt)
+        except LLMApiError as e:
+            stats.record_failure()
+            # an invalid answer says nothing about the load of the provider
+            if isinstance(e, TransientLLMApiError) and not isinstance(e, InvalidLLMOutputError):
+                self._record_overload(index)
+            raise
+        finally:
+            stats.in_flight -= 1
+
+        latency = time.monotonic() - start
+        stats.record_success(latency)
+        if self.concurrency_limits is not None:
+            self.concurrency_limits[index].record_success(latency)
+            self._update_max_concurrency()
+        return result
+
+    def _record_overload(self, index: int):
+        if self.concurrency_limits is not None:
+            self.concurrency_limits[index].record_overload()
+            self._update_max_concurrency()
+
+    def _update_max_concurrency(self):
+        total = sum(limit.limit for limit in self.concurrency_limits)
+        if self.max_concurrency is not None:
+            total = min(total, self.max_concurrency)
+        self.limiter.set_max_concurrency(max(1, int(total)))
+
+    async def _hedged_call(self, primary: int, secondary: int, system_prompt: str, user_prompt: str) \
+            -> dict[str, str]:
+        hedge_delay = self._stats[primary].latency_percentile(_HEDGE_PERCENTILE)
+        if hedge_delay is None:
+            return await self._call_strategy(primary, system_prompt, user_prompt)
+
+        primary_task = asyncio.create_task(self._call_strategy(primary, system_prompt, user_prompt))
+        pending = {primary_task}
+        error: BaseException | None = None
+        try:
+            done, pending = await asyncio.wait(pending, timeout=hedge_delay)
+            if done:
+                return primary_task.result()
+
+            if self.limiter is not None and not self.limiter.try_acquire():
+                return await primary_task
+
+            logging.info(f"Call did not finish within {hedge_delay:.1f}s, hedging it to "
+                         f"{type(self.strategies[secondary]).__name__}")
+            hedge_task = asyncio.create_task(self._call_strategy(secondary, system_prompt, user_prompt))
+            if self.limiter is not None:
+                hedge_task.add_done_callback(lambda _: self.limiter.release())
+            pending.add(hedge_task)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+
+def _stop_retrying(retry_state: RetryCallState) -> bool:
+    if isinstance(retry_state.outcome.exception(), InvalidLLMOutputError):
+        return retry_state.attempt_number >= _INVALID_OUTPUT_ATTEMPTS
+    return retry_state.attempt_number >= _TRANSIENT_ERROR_ATTEMPTS
+
+
+def _wait_before_retry(retry_state: RetryCallState) -> float:
+    if isinstance(retry_state.outcome.exception(), InvalidLLMOutputError):
+        return 0
+    return _TRANSIENT_ERROR_WAIT(retry_state)
 
 
 class MockLLMStrategy(LLMStrategy):
@@ -70,7 +315,10 @@ class MockLLMStrategy(LLMStrategy):
 
 
 class GeminiLLMStrategy(LLMStrategy):
-    def __init__(self, model: str | None = None, location: str | None = None):
+    def __init__(self, model: str | None = None, location: str | None = None, max_connections: int | None = None):
+        """
+        :param max_connections: the size of the connection pool, i.e. the number of concurrent requests
+        """
         if not model:
             self.model = 'gemini-2.5-flash'
         else:
@@ -83,12 +331,15 @@ class GeminiLLMStrategy(LLMStrategy):
         else:
             self.location = location
 
-        self.client = genai.Client(api_key=retrieve_google_api_key())
+        # the client does not close an HTTP client it was given, close does
+        self.http_client = httpx.AsyncClient(**create_http_client_args(max_connections))
+        self.client = genai.Client(api_key=retrieve_google_api_key(),
+                                   http_options=types.HttpOptions(httpx_async_client=self.http_client))
 
     async def call(self, system_prompt: str, user_prompt: str) -> dict[str, str]:
         config = self._create_config(system_prompt)
         try:
-            response =  self.client.models.generate_content(
+            response = await self.client.aio.models.generate_content(
                 model=self.model,
                 contents=user_prompt,
                 config=config
@@ -103,6 +354,11 @@ class GeminiLLMStrategy(LLMStrategy):
 
         return _parse_json_text(response.text)
 
+    async def close(self):
+        await self.client.aio.aclose()
+        await self.http_client.aclose()
+        self.client.close()
+
     def _create_config(self, system_prompt):
         return types.GenerateContentConfig(temperature=self.temperature,
                                            system_instruction=system_prompt,
@@ -111,9 +367,14 @@ class GeminiLLMStrategy(LLMStrategy):
 
 
 class OpenAiLLMStrategy(LLMStrategy):
-    def __init__(self, model: str | None = None):
+    def __init__(self, model: str | None = None, max_connections: int | None = None):
+        """
+        :param max_connections: the size of the connection pool, i.e. the number of concurrent requests
+        """
         self.client = openai.AsyncClient(api_key=retrieve_openai_api_key(), max_retries=0,
-                                         timeout=httpx.Timeout(600, connect=10))
+                                         timeout=httpx.Timeout(600, connect=10),
+                                         http_client=openai.DefaultAsyncHttpxClient(
+                                             **create_http_client_args(max_connections)))
         if not model:
             self.model = 'gpt-4.1-mini'
         else:
@@ -141,6 +402,34 @@ class OpenAiLLMStrategy(LLMStrategy):
 
         return _parse_json_text(response.output_text)
 
+    async def close(self):
+        await self.client.close()
+
+
+def create_strategy_key(strategy: LLMStrategy) -> str:
+    """
+    Identifies the provider and model of a strategy across runs, e.g. OpenAiLLMStrategy:gpt-4.1-mini.
+    """
+    model = getattr(strategy, 'model', None) or getattr(getattr(strategy, 'backend', None), 'model', None)
+    return f'{type(strategy).__name__}:{model}'
+
+
+def create_http_client_args(max_connections: int | None = None) -> dict:
+    """
+    Arguments for an httpx.AsyncClient whose pool keeps a connection open for every concurrent request, so that
+    requests do not wait for a connection or open a new one. HTTP/2 is used when h2 is installed (locawise[http2]), then
+    requests are multiplexed over fewer connections.
+
+    :param max_connections: the number of concurrent requests, None when they are not limited
+    """
+    max_connections = max_connections or _DEFAULT_MAX_CONNECTIONS
+    return {
+        'limits': httpx.Limits(max_connections=max_connections,
+                               max_keepalive_connections=max_connections,
+                               keepalive_expiry=_KEEPALIVE_EXPIRY_SECONDS),
+        'http2': importlib.util.find_spec('h2') is not None,
+    }
+
 
 def _extract_json_text(text) -> str:
     pattern = r"```json\s*([\s\S]*?)\s*```"
@@ -163,13 +452,41 @@ def _parse_json_text(text: str) -> dict[str, str]:
         raise InvalidLLMOutputError from e
 
 
-def create_strategy(model: str | None, location: str | None) -> LLMStrategy:
+def create_strategies(model_specs: list[str],
+                      location: str | None,
+                      max_connections: int | None = None) -> list[LLMStrategy]:
+    """
+    :param model_specs: entries in the form of provider:model e.g. openai:gpt-4.1-mini or gemini:gemini-2.5-flash
+    :param location:
+    :param max_connections: the connection pool size of each strategy, None for the default
+    :return: one strategy per entry, in the given order
+    :raises ValueError: unknown provider or malformed entry
+    """
+    strategies = []
+    for spec in model_specs:
+        provider, separator, model = spec.partition(':')
+        if not separator or not model:
+            raise ValueError(f'Invalid LLM model {spec}. Expected the form provider:model')
+
+        match provider.strip().lower():
+            case 'openai':
+                strategies.append(OpenAiLLMStrategy(model=model.strip(), max_connections=max_connections))
+            case 'gemini':
+                strategies.append(GeminiLLMStrategy(model=model.strip(), location=location,
+                                                    max_connections=max_connections))
+            case _:
+                raise ValueError(f'Unsupported LLM provider {provider}')
+
+    return strategies
+
+
+def create_strategy(model: str | None, location: str | None, max_connections: int | None = None) -> LLMStrategy:
     openai_key = retrieve_openai_api_key()
     if openai_key:
-        return OpenAiLLMStrategy(model=model)
+        return OpenAiLLMStrategy(model=model, max_connections=max_connections)
 
     try:
-        return GeminiLLMStrategy(model=model, location=location)
+        return GeminiLLMStrategy(model=model, location=location, max_connections=max_connections)
     except (Exception,):
         logging.error("No environment variables found for any supported LLM providers. Please add the necessary "
                       "environment variables.")
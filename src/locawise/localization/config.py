@@ -7,6 +7,7 @@ from pydantic import BaseModel, ValidationError, model_validator, Field, ConfigD
 from locawise.errors import InvalidYamlConfigError
 from locawise.fileutils import read_file
 from locawise.langutils import is_valid_two_letter_lang_code
+from locawise.serialization import WriteMode
 
 
 class LocalizationConfig(BaseModel):
@@ -20,6 +21,17 @@ class LocalizationConfig(BaseModel):
     tone: str = ""
     llm_model: str | None = Field(default=None, alias="llm-model")
     llm_location: str | None = Field(default=None, alias="llm-location")
+    llm_models: list[str] = Field(default_factory=list, alias="llm-models")
+    llm_hedging: bool = Field(default=False, alias="llm-hedging")
+    write_mode: WriteMode = Field(default=WriteMode.REWRITE, alias="write-mode")
+    compact_prompts: bool = Field(default=False, alias="compact-prompts")
+    max_tokens: int | None = Field(default=None, gt=0, alias="max-tokens")
+    max_cost: float | None = Field(default=None, gt=0, alias="max-cost")
+    max_concurrent_requests: int | None = Field(default=None, gt=0, alias="max-concurrent-requests")
+    language_priorities: dict[str, int] = Field(default_factory=dict, alias="language-priorities")
+    adaptive_concurrency: bool = Field(default=False, alias="adaptive-concurrency")
+    minimal_edits: bool = Field(default=False, alias="minimal-edits")
+    translation_memory: bool = Field(default=False, alias="translation-memory")
 
     model_config = ConfigDict(
         populate_by_name=True,
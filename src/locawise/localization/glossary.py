@@ -0,0 +1,92 @@
+from collections import deque
+from collections.abc import Iterable, Mapping
+
+
+class GlossaryIndex:
+    """
+    An Aho-Corasick automaton over the terms of a glossary. It finds the terms used in a set of texts in a single pass
+    over each text, however many terms the glossary has, so each chunk of a localization request can carry only the
+    glossary entries it needs.
+
+    Terms match case-insensitively at the start of a word: a term starting with a letter or digit does not match inside
+    a longer word, e.g. "app" does not match "webapp", but it may be followed by more letters, so inflected forms like
+    "files" or "deleted" match the terms "file" and "delete". An entry too many costs a few tokens, a missing one the
+    terminology of the chunk.
+    """
+    __slots__ = ('_terms', '_patterns', '_goto', '_failures', '_outputs')
+
+    def __init__(self, glossary: Mapping[str, str]):
+        self._terms: list[tuple[str, str]] = []
+        # the lowercased terms
+        self._patterns: list[str] = []
+        # the transitions of every node, node 0 is the root
+        self._goto: list[dict[str, int]] = [{}]
+        self._failures: list[int] = [0]
+        # the term indexes ending at every node, including those of its suffixes
+        self._outputs: list[list[int]] = [[]]
+        for term, translation in glossary.items():
+            pattern = term.strip().lower()
+            if pattern:
+                self._add(pattern, len(self._terms))
+                self._terms.append((term, translation))
+                self._patterns.append(pattern)
+        self._link()
+
+    def __len__(self) -> int:
+        return len(self._terms)
+
+    def select(self, texts: Iterable[str]) -> dict[str, str]:
+        """
+        The glossary entries whose term occurs in any of texts, in glossary order.
+        """
+        if not self._terms:
+            return {}
+
+        found: set[int] = set()
+        for text in texts:
+            self._search(text.lower(), found)
+        return dict(self._terms[term_index] for term_index in sorted(found))
+
+    def _add(self, pattern: str, term_index: int):
+        node = 0
+        for char in pattern:
+            next_node = self._goto[node].get(char)
+            if next_node is None:
+                next_node = len(self._goto)
+                self._goto[node][char] = next_node
+                self._goto.append({})
+                self._failures.append(0)
+                self._outputs.append([])
+            node = next_node
+        self._outputs[node].append(term_index)
+
+    def _link(self):
+        # breadth-first, so the failure node of a node is known before those of its children
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                failure = self._failures[node]
+                while failure and char not in self._goto[failure]:
+                    failure = self._failures[failure]
+                self._failures[child] = self._goto[failure].get(char, 0)
+                self._outputs[child] = self._outputs[child] + self._outputs[self._failures[child]]
+                queue.append(child)
+
+    def _search(self, text: str, found: set[int]):
+        goto = self._goto
+        failures = self._failures
+        outputs = self._outputs
+        node = 0
+        for end, char in enumerate(text, 1):
+            while node and char not in goto[node]:
+                node = failures[node]
+            node = goto[node].get(char, 0)
+            for term_index in outputs[node]:
+                if term_index not in found and self._starts_word(text, end, term_index):
+                    found.add(term_index)
+
+    def _starts_word(self, text: str, end: int, term_index: int) -> bool:
+        pattern = self._patterns[term_index]
+        start = end - len(pattern)
+        return not (pattern[0].isalnum() and start > 0 and text[start - 1].isalnum())
@@ -1,9 +1,16 @@
 import asyncio
+import functools
 import logging
 
 from locawise.dictutils import chunk_dict, simple_union
+from locawise.errors import LLMApiError, DeadlineExceededError
 from locawise.llm import LLMContext
-from locawise.localization.prompts import generate_system_prompt, generate_user_prompt
+from locawise.localization.glossary import GlossaryIndex
+from locawise.localization.prompts import generate_system_prompt, generate_user_prompt, create_edit_pairs
+from locawise.localization.validation import find_invalid_translations
+
+# how many times the keys whose translation lost placeholders or markup are sent again
+_VALIDATION_RETRIES = 1
 
 
 async def localize(llm_context: LLMContext,
@@ -12,19 +19,129 @@ async def localize(llm_context: LLMContext,
                    context: str = '',
                    tone: str = '',
                    glossary: dict[str, str] | None = None,
-                   chunk_size: int = 300
+                   chunk_size: int = 300,
+                   compact: bool = False,
+                   edits: dict[str, tuple[str, str]] | None = None,
+                   hints: dict[str, list[tuple[str, str]]] | None = None
                    ) -> dict[str, str]:
-    if glossary is None:
-        glossary = {}
-    system_prompt = generate_system_prompt(context=context, glossary=glossary, tone=tone)
-    chunks = chunk_dict(pairs, chunk_size)
+    """
+    :param compact: the keys are replaced with short positional ids and the values are sent as minified JSON, the ids
+    of the answer are mapped back to the keys. Saves input and output tokens when keys are long, e.g. deeply nested
+    JSON keys.
+    :param edits: the previous source value and the existing translation of keys whose source value was modified. Their
+    translations are edited, in chunks of their own, rather than translated from scratch, which keeps the unchanged
+    parts of long translations stable.
+    :param hints: existing translations of source values similar to the value of a key, as (source, translation) pairs
+    by key. The hints of the keys of a chunk go into its prompt.
+
+    Translations that do not keep the placeholders, variables, tags and CDATA sections of their source are translated
+    again in a smaller chunk of only those keys. Translations that are still invalid afterwards are kept and logged.
+    """
+    # the glossary goes into the prompt of each chunk, limited to the terms the chunk uses
+    glossary_index = _get_glossary_index(glossary or {})
+    system_prompt = generate_system_prompt(context=context, glossary={}, tone=tone)
+    edits = {k: edit for k, edit in (edits or {}).items() if k in pairs}
+    chunks = [(chunk, None) for chunk in chunk_dict({k: v for k, v in pairs.items() if k not in edits}, chunk_size)]
+    if edits:
+        chunks += [(chunk, edits) for chunk in chunk_dict({k: pairs[k] for k in edits}, chunk_size)]
 
     tasks = []
     async with asyncio.TaskGroup() as tg:
-        for index, chunk in enumerate(chunks):
+        for index, (chunk, chunk_edits) in enumerate(chunks):
             logging.debug(f"Generating task for chunk {index + 1}/{len(chunks)} for {target_language}")
-            user_prompt = generate_user_prompt(chunk, target_language)
-            tasks.append(tg.create_task(llm_context.call(system_prompt, user_prompt)))
+            chunk_glossary = glossary_index.select(chunk.values())
+            chunk_examples = _select_examples(chunk, hints or {})
+            tasks.append(tg.create_task(_localize_chunk(llm_context, system_prompt, chunk, target_language,
+                                                        chunk_glossary, compact, chunk_edits, chunk_examples)))
 
     results = [task.result() for task in tasks]
     return simple_union(*results)
+
+
+async def _localize_chunk(llm_context: LLMContext,
+                          system_prompt: str,
+                          chunk: dict[str, str],
+                          target_language: str,
+                          glossary: dict[str, str],
+                          compact: bool,
+                          edits: dict[str, tuple[str, str]] | None = None,
+                          examples: dict[str, str] | None = None) -> dict[str, str]:
+    result = await _call(llm_context, system_prompt, chunk, target_language, glossary, compact, edits=edits,
+                         examples=examples)
+    invalid_keys = find_invalid_translations(chunk, result)
+    for _ in range(_VALIDATION_RETRIES):
+        if not invalid_keys:
+            return result
+
+        logging.info(f"{len(invalid_keys)} translations to {target_language} did not keep their placeholders or "
+                     f"markup, translating them again")
+        # invalid edits are translated from scratch
+        retry_chunk = {k: v for k, v in chunk.items() if k in invalid_keys}
+        try:
+            retry_result = await _call(llm_context, system_prompt, retry_chunk, target_language, glossary, compact,
+                                       retry=True, examples=examples)
+        except (LLMApiError, DeadlineExceededError) as e:
+            logging.warning(f"Could not translate the invalid translations to {target_language} again. {e}")
+            break
+        result = result | {k: v for k, v in retry_result.items() if k in invalid_keys}
+        invalid_keys = find_invalid_translations(chunk, result)
+
+    if invalid_keys:
+        logging.warning(f"Translations to {target_language} do not keep the placeholders or markup of the source "
+                        f"keys={sorted(invalid_keys)}")
+    return result
+
+
+async def _call(llm_context: LLMContext,
+                system_prompt: str,
+                chunk: dict[str, str],
+                target_language: str,
+                glossary: dict[str, str],
+                compact: bool,
+                retry: bool = False,
+                edits: dict[str, tuple[str, str]] | None = None,
+                examples: dict[str, str] | None = None) -> dict[str, str]:
+    edit = edits is not None
+    prompt_pairs = create_edit_pairs(chunk, edits) if edit else chunk
+    if not compact:
+        user_prompt = generate_user_prompt(prompt_pairs, target_language, glossary=glossary, retry=retry, edit=edit,
+                                           examples=examples)
+        return await llm_context.call(system_prompt, user_prompt)
+
+    keys = list(chunk.keys())
+    encoded_chunk = {str(index): value for index, value in enumerate(prompt_pairs.values())}
+    user_prompt = generate_user_prompt(encoded_chunk, target_language, glossary=glossary, compact=True, retry=retry,
+                                       edit=edit, examples=examples)
+    result = await llm_context.call(system_prompt, user_prompt)
+    return _decode_compact_ids(result, keys)
+
+
+def _select_examples(chunk: dict[str, str], hints: dict[str, list[tuple[str, str]]]) -> dict[str, str]:
+    # keys with similar values share most of their hints
+    examples = {}
+    for key in chunk:
+        for source, translation in hints.get(key, ()):
+            examples.setdefault(source, translation)
+    return examples
+
+
+def _decode_compact_ids(result: dict[str, str], keys: list[str]) -> dict[str, str]:
+    """
+    Maps the positional ids of a compact answer back to keys. Ids that are not positions of keys are left out, like the
+    keys that were not asked for in a regular answer.
+    """
+    decoded = {}
+    for key_id, value in result.items():
+        if key_id.isdecimal() and int(key_id) < len(keys):
+            decoded[keys[int(key_id)]] = value
+    return decoded
+
+
+def _get_glossary_index(glossary: dict[str, str]) -> GlossaryIndex:
+    # every target language, and every request of the server, is localized with the same glossary
+    return _build_glossary_index(tuple(glossary.items()))
+
+
+@functools.lru_cache(maxsize=4)
+def _build_glossary_index(glossary_items: tuple[tuple[str, str], ...]) -> GlossaryIndex:
+    return GlossaryIndex(dict(glossary_items))
@@ -0,0 +1,121 @@
+import math
+import re
+import unicodedata
+from collections.abc import Mapping, Container
+
+# whitespace between words, leading and trailing whitespace is kept
+_INNER_WHITESPACE = re.compile(r'(?<=\S)\s+(?=\S)')
+
+# the share of trigrams two values have in common, of all their trigrams, to be considered similar
+_MIN_SIMILARITY = 0.5
+
+
+class TranslationMemory:
+    """
+    An index of the source values of a localization file that finds the values equal to a text after normalization, and
+    the values most similar to it by their character trigrams. Keys share an entry when their values are equal after
+    normalization, and the translations of a language are looked up by key, so one index serves every target language.
+
+    Similar values are found through an inverted index from trigram to entry. Only the entries containing one of the
+    rarest trigrams of the text can reach the minimum similarity, so only their postings are visited.
+    """
+
+    def __init__(self, source_dict: Mapping[str, str]):
+        # normalized value -> entry id
+        self._entry_ids: dict[str, int] = {}
+        self._entry_keys: list[list[str]] = []
+        self._entry_values: list[str] = []
+        self._entry_trigrams: list[frozenset[str]] = []
+        self._postings: dict[str, list[int]] = {}
+        for key, value in source_dict.items():
+            normalized = normalize(value)
+            entry_id = self._entry_ids.get(normalized)
+            if entry_id is None:
+                entry_id = len(self._entry_keys)
+                self._entry_ids[normalized] = entry_id
+                self._entry_keys.append([])
+                self._entry_values.append(value)
+                trigrams = _create_trigrams(normalized)
+                self._entry_trigrams.append(trigrams)
+                for trigram in trigrams:
+                    self._postings.setdefault(trigram, []).append(entry_id)
+            self._entry_keys[entry_id].append(key)
+
+    def find_exact(self, text: str, translations: Mapping[str, str], outdated_keys: Container[str]) -> str | None:
+        """
+        :param translations: the translations of a target language by key
+        :param outdated_keys: the keys whose translation does not match their source value anymore
+        :return: the translation of a key whose source value equals text after normalization
+        """
+        entry_id = self._entry_ids.get(normalize(text))
+        if entry_id is None:
+            return None
+        return self._find_translation(entry_id, translations, outdated_keys)
+
+    def find_similar(self,
+                     text: str,
+                     translations: Mapping[str, str],
+                     outdated_keys: Container[str],
+                     limit: int = 2,
+                     min_similarity: float = _MIN_SIMILARITY) -> list[tuple[str, str]]:
+        """
+        :return: the source values most similar to text that have a translation, with their translation, most similar
+        first. Values equal to text after normalization are left out.
+        """
+        normalized = normalize(text)
+        trigrams = _create_trigrams(normalized)
+        if not trigrams:
+            return []
+
+        excluded_entry_id = self._entry_ids.get(normalized)
+        # an entry sharing none of the len - ceil(min_similarity * len) + 1 rarest trigrams of text shares fewer than
+        # min_similarity * len trigrams with it
+        rarest = sorted(trigrams, key=lambda trigram: len(self._postings.get(trigram, ())))
+        prefix_length = len(trigrams) - math.ceil(min_similarity * len(trigrams)) + 1
+        candidates = {entry_id for trigram in rarest[:prefix_length] for entry_id in self._postings.get(trigram, ())}
+        candidates.discard(excluded_entry_id)
+
+        scored = []
+        for entry_id in candidates:
+            entry_trigrams = self._entry_trigrams[entry_id]
+            shared = len(trigrams & entry_trigrams)
+            similarity = shared / (len(trigrams) + len(entry_trigrams) - shared)
+            if similarity >= min_similarity:
+                scored.append((similarity, -entry_id))
+
+        similar = []
+        # most similar first, the first entry of the source among equally similar ones
+        for _, negated_entry_id in sorted(scored, reverse=True):
+            translation = self._find_translation(-negated_entry_id, translations, outdated_keys)
+            if translation is not None:
+                similar.append((self._entry_values[-negated_entry_id], translation))
+                if len(similar) == limit:
+                    break
+        return similar
+
+    def _find_translation(self, entry_id: int, translations: Mapping[str, str], outdated_keys: Container[str]) \
+            -> str | None:
+        for key in self._entry_keys[entry_id]:
+            if key in outdated_keys:
+                continue
+            translation = translations.get(key)
+            if translation:
+                return translation
+        return None
+
+
+def normalize(text: str) -> str:
+    """
+    Unicode normalization and a single space for every run of whitespace between words. Case, and leading and trailing
+    whitespace, are kept since they carry into the translation.
+    """
+    return _INNER_WHITESPACE.sub(' ', unicodedata.normalize('NFC', text))
+
+
+def _create_trigrams(normalized: str) -> frozenset[str]:
+    stripped = normalized.strip()
+    if not stripped:
+        return frozenset()
+    # padded so that short values have trigrams and the first and last characters weigh as much as the others
+    padded = f'  {stripped.casefold()} '
+    return frozenset(padded[i:i + 3] for i in range(len(padded) - 2))
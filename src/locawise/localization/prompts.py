@@ -1,20 +1,65 @@
 import json
 
-
-def generate_user_prompt(pairs: dict[str, str], target_language: str):
+_RETRY_MESSAGE = ("Your previous translations of these values changed their placeholders, variables or markup. "
+                  "Keep every placeholder, variable, HTML/XML tag and CDATA section exactly as in the input.")
+
+_EDIT_MESSAGE = ("These values were changed after they had been translated. Each one has its previous source, its new "
+                 "source and the previous translation. Edit the previous translation so that it translates the new "
+                 "source, changing only what the change of the source requires. Output each key with its edited "
+                 "translation as a string.")
+
+
+def generate_user_prompt(pairs: dict[str, str],
+                         target_language: str,
+                         glossary: dict[str, str] | None = None,
+                         compact: bool = False,
+                         retry: bool = False,
+                         edit: bool = False,
+                         examples: dict[str, str] | None = None):
+    """
+    :param pairs: source values, or the edit objects of create_edit_pairs
+    :param glossary: the glossary entries used by the values of pairs
+    :param compact: pairs are sent as minified JSON and the answer is asked for in the same form, for pairs whose keys
+    are short ids
+    :param retry: the pairs are sent again because their translations did not keep the placeholders of the source
+    :param edit: the existing translations of the pairs are to be edited instead of translating from scratch
+    :param examples: existing translations of source values similar to the values of pairs
+    """
+    glossary_message = _get_glossary_message(glossary)
+    examples_message = _get_examples_message(examples)
+    instructions = []
+    if compact:
+        pairs_message = json.dumps(pairs, ensure_ascii=False, separators=(',', ':'))
+        instructions.append("Output minified JSON with the same keys.")
+    else:
+        pairs_message = json.dumps(pairs, sort_keys=False, ensure_ascii=False, indent=4)
+    if edit:
+        instructions.append(_EDIT_MESSAGE)
+    if retry:
+        instructions.append(_RETRY_MESSAGE)
+    instructions_message = "\n".join(instructions)
     return f"""
 Translate the following values to {target_language} according to the criteria you were given.
-
+{instructions_message}
 Input:
-{json.dumps(pairs, sort_keys=False, ensure_ascii=False, indent=4)}
+{pairs_message}
 Target Language:
 {target_language}
-
+{glossary_message}
+{examples_message}
 Output:
 
 """
 
 
+def create_edit_pairs(pairs: dict[str, str], edits: dict[str, tuple[str, str]]) -> dict[str, dict[str, str]]:
+    """
+    :param edits: the previous source value and the existing translation by key, for every key of pairs
+    """
+    return {k: {'previous_source': edits[k][0], 'source': v, 'previous_translation': edits[k][1]}
+            for k, v in pairs.items()}
+
+
 def generate_system_prompt(context: str, glossary: dict[str, str], tone: str):
     context_message = _get_context_message(context)
     glossary_message = _get_glossary_message(glossary)
@@ -124,7 +169,7 @@ def _get_context_message(context: str) -> str:
     return f"Here is some information about the company you are working for: {context}" if context else ""
 
 
-def _get_glossary_message(glossary: dict[str, str]) -> str:
+def _get_glossary_message(glossary: dict[str, str] | None) -> str:
     if not glossary:
         return ""
 
@@ -133,10 +178,18 @@ Here is the glossary of the company you are working for.
 Use this glossary to more accurately localize messages.
 Glossary:
 """
-    for k, v in glossary.items():
-        message += f"{k}={v}"
+    return message + '\n'.join(f"{k}={v}" for k, v in glossary.items()) + '\n'
+
+
+def _get_examples_message(examples: dict[str, str] | None) -> str:
+    if not examples:
+        return ""
 
-    return message
+    message = """
+Similar values were translated before as follows, source to translation. Keep the wording consistent with them.
+Previous translations:
+"""
+    return message + json.dumps(examples, ensure_ascii=False, separators=(',', ':')) + '\n'
 
 
 def _get_tone_message(tone: str) -> str:
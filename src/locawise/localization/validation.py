@@ -0,0 +1,38 @@
+import re
+from collections import Counter
+from collections.abc import Mapping
+
+# the elements a translation has to keep as they are: {name}, {{name}}, %s, %1$d, %(name)s, %@, ${name}, $name, the
+# start of opening and closing tags, whose attributes might be translated, and CDATA sections
+_PLACEHOLDER = re.compile(r'\{\{\s*[\w.-]+\s*}}'
+                          r'|\{[\w.-]*}'
+                          r'|%(?:\d+\$)?[-+#0]*\d*(?:\.\d+)?[sdifuxXoeEgGcp@]'
+                          r'|%\(\w+\)[sdif]'
+                          r'|\$\{[\w.-]+}'
+                          r'|\$[A-Za-z_]\w*'
+                          r'|</?[A-Za-z][\w:-]*'
+                          r'|<!\[CDATA\[|]]>')
+
+
+def extract_placeholders(text: str) -> Counter[str]:
+    """
+    The placeholders, variables, tags and CDATA markers of text with the number of times each occurs. Tag names are
+    compared case-insensitively.
+    """
+    return Counter(placeholder.lower() if placeholder[0] == '<' and placeholder[1] != '!' else placeholder
+                   for placeholder in _PLACEHOLDER.findall(text))
+
+
+def find_invalid_translations(source_pairs: Mapping[str, str], translated_pairs: Mapping[str, str]) -> set[str]:
+    """
+    The keys whose translation does not have the same placeholders, variables, tags and CDATA sections as the source
+    value. Keys missing from either side are not checked.
+    """
+    invalid_keys = set()
+    for key, translation in translated_pairs.items():
+        source = source_pairs.get(key)
+        if source is None:
+            continue
+        if extract_placeholders(source) != extract_placeholders(str(translation)):
+            invalid_keys.add(key)
+    return invalid_keys
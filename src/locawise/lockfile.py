@@ -1,10 +1,11 @@
+import json
 import logging
 import os.path
+from collections.abc import Mapping, Iterable
 
-import aiofiles
 import xxhash
 
-from locawise.fileutils import write_to_file
+from locawise.fileutils import write_to_file, AtomicWriteBatch, read_file, run_io, remove_file
 
 _KEY_VALUE_HASH_LENGTH = 8
 
@@ -16,17 +17,16 @@ _LOCK_FILE_NAME = 'i18n.lock'
 async def read_lock_file(file_path: str) -> set[str]:
     key_value_hashes = set()
     try:
-        async with aiofiles.open(file_path, 'r', encoding='UTF-8') as f:
-            async for line in f:
-                line = line.rstrip('\n\r')
-                if not line:
-                    continue
+        content = await read_file(file_path)
+        for line in content.splitlines():
+            if not line:
+                continue
 
-                if len(line) != _KEY_VALUE_HASH_LENGTH:
-                    logging.warning(f"Invalid key value hash length. line={line} length={len(line)}")
-                    continue
+            if len(line) != _KEY_VALUE_HASH_LENGTH:
+                logging.warning(f"Invalid key value hash length. line={line} length={len(line)}")
+                continue
 
-                key_value_hashes.add(line)
+            key_value_hashes.add(line)
     except FileNotFoundError:
         logging.warning("Lock file not found. Ignore this if it's the first time you are running this application.")
     except (Exception,):
@@ -35,22 +35,123 @@ async def read_lock_file(file_path: str) -> set[str]:
         return key_value_hashes
 
 
-async def write_lock_file(file_path: str, key_value_pairs: dict[str, str]):
-    content = create_lock_file_content(key_value_pairs)
-    await write_to_file(file_path, content)
-
-
-def create_lock_file_content(key_value_pairs: dict[str, str]):
-    content = ""
-    for k, v in key_value_pairs.items():
-        hashed_value = hash_key_value_pair(k, v)
-        content += hashed_value + "\n"
-    return content
+async def write_lock_file(file_path: str,
+                          key_value_pairs: dict[str, str],
+                          write_batch: AtomicWriteBatch | None = None,
+                          key_value_hashes: list[str] | None = None):
+    """
+    :param key_value_hashes: the digests of key_value_pairs when they were already computed by hash_key_value_pairs
+    """
+    content = create_lock_file_content(key_value_pairs, key_value_hashes)
+    if write_batch:
+        await write_batch.stage(file_path, content)
+    else:
+        await write_to_file(file_path, content)
+
+
+async def read_language_lock_file(lock_file_path: str, lang_code: str) -> set[str] | None:
+    """
+    :return: the digests of the lock file of the language, None when the language has no lock file of its own
+    """
+    file_path = create_language_lock_file_path(lock_file_path, lang_code)
+    if not await run_io(os.path.exists, file_path):
+        return None
+    return await read_lock_file(file_path)
+
+
+async def remove_language_lock_files(lock_file_path: str, lang_codes: Iterable[str]):
+    for lang_code in lang_codes:
+        await remove_file(create_language_lock_file_path(lock_file_path, lang_code))
+
+
+def create_language_lock_file_path(lock_file_path: str, lang_code: str) -> str:
+    """
+    The lock file of a single target language, e.g. i18n.tr.lock next to i18n.lock. It is written together with the
+    target file when languages are saved one by one, and records what the language is up to date with until the lock
+    file of all languages is written again.
+    """
+    root, extension = os.path.splitext(lock_file_path)
+    return f'{root}.{lang_code}{extension}'
+
+
+def create_lock_file_content(key_value_pairs: dict[str, str], key_value_hashes: list[str] | None = None) -> str:
+    if key_value_hashes is None:
+        key_value_hashes = hash_key_value_pairs(key_value_pairs)
+    if not key_value_hashes:
+        return ''
+    return '\n'.join(key_value_hashes) + '\n'
+
+
+def hash_key_value_pairs(key_value_pairs: dict[str, str]) -> list[str]:
+    """
+    Hashes every pair in one pass and returns the digests in the order of the pairs. Compute them once per run and share
+    them between change detection and the lock file writer.
+    """
+    # the same digests as hash_key_value_pair, calling xxh32_hexdigest directly through a local name instead of going
+    # through hash_key_value_pair and the xxhash module attribute for every pair
+    hexdigest = xxhash.xxh32_hexdigest
+    return [hexdigest(f"{k}={v}", _HASH_SEED) for k, v in key_value_pairs.items()]
+
+
+def update_key_value_hashes(key_value_hashes: list[str],
+                            previous_pairs: dict[str, str],
+                            key_value_pairs: dict[str, str]) -> list[str]:
+    """
+    Returns the digests of key_value_pairs, reusing those of previous_pairs for the pairs whose value did not change.
+
+    :param key_value_hashes: the digests of previous_pairs
+    """
+    previous_hashes = dict(zip(previous_pairs, key_value_hashes))
+    hexdigest = xxhash.xxh32_hexdigest
+    return [previous_hashes[k] if previous_pairs.get(k) == v else hexdigest(f"{k}={v}", _HASH_SEED)
+            for k, v in key_value_pairs.items()]
 
 
 def hash_key_value_pair(key: str, value: str) -> str:
     return xxhash.xxh32_hexdigest(f"{key}={value}", _HASH_SEED)
 
 
+async def read_previous_source_values(file_path: str,
+                                     keys: Iterable[str],
+                                     key_value_hashes: set[str]) -> dict[str, str]:
+    """
+    The source values that keys had when the lock file was written, for the keys whose value is in the source values
+    file. Values the lock file does not record, e.g. from a source values file that is out of date, are left out.
+
+    :param key_value_hashes: the digests read from the lock file
+    """
+    try:
+        source_values = json.loads(await read_file(file_path))
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError):
+        logging.warning(f"Could not read the source values file {file_path}")
+        return {}
+
+    previous_values = {}
+    hexdigest = xxhash.xxh64_hexdigest
+    for key in keys:
+        value = source_values.get(hexdigest(key, _HASH_SEED))
+        if isinstance(value, str) and hash_key_value_pair(key, value) in key_value_hashes:
+            previous_values[key] = value
+    return previous_values
+
+
+async def write_source_values_file(file_path: str,
+                                   key_value_pairs: Mapping[str, str],
+                                   write_batch: AtomicWriteBatch | None = None):
+    """
+    Records the source values the lock file is written for, so that the next run knows what modified keys were
+    translated from. Keys are stored as digests, which keeps the file small for long nested keys.
+    """
+    hexdigest = xxhash.xxh64_hexdigest
+    content = json.dumps({hexdigest(k, _HASH_SEED): v for k, v in key_value_pairs.items()},
+                         ensure_ascii=False, separators=(',', ':'))
+    if write_batch:
+        await write_batch.stage(file_path, content)
+    else:
+        await write_to_file(file_path, content)
+
+
 def create_lock_file_path(base_folder: str) -> str:
     return str(os.path.join(base_folder, _LOCK_FILE_NAME))
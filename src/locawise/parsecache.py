@@ -0,0 +1,135 @@
+import logging
+import marshal
+import os
+from collections import namedtuple
+from collections.abc import Mapping
+
+import xxhash
+
+from locawise import parsing
+from locawise.catalogue import Catalogue
+from locawise.fileutils import run_io
+
+_CACHE_FORMAT_VERSION = 1
+
+_CacheEntry = namedtuple('CacheEntry', ['stat_key', 'content_hash', 'pairs'])
+
+
+class ParseCache:
+    """
+    Caches parsed localization files in memory, and on disk when a cache directory is given.
+
+    An entry is valid as long as the size and modification time of its file are unchanged. When they differ, e.g.
+    after a git checkout, the entry is still used if the content hash of the file matches. Files edited by someone else
+    are parsed again.
+    """
+
+    def __init__(self, cache_dir: str | None = None):
+        self.cache_dir = cache_dir
+        self._entries: dict[str, _CacheEntry] = {}
+
+    async def parse(self, file_path: str) -> Mapping[str, str]:
+        """
+        :raises FileNotFoundError:
+        :raises LocalizationFormatError:
+        :raises ParseError:
+        """
+        path = os.path.abspath(file_path)
+        # stat before reading so that a concurrent modification invalidates the entry on the next call
+        stat_key = _create_stat_key(path)
+        entry = self._entries.get(path)
+        if entry is None:
+            entry = await run_io(self._load_entry, path)
+
+        if entry is not None and entry.stat_key != stat_key:
+            if entry.content_hash is not None and entry.content_hash == await run_io(_hash_file, path):
+                entry = entry._replace(stat_key=stat_key)
+                await run_io(self._store_entry, path, entry)
+            else:
+                entry = None
+
+        if entry is not None:
+            self._entries[path] = entry
+            # callers are free to mutate the result
+            return _copy_pairs(entry.pairs)
+
+        content_hash = await run_io(_hash_file, path) if self.cache_dir else None
+        pairs = await parsing.parse(path)
+        entry = _CacheEntry(stat_key, content_hash, _copy_pairs(pairs))
+        self._entries[path] = entry
+        await run_io(self._store_entry, path, entry)
+        return pairs
+
+    async def put(self, file_path: str, pairs: Mapping[str, str]):
+        """
+        Records the content that was just written to file_path. Catalogues are kept as catalogues, sharing their key
+        table instead of holding another copy of every key.
+        """
+        path = os.path.abspath(file_path)
+        # copied before the first await, the caller might change pairs afterwards
+        pairs = _copy_pairs(pairs)
+        try:
+            stat_key = _create_stat_key(path)
+            content_hash = await run_io(_hash_file, path) if self.cache_dir else None
+        except FileNotFoundError:
+            self._entries.pop(path, None)
+            return
+
+        entry = _CacheEntry(stat_key, content_hash, pairs)
+        self._entries[path] = entry
+        await run_io(self._store_entry, path, entry)
+
+    def _load_entry(self, path: str) -> _CacheEntry | None:
+        if not self.cache_dir:
+            return None
+
+        try:
+            with open(self._sidecar_path(path), 'rb') as f:
+                data = marshal.loads(f.read())
+            if data['version'] != _CACHE_FORMAT_VERSION or data['path'] != path:
+                return None
+            return _CacheEntry(tuple(data['stat_key']), data['content_hash'], data['pairs'])
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logging.warning(f'Ignoring unreadable parse cache entry for {path}. {e!r}')
+            return None
+
+    def _store_entry(self, path: str, entry: _CacheEntry):
+        if not self.cache_dir:
+            return
+
+        sidecar_path = self._sidecar_path(path)
+        temp_path = f'{sidecar_path}.{os.getpid()}.tmp'
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with open(temp_path, 'wb') as f:
+                marshal.dump({'version': _CACHE_FORMAT_VERSION,
+                              'path': path,
+                              'stat_key': entry.stat_key,
+                              'content_hash': entry.content_hash,
+                              'pairs': dict(entry.pairs)}, f)
+            os.replace(temp_path, sidecar_path)
+        except Exception as e:
+            # the cache is an optimization, a failure to write it must not fail the run
+            logging.warning(f'Could not write parse cache entry for {path}. {e!r}')
+
+    def _sidecar_path(self, path: str) -> str:
+        return os.path.join(self.cache_dir, f'{xxhash.xxh3_64_hexdigest(path)}.parsed')
+
+
+def _copy_pairs(pairs: Mapping[str, str]) -> Mapping[str, str]:
+    return pairs.copy() if isinstance(pairs, Catalogue) else dict(pairs)
+
+
+def _create_stat_key(file_path: str) -> tuple[int, int]:
+    stat = os.stat(file_path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _hash_file(file_path: str) -> int:
+    hasher = xxhash.xxh3_64()
+    with open(file_path, 'rb') as f:
+        while chunk := f.read(1024 * 1024):
+            hasher.update(chunk)
+    return hasher.intdigest()
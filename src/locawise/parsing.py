@@ -1,15 +1,21 @@
 import json
 import logging
-from collections import OrderedDict
+import os
 
-import jproperties
-
-from locawise.androidutils import parse_xml_string
+from locawise import cpupool
+from locawise.androidutils import parse_xml_string, parse_xml_file_streaming
 from locawise.dictutils import flatten_dict
-from locawise.errors import ParseError
-from locawise.fileutils import read_file
+from locawise.errors import ParseError, DuplicateJsonObjectKeyError
+from locawise.fileutils import read_file, read_file_sync, run_io
+from locawise.jsonutils import iter_flattened_json
+from locawise.propertiesutils import parse_properties
 from locawise.localization.format import detect_format, LocalizationFormat
 
+# files at least this large are parsed incrementally to avoid holding several copies of the catalogue in memory
+_STREAMING_JSON_PARSE_THRESHOLD_BYTES = 32 * 1024 * 1024
+
+_STREAMING_XML_PARSE_THRESHOLD_BYTES = 32 * 1024 * 1024
+
 
 async def parse(file_path: str) -> dict[str, str]:
     """
@@ -22,6 +28,16 @@ async def parse(file_path: str) -> dict[str, str]:
     if not file_path:
         return {}
     localization_format: LocalizationFormat = detect_format(file_path)
+    if cpupool.is_enabled():
+        return await cpupool.run(parse_file_sync, file_path)
+
+    if localization_format == LocalizationFormat.JSON and _is_large_file(file_path,
+                                                                         _STREAMING_JSON_PARSE_THRESHOLD_BYTES):
+        return await parse_json_file_streaming(file_path)
+    if localization_format == LocalizationFormat.XML and _is_large_file(file_path,
+                                                                        _STREAMING_XML_PARSE_THRESHOLD_BYTES):
+        return await run_io(parse_xml_file_streaming, file_path)
+
     try:
         file_content = await read_file(file_path)
     except FileNotFoundError as e:
@@ -30,11 +46,42 @@ async def parse(file_path: str) -> dict[str, str]:
     except Exception as e:
         raise ParseError(f"Unknown exception while reading {file_path}") from e
 
+    return parse_content(file_content, localization_format)
+
+
+def parse_file_sync(file_path: str) -> dict[str, str]:
+    """
+    Blocking version of parse, for worker processes.
+    """
+    localization_format: LocalizationFormat = detect_format(file_path)
+    if localization_format == LocalizationFormat.JSON and _is_large_file(file_path,
+                                                                         _STREAMING_JSON_PARSE_THRESHOLD_BYTES):
+        return _parse_json_file_streaming(file_path)
+    if localization_format == LocalizationFormat.XML and _is_large_file(file_path,
+                                                                        _STREAMING_XML_PARSE_THRESHOLD_BYTES):
+        return parse_xml_file_streaming(file_path)
+
+    try:
+        file_content = read_file_sync(file_path)
+    except FileNotFoundError as e:
+        logging.info(f'File not found {file_path}')
+        raise e
+    except Exception as e:
+        raise ParseError(f"Unknown exception while reading {file_path}") from e
+
+    return parse_content(file_content, localization_format)
+
+
+def parse_content(file_content: str, localization_format: LocalizationFormat) -> dict[str, str]:
+    """
+    :raises ParseError:
+    :raises ValueError:
+    """
     match localization_format:
         case LocalizationFormat.PROPERTIES:
-            return await parse_java_properties_file(file_content)
+            return parse_java_properties_content(file_content)
         case LocalizationFormat.JSON:
-            return await parse_json_file(file_content)
+            return parse_json_content(file_content)
         case LocalizationFormat.XML:
             return parse_xml_string(file_content)
         case _:
@@ -42,22 +89,54 @@ async def parse(file_path: str) -> dict[str, str]:
 
 
 async def parse_java_properties_file(file_content: str) -> dict[str, str]:
+    return parse_java_properties_content(file_content)
+
+
+def parse_java_properties_content(file_content: str) -> dict[str, str]:
     try:
-        p = jproperties.Properties()
-        p.load(file_content, encoding='UTF-8')
-        ordered_dict = OrderedDict()
-        for k, v in p.items():
-            value, _ = v
-            ordered_dict[k] = value
-        return ordered_dict
+        return parse_properties(file_content)
     except Exception as e:
         raise ParseError("Java properties file could not be parsed") from e
 
 
 async def parse_json_file(file_content: str) -> dict[str, str]:
+    return parse_json_content(file_content)
+
+
+def parse_json_content(file_content: str) -> dict[str, str]:
     try:
         _dict = json.loads(file_content)
         _dict = flatten_dict(_dict)
         return _dict
     except Exception as e:
         raise ParseError('JSON file could not be parsed') from e
+
+
+async def parse_json_file_streaming(file_path: str) -> dict[str, str]:
+    """
+    Parses a JSON file without reading it into memory as a whole, the result is the same as parse_json_file's.
+    """
+    return await run_io(_parse_json_file_streaming, file_path)
+
+
+def _parse_json_file_streaming(file_path: str) -> dict[str, str]:
+    try:
+        with open(file_path, mode='r', encoding='UTF-8') as f:
+            try:
+                return dict(iter_flattened_json(f))
+            except DuplicateJsonObjectKeyError:
+                # rare enough to read the file as a whole, so that the last of the duplicates wins like with json.loads
+                f.seek(0)
+                return flatten_dict(json.load(f))
+    except FileNotFoundError as e:
+        logging.info(f'File not found {file_path}')
+        raise e
+    except Exception as e:
+        raise ParseError('JSON file could not be parsed') from e
+
+
+def _is_large_file(file_path: str, threshold: int) -> bool:
+    try:
+        return os.path.getsize(file_path) >= threshold
+    except OSError:
+        return False
@@ -0,0 +1,192 @@
+import json
+import logging
+from collections.abc import Mapping
+
+from locawise.jsonutils import scan_json_spans, JsonMember
+from locawise.localization.format import LocalizationFormat
+from locawise.parsing import parse_java_properties_content
+from locawise.propertiesutils import scan_properties_lines, serialize_properties_line
+
+
+class _Splice:
+    """
+    Collects edits of a text and applies them in one pass. Edits must not overlap, insertions at the same position are
+    applied in the order they were added and before a replacement starting there.
+    """
+
+    def __init__(self, content: str):
+        self.content = content
+        self._edits: list[tuple[int, int, int, str]] = []
+
+    def replace(self, start: int, end: int, text: str):
+        self._edits.append((start, end, len(self._edits), text))
+
+    def insert(self, position: int, text: str):
+        self.replace(position, position, text)
+
+    def apply(self) -> str:
+        parts = []
+        position = 0
+        # an insertion sorts before a replacement at the same position since its end is smaller
+        for start, end, _, text in sorted(self._edits):
+            if start < position:
+                raise ValueError(f'Overlapping edits at {start}')
+            parts.append(self.content[position:start])
+            parts.append(text)
+            position = end
+        parts.append(self.content[position:])
+        return ''.join(parts)
+
+
+def patch(content: str, key_value_pairs: Mapping[str, str], localization_format: LocalizationFormat) -> str | None:
+    """
+    Edits content, the current content of a localization file, so that it holds key_value_pairs. Only the values that
+    changed are replaced, removed keys are deleted and new keys are inserted next to the key preceding them in
+    key_value_pairs. Comments, formatting and the order of the existing keys are kept.
+
+    :return: the patched content, or None when the content cannot be patched and has to be serialized again
+    """
+    try:
+        match localization_format:
+            case LocalizationFormat.JSON:
+                return patch_json(content, key_value_pairs)
+            case LocalizationFormat.PROPERTIES:
+                return patch_properties(content, key_value_pairs)
+            case _:
+                return None
+    except Exception as e:
+        logging.info(f'Could not patch the {localization_format.value} file, it will be rewritten. {e!r}')
+        return None
+
+
+def patch_json(content: str, key_value_pairs: Mapping[str, str], level_separator: str = '_/') -> str | None:
+    """
+    :raises ValueError: content is not a valid JSON object
+    """
+    leaves, objects = scan_json_spans(content, level_separator)
+    splice = _Splice(content)
+
+    for key, value in key_value_pairs.items():
+        member = leaves.get(key)
+        if member is not None and member.value != value:
+            splice.replace(member.value_start, member.end, _dump_json_value(value))
+
+    # members are identified by their start, objects are removed as a whole when all of their members are removed
+    removed_members: set[int] = {m.start for m in leaves.values() if m.key not in key_value_pairs}
+    # deepest objects first so that emptied objects are known before their parents are visited
+    for prefix in sorted(objects, key=lambda p: p.count(level_separator), reverse=True):
+        _object = objects[prefix]
+        if _object.member is not None and _object.members and all(
+                m.start in removed_members for m in _object.members):
+            removed_members.add(_object.member.start)
+
+    kept_members: dict[str, list[JsonMember]] = {}
+    for prefix, _object in objects.items():
+        kept_members[prefix] = [m for m in _object.members if m.start not in removed_members]
+
+    # new keys are inserted after the closest preceding key of the same object
+    anchors: dict[str, JsonMember] = {}
+    for key, value in key_value_pairs.items():
+        member = leaves.get(key)
+        if member is not None:
+            anchors[member.parent] = member
+            continue
+
+        prefix = _parent_prefix(key, level_separator)
+        if prefix not in objects or key + level_separator in objects or not kept_members[prefix]:
+            # a new object would have to be created, or the key replaces an object
+            return None
+
+        member_text = f'{_dump_json_value(key[len(prefix):])}: {_dump_json_value(value)}'
+        separator = _find_member_separator(objects[prefix].members)
+        anchor = anchors.get(prefix)
+        if anchor is not None:
+            splice.insert(anchor.end, f',{separator}{member_text}')
+        else:
+            splice.insert(kept_members[prefix][0].start, f'{member_text},{separator}')
+
+    for prefix, _object in objects.items():
+        if _object.member is not None and _object.member.start in removed_members:
+            # removed along with its parent member
+            continue
+        _remove_members(splice, _object.members, removed_members)
+
+    return splice.apply()
+
+
+def _remove_members(splice: _Splice, members: list[JsonMember], removed_members: set[int]):
+    removed = [m.start in removed_members for m in members]
+    if not any(removed):
+        return
+
+    if all(removed):
+        # leaves the whitespace in front of the closing brace
+        splice.replace(members[0].start, members[-1].end, '')
+        return
+
+    # a leading run of removed members is removed up to the first kept member, any other member along with the
+    # preceding comma
+    first_kept = removed.index(False)
+    if first_kept > 0:
+        splice.replace(members[0].start, members[first_kept].start, '')
+    for index in range(first_kept + 1, len(members)):
+        if removed[index]:
+            splice.replace(members[index - 1].end, members[index].end, '')
+
+
+def _find_member_separator(members: list[JsonMember]) -> str:
+    # the first member of a compact object is not preceded by whitespace, unlike the members following a comma
+    separator = members[1].separator if len(members) > 1 else members[0].separator
+    return separator or ' '
+
+
+def _parent_prefix(key: str, level_separator: str) -> str:
+    index = key.rfind(level_separator)
+    return key[:index + len(level_separator)] if index >= 0 else ''
+
+
+def _dump_json_value(value) -> str:
+    return json.dumps(value, ensure_ascii=False)
+
+
+def patch_properties(content: str, key_value_pairs: Mapping[str, str]) -> str | None:
+    """
+    :raises ParseError: content is not a valid .properties document
+    """
+    current_pairs = parse_java_properties_content(content)
+    lines = scan_properties_lines(content)
+    lines_by_key = {line.key: line for line in lines}
+    if len(lines_by_key) != len(lines) or lines_by_key.keys() != current_pairs.keys():
+        # duplicate keys, whose lines cannot be patched one by one
+        return None
+
+    splice = _Splice(content)
+    line_terminator = '\r\n' if '\r\n' in content else '\n'
+    first_kept_line = next((line for line in lines if line.key in key_value_pairs), None)
+    anchor = None
+    for key, value in key_value_pairs.items():
+        line = lines_by_key.get(key)
+        if line is not None:
+            if current_pairs[key] != value:
+                splice.replace(line.start, line.end, serialize_properties_line(key, value))
+            anchor = line
+            continue
+
+        serialized_line = serialize_properties_line(key, value)
+        if anchor is not None:
+            if anchor.line_end == anchor.end:
+                # the anchor is the last line and has no line terminator
+                splice.insert(anchor.end, line_terminator + serialized_line)
+            else:
+                splice.insert(anchor.line_end, serialized_line + line_terminator)
+        elif first_kept_line is not None:
+            splice.insert(first_kept_line.start, serialized_line + line_terminator)
+        else:
+            prefix = line_terminator if content and not content.endswith(('\n', '\r')) else ''
+            splice.insert(len(content), prefix + serialized_line + line_terminator)
+
+    for line in lines:
+        if line.key not in key_value_pairs:
+            splice.replace(line.start, line.line_end, '')
+
+    return splice.apply()
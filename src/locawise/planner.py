@@ -0,0 +1,154 @@
+import math
+from collections import namedtuple
+
+from locawise.langutils import retrieve_lang_full_name
+from locawise.localization.prompts import generate_system_prompt, generate_user_prompt
+from locawise.processor import SourceProcessor, CHUNK_SIZE
+from locawise.tokenutils import estimate_token_count
+
+# USD per million input and output tokens
+_MODEL_PRICES: dict[str, tuple[float, float]] = {
+    'gpt-4.1': (2.00, 8.00),
+    'gpt-4.1-mini': (0.40, 1.60),
+    'gpt-4.1-nano': (0.10, 0.40),
+    'gpt-4o': (2.50, 10.00),
+    'gpt-4o-mini': (0.15, 0.60),
+    'gemini-2.5-pro': (1.25, 10.00),
+    'gemini-2.5-flash': (0.30, 2.50),
+    'gemini-2.5-flash-lite': (0.10, 0.40),
+    'gemini-2.0-flash': (0.10, 0.40),
+    'gemini-2.0-flash-lite': (0.075, 0.30),
+}
+
+# quotes, colon, comma and indentation of a pair in the JSON of a prompt or answer
+_PAIR_OVERHEAD_TOKENS = 4
+
+# the positional ids of compact prompts
+_COMPACT_KEY_TOKENS = 1
+
+# translations take more tokens than English sources, more so in non-Latin scripts
+_OUTPUT_TOKENS_PER_SOURCE_TOKEN = 1.3
+
+LanguageEstimate = namedtuple('LanguageEstimate',
+                              ['lang_code', 'key_count', 'request_count', 'input_tokens', 'output_tokens'])
+
+
+class LocalizationPlan:
+    """
+    The estimated tokens, and cost for models with a known price, of localizing the pending keys of every target
+    language.
+    """
+
+    def __init__(self, model: str | None, languages: list[LanguageEstimate]):
+        self.model = model
+        self.languages = languages
+
+    @property
+    def key_count(self) -> int:
+        return sum(language.key_count for language in self.languages)
+
+    @property
+    def request_count(self) -> int:
+        return sum(language.request_count for language in self.languages)
+
+    @property
+    def input_tokens(self) -> int:
+        return sum(language.input_tokens for language in self.languages)
+
+    @property
+    def output_tokens(self) -> int:
+        return sum(language.output_tokens for language in self.languages)
+
+    @property
+    def total_tokens(self) -> int:
+        return self.input_tokens + self.output_tokens
+
+    @property
+    def cost(self) -> float | None:
+        """
+        USD, None when the price of the model is unknown
+        """
+        return _estimate_cost(self.model, self.input_tokens, self.output_tokens)
+
+    def find_budget_violations(self, max_tokens: int | None = None, max_cost: float | None = None) -> list[str]:
+        """
+        :return: a message for every exceeded budget
+        """
+        violations = []
+        if max_tokens is not None and self.total_tokens > max_tokens:
+            violations.append(f'{self.total_tokens:,} tokens exceed max-tokens of {max_tokens:,}')
+        if max_cost is not None and self.cost is not None and self.cost > max_cost:
+            violations.append(f'${self.cost:,.2f} exceeds max-cost of ${max_cost:,.2f}')
+        return violations
+
+    def describe(self) -> str:
+        lines = [f'{"language":<10}{"keys":>12}{"requests":>10}{"input tokens":>16}{"output tokens":>16}']
+        for language in sorted(self.languages, key=lambda estimate: estimate.lang_code):
+            lines.append(f'{language.lang_code:<10}{language.key_count:>12,}{language.request_count:>10,}'
+                         f'{language.input_tokens:>16,}{language.output_tokens:>16,}')
+        lines.append(f'{"total":<10}{self.key_count:>12,}{self.request_count:>10,}'
+                     f'{self.input_tokens:>16,}{self.output_tokens:>16,}')
+        cost = self.cost
+        model = self.model or 'the default model'
+        if cost is None:
+            lines.append(f'The price of {model} is unknown, the cost could not be estimated.')
+        else:
+            lines.append(f'Estimated cost with {model}: ${cost:,.2f}')
+        return '\n'.join(lines)
+
+
+async def create_localization_plan(processor: SourceProcessor,
+                                   target_paths: dict[str, str],
+                                   model: str | None = None,
+                                   chunk_size: int = CHUNK_SIZE) -> LocalizationPlan:
+    """
+    Finds the keys every target language would send to the LLM and estimates the tokens of their requests without
+    sending any. Glossary sections and retries of invalid translations are not counted.
+
+    :param target_paths: target file paths by language code
+    :param model: the model whose tokenizer and price are used
+    :raises ParsingError: a target file could not be parsed
+    """
+    system_prompt = generate_system_prompt(context=processor.context, glossary={}, tone=processor.tone)
+    system_prompt_tokens = estimate_token_count(system_prompt, model)
+    # the tokens of the key and of the value of every pending pair, shared by the languages
+    pair_tokens: dict[str, tuple[int, int]] = {}
+
+    languages = []
+    for lang_code, target_path in target_paths.items():
+        keys = await processor.retrieve_keys_to_be_localized(target_path, lang_code)
+        for key in keys:
+            if key not in pair_tokens:
+                key_tokens = _COMPACT_KEY_TOKENS if processor.compact_prompts else estimate_token_count(key, model)
+                pair_tokens[key] = (key_tokens, estimate_token_count(processor.source_dict[key], model))
+
+        request_count = math.ceil(len(keys) / chunk_size)
+        user_prompt_tokens = estimate_token_count(generate_user_prompt({}, retrieve_lang_full_name(lang_code)), model)
+        input_tokens = request_count * (system_prompt_tokens + user_prompt_tokens)
+        output_tokens = 0
+        for key in keys:
+            key_tokens, value_tokens = pair_tokens[key]
+            input_tokens += key_tokens + value_tokens + _PAIR_OVERHEAD_TOKENS
+            output_tokens += key_tokens + math.ceil(value_tokens * _OUTPUT_TOKENS_PER_SOURCE_TOKEN) + \
+                _PAIR_OVERHEAD_TOKENS
+        languages.append(LanguageEstimate(lang_code, len(keys), request_count, input_tokens, output_tokens))
+
+    return LocalizationPlan(model, languages)
+
+
+def _estimate_cost(model: str | None, input_tokens: int, output_tokens: int) -> float | None:
+    prices = _find_model_prices(model)
+    if prices is None:
+        return None
+    input_price, output_price = prices
+    return (input_tokens * input_price + output_tokens * output_price) / 1_000_000
+
+
+def _find_model_prices(model: str | None) -> tuple[float, float] | None:
+    if not model:
+        return None
+    # dated snapshots, e.g. gpt-4.1-mini-2025-04-14, cost the same as their model
+    matches = [name for name in _MODEL_PRICES if model == name or model.startswith(name + '-')]
+    if not matches:
+        return None
+    return _MODEL_PRICES[max(matches, key=len)]
@@ -1,16 +1,24 @@
 import logging
-from collections import OrderedDict
+from collections.abc import Mapping, Callable, Iterable
 
-from locawise import parsing
+from locawise import parsing, scheduling
+from locawise.catalogue import Catalogue
 from locawise.dictutils import unsafe_subdict
 from locawise.diffutils import retrieve_keys_to_be_localized, retrieve_nom_source_keys
 from locawise.errors import LocalizationFileAlreadyUpToDateError, LocalizationError
+from locawise.fileutils import AtomicWriteBatch
 from locawise.langutils import is_valid_two_letter_lang_code, retrieve_lang_full_name
 from locawise.llm import LLMContext
 from locawise.localization import localize
-from locawise.lockfile import read_lock_file
+from locawise.localization.memory import TranslationMemory
+from locawise.lockfile import read_lock_file, hash_key_value_pairs, update_key_value_hashes, \
+    read_previous_source_values, read_language_lock_file
+from locawise.parsecache import ParseCache
 from locawise.parsing import parse
-from locawise.serialization import serialize_and_save
+from locawise.serialization import serialize_and_save, WriteMode
+
+# pairs per LLM request
+CHUNK_SIZE = 50
 
 
 class SourceProcessor:
@@ -19,23 +27,86 @@ class SourceProcessor:
     """
 
     def __init__(self,
-                 llm_context: LLMContext,
-                 source_dict: dict[str, str],
+                 llm_context: LLMContext | None,
+                 source_dict: Mapping[str, str],
                  nom_keys: set[str],
                  context: str = '',
                  tone: str = '',
-                 glossary: dict[str, str] | None = None):
+                 glossary: dict[str, str] | None = None,
+                 parse_cache: ParseCache | None = None,
+                 write_mode: WriteMode = WriteMode.REWRITE,
+                 source_hashes: list[str] | None = None,
+                 compact_prompts: bool = False,
+                 previous_source_values: dict[str, str] | None = None,
+                 translation_memory: bool = False,
+                 language_nom_keys: dict[str, set[str]] | None = None,
+                 language_previous_source_values: dict[str, dict[str, str] | None] | None = None):
+        """
+        :param llm_context: None for a processor that only merges the results of shards
+        :param previous_source_values: the source values the existing translations of modified keys were made from,
+        None to translate modified keys from scratch
+        :param translation_memory: existing translations of equal source values are reused, and those of similar
+        source values are sent to the LLM as hints
+        :param language_nom_keys: the nom keys of the target languages that have a lock file of their own, by language
+        code, used instead of nom_keys for them
+        :param language_previous_source_values: previous_source_values of the languages of language_nom_keys
+        """
         self.llm_context = llm_context
         self.context = context
         self.tone = tone
         self.glossary = glossary
-        self.source_dict = source_dict
+        # target files are read into catalogues sharing the key table of the source
+        self.source_dict: Catalogue = _as_source_catalogue(source_dict)
         self.nom_keys = nom_keys
+        self.parse_cache = parse_cache
+        self.write_mode = write_mode
+        self.compact_prompts = compact_prompts
+        # the lock file digests of the source pairs in their order, written to the lock file after every run
+        self.source_hashes = source_hashes if source_hashes is not None else hash_key_value_pairs(source_dict)
+        self.previous_source_values = previous_source_values
+        self.language_nom_keys = language_nom_keys if language_nom_keys is not None else {}
+        self.language_previous_source_values = \
+            language_previous_source_values if language_previous_source_values is not None else {}
+        self.translation_memory = translation_memory
+        # built on first use and shared by the target languages
+        self._translation_memory_index: TranslationMemory | None = None
+
+    def update_source(self, source_dict: Mapping[str, str]):
+        """
+        Replaces the source dict, keys that are new or modified compared to the current source dict are added to the
+        nom keys.
+        """
+        source_dict = _as_source_catalogue(source_dict)
+        modified_keys = {k for k, v in source_dict.items() if self.source_dict.get(k) != v}
+        for lang_code in [None, *self.language_nom_keys]:
+            nom_keys = self._retrieve_nom_keys(lang_code)
+            previous_source_values = self._retrieve_previous_source_values(lang_code)
+            if previous_source_values is not None:
+                # keys that are still to be localized keep the value their translation was made from
+                previous_source_values.update((k, self.source_dict[k]) for k in modified_keys
+                                              if k in self.source_dict and k not in nom_keys)
+            nom_keys |= modified_keys
+        self.source_hashes = update_key_value_hashes(self.source_hashes, self.source_dict, source_dict)
+        self.source_dict = source_dict
+        self._translation_memory_index = None
 
-    async def localize_to_target_language(self, target_path: str, target_lang_code: str):
+    async def retrieve_keys_to_be_localized(self, target_path: str, target_lang_code: str | None = None) -> set[str]:
+        """
+        The keys that localize_to_target_language would send to the LLM for the target file.
+
+        :raises ParsingError: Target file could not be parsed
+        """
+        target_dict = await _read_target_catalogue(target_path, self.source_dict, self.parse_cache)
+        return retrieve_keys_to_be_localized(self.source_dict, target_dict, self._retrieve_nom_keys(target_lang_code))
+
+    async def localize_to_target_language(self,
+                                          target_path: str,
+                                          target_lang_code: str,
+                                          write_batch: AtomicWriteBatch | None = None):
         """
         :param target_path:
         :param target_lang_code:
+        :param write_batch: the target file is staged in the batch instead of being written right away when given
         :return:
         :raises ValueError: Programming errors or unsupported features
         :raises ParsingError: Target file could not be parsed
@@ -43,98 +114,279 @@ class SourceProcessor:
         :raises FileSaveError: error while saving to the target file
         """
         logging.info(f'Localizing to target language path={target_path} lang={target_lang_code}')
-        if not target_path.strip():
-            raise ValueError("Target path cannot be empty")
-
-        if not is_valid_two_letter_lang_code(target_lang_code):
-            raise ValueError(f'Language Code={target_lang_code} is not a valid two letter language code.')
+        try:
+            target_dict = await self._generate_localized_dictionary(target_path, target_lang_code)
+            await self._save_target_dict(target_dict, target_path, write_batch)
+        except LocalizationFileAlreadyUpToDateError:
+            logging.info(f'Localization is already up to date for {target_lang_code}')
 
-        target_lang_full_name = retrieve_lang_full_name(target_lang_code)
+    async def localize_shard(self,
+                             target_path: str,
+                             target_lang_code: str,
+                             key_filter: Callable[[str], bool]) -> dict[str, str]:
+        """
+        Localizes the keys of the target file that pass key_filter, without saving the target file.
 
+        :return: the localized pairs
+        :raises ValueError: Programming errors or unsupported features
+        :raises ParsingError: Target file could not be parsed
+        :raises LocalizationFailedError:
+        """
+        logging.info(f'Localizing the shard of target language path={target_path} lang={target_lang_code}')
+        target_language_full_name = _retrieve_target_language_full_name(target_path, target_lang_code)
+        target_dict = await _read_target_catalogue(target_path, self.source_dict, self.parse_cache)
         try:
-            target_dict = await generate_localized_dictionary(self.llm_context,
-                                                              source_dict=self.source_dict,
-                                                              nom_keys=self.nom_keys,
-                                                              target_dict_path=target_path,
-                                                              target_language_full_name=target_lang_full_name,
-                                                              context=self.context,
-                                                              tone=self.tone,
-                                                              glossary=self.glossary)
-
-            # target might have outdated keys
-            extra_keys = (target_dict.keys() - self.source_dict.keys())
-            for key in extra_keys:
-                target_dict.pop(key)
-
-            missing_keys = self.source_dict.keys() - target_dict.keys()
-            if missing_keys:
-                raise LocalizationError(f"Found missing keys. {missing_keys}")
-
-            ordered_target_dict = OrderedDict()
-            for k, _ in self.source_dict.items():
-                ordered_target_dict[k] = target_dict[k]
-
-            await serialize_and_save(ordered_target_dict, target_path)
+            localized_pairs = await generate_localized_pairs(self.llm_context,
+                                                             source_dict=self.source_dict,
+                                                             nom_keys=self._retrieve_nom_keys(target_lang_code),
+                                                             target_dict=target_dict,
+                                                             target_language_full_name=target_language_full_name,
+                                                             **self._create_localization_args(target_lang_code),
+                                                             key_filter=key_filter)
         except LocalizationFileAlreadyUpToDateError:
-            logging.info(f'Localization is already up to date for {target_lang_code}')
+            logging.info(f'The shard is already up to date for {target_lang_code}')
+            return {}
+        # only what this run localized, a key the LLM did not answer is missing rather than keeping its stale
+        # translation, so that merging refuses it
+        return {k: v for k, v in localized_pairs.items() if key_filter(k)}
+
+    async def merge_target_language(self,
+                                    target_path: str,
+                                    localized_pairs: Mapping[str, str],
+                                    write_batch: AtomicWriteBatch | None = None,
+                                    target_lang_code: str | None = None):
+        """
+        Saves the target file with the pairs localized by localize_shard.
+
+        :raises ParsingError: Target file could not be parsed
+        :raises LocalizationError: a key of the target file that needs localization is not in localized_pairs
+        :raises FileSaveError: error while saving to the target file
+        """
+        target_dict = await _read_target_catalogue(target_path, self.source_dict, self.parse_cache)
+        missing_keys = retrieve_keys_to_be_localized(self.source_dict, target_dict,
+                                                     self._retrieve_nom_keys(target_lang_code)) - localized_pairs.keys()
+        if missing_keys:
+            raise LocalizationError(f"Found keys that were not localized. {missing_keys}")
+        target_dict.update((k, v) for k, v in localized_pairs.items() if k in self.source_dict)
+        await self._save_target_dict(target_dict, target_path, write_batch)
 
+    async def _generate_localized_dictionary(self, target_path: str, target_lang_code: str) -> Catalogue:
+        target_language_full_name = _retrieve_target_language_full_name(target_path, target_lang_code)
+        return await generate_localized_dictionary(self.llm_context,
+                                                   source_dict=self.source_dict,
+                                                   nom_keys=self._retrieve_nom_keys(target_lang_code),
+                                                   target_dict_path=target_path,
+                                                   target_language_full_name=target_language_full_name,
+                                                   parse_cache=self.parse_cache,
+                                                   **self._create_localization_args(target_lang_code))
 
-async def create_source_processor(llm_context: LLMContext,
+    def _create_localization_args(self, target_lang_code: str) -> dict:
+        return {
+            'context': self.context,
+            'tone': self.tone,
+            'glossary': self.glossary,
+            'compact_prompts': self.compact_prompts,
+            'previous_source_values': self._retrieve_previous_source_values(target_lang_code),
+            'translation_memory': self._get_translation_memory(),
+        }
+
+    def _retrieve_nom_keys(self, target_lang_code: str | None) -> set[str]:
+        return self.language_nom_keys.get(target_lang_code, self.nom_keys)
+
+    def _retrieve_previous_source_values(self, target_lang_code: str | None) -> dict[str, str] | None:
+        if target_lang_code in self.language_nom_keys:
+            return self.language_previous_source_values.get(target_lang_code)
+        return self.previous_source_values
+
+    async def _save_target_dict(self, target_dict: Catalogue, target_path: str, write_batch: AtomicWriteBatch | None):
+        # the target catalogue shares the key table of the source, so it is in source order and has no outdated keys
+        missing_keys = self.source_dict.missing_keys(target_dict)
+        if missing_keys:
+            raise LocalizationError(f"Found missing keys. {missing_keys}")
+
+        await serialize_and_save(target_dict,
+                                 target_path,
+                                 write_mode=self.write_mode,
+                                 write_batch=write_batch)
+        if self.parse_cache and write_batch:
+            write_batch.after_commit(lambda: self.parse_cache.put(target_path, target_dict))
+        elif self.parse_cache:
+            await self.parse_cache.put(target_path, target_dict)
+
+    def _get_translation_memory(self) -> TranslationMemory | None:
+        if not self.translation_memory:
+            return None
+        if self._translation_memory_index is None:
+            self._translation_memory_index = TranslationMemory(self.source_dict)
+        return self._translation_memory_index
+
+
+async def create_source_processor(llm_context: LLMContext | None,
                                   source_file_path: str,
                                   lock_file_path: str,
                                   context: str = '',
                                   tone: str = '',
-                                  glossary: dict[str, str] | None = None) -> SourceProcessor:
+                                  glossary: dict[str, str] | None = None,
+                                  parse_cache: ParseCache | None = None,
+                                  write_mode: WriteMode = WriteMode.REWRITE,
+                                  compact_prompts: bool = False,
+                                  source_values_path: str | None = None,
+                                  translation_memory: bool = False,
+                                  target_lang_codes: Iterable[str] = ()) -> SourceProcessor:
     """
-    :param llm_context:
+    :param llm_context: None for a processor that only merges the results of shards
     :param source_file_path:
     :param lock_file_path:
     :param context:
     :param tone:
     :param glossary:
+    :param parse_cache: source and target files are parsed through this cache when given
+    :param write_mode: how target files are saved
+    :param compact_prompts: keys are sent to the LLM as short ids
+    :param source_values_path: the source values file written with the lock file, the translations of modified keys
+    are edited instead of translated from scratch when given
+    :param translation_memory: existing translations of equal and similar source values are reused and sent as hints
+    :param target_lang_codes: the target languages, those with a lock file of their own, written by a run that saved
+    the languages one by one, are localized against it instead of the lock file
     :return:
     :raises ParseError:
     :raises ValueError:
     """
-    source_dict = await parse(source_file_path)
+    if parse_cache:
+        source_dict = await parse_cache.parse(source_file_path)
+    else:
+        source_dict = await parse(source_file_path)
     key_value_hashes: set[str] = await read_lock_file(lock_file_path)
-    nom_keys = retrieve_nom_source_keys(key_value_hashes, source_dict=source_dict)
+    # every pair is hashed once, the same digests are written to the lock file at the end of the run
+    source_hashes = hash_key_value_pairs(source_dict)
+    nom_keys = retrieve_nom_source_keys(key_value_hashes, source_dict=source_dict, source_hashes=source_hashes)
+    previous_source_values = None
+    if source_values_path:
+        previous_source_values = await read_previous_source_values(source_values_path, nom_keys, key_value_hashes)
+
+    language_nom_keys = {}
+    language_previous_source_values = {}
+    for lang_code in target_lang_codes:
+        language_key_value_hashes = await read_language_lock_file(lock_file_path, lang_code)
+        if language_key_value_hashes is None:
+            continue
+        language_nom_keys[lang_code] = retrieve_nom_source_keys(language_key_value_hashes,
+                                                                source_dict=source_dict,
+                                                                source_hashes=source_hashes)
+        if source_values_path:
+            language_previous_source_values[lang_code] = await read_previous_source_values(
+                source_values_path, language_nom_keys[lang_code], language_key_value_hashes)
     return SourceProcessor(llm_context,
                            source_dict,
                            nom_keys=nom_keys,
                            context=context,
                            tone=tone,
-                           glossary=glossary)
+                           glossary=glossary,
+                           parse_cache=parse_cache,
+                           write_mode=write_mode,
+                           source_hashes=source_hashes,
+                           compact_prompts=compact_prompts,
+                           previous_source_values=previous_source_values,
+                           translation_memory=translation_memory,
+                           language_nom_keys=language_nom_keys,
+                           language_previous_source_values=language_previous_source_values)
 
 
 async def generate_localized_dictionary(
         llm_context: LLMContext,
-        source_dict: dict[str, str],
+        source_dict: Mapping[str, str],
         nom_keys: set[str],
         target_dict_path: str,
         target_language_full_name: str,
         context: str = '',
         tone: str = '',
         glossary: dict[str, str] | None = None,
-) -> dict[str, str]:
+        parse_cache: ParseCache | None = None,
+        compact_prompts: bool = False,
+        previous_source_values: Mapping[str, str] | None = None,
+        translation_memory: TranslationMemory | None = None,
+        key_filter: Callable[[str], bool] | None = None,
+) -> Catalogue:
     """
         Reads the target file, finds the keys that need localization, localizes them and returns the final target dict.
+        Keys of the target file that are not in the source are left out. See generate_localized_pairs for how keys are
+        localized.
 
         Raises:
             ParsingError: If the target dictionary file cannot be parsed
             LocalizationFailedError: If the localization process fails
         """
-    try:
-        target_dict: dict[str, str] = await parsing.parse(file_path=target_dict_path)
-    except FileNotFoundError:
-        target_dict: dict[str, str] = {}
-    keys_to_be_localized: set[str] = retrieve_keys_to_be_localized(source_dict, target_dict, nom_keys)
+    source_dict = _as_source_catalogue(source_dict)
+    target_dict = await _read_target_catalogue(target_dict_path, source_dict, parse_cache)
+    localized_pairs = await generate_localized_pairs(llm_context,
+                                                     source_dict=source_dict,
+                                                     nom_keys=nom_keys,
+                                                     target_dict=target_dict,
+                                                     target_language_full_name=target_language_full_name,
+                                                     context=context,
+                                                     tone=tone,
+                                                     glossary=glossary,
+                                                     compact_prompts=compact_prompts,
+                                                     previous_source_values=previous_source_values,
+                                                     translation_memory=translation_memory,
+                                                     key_filter=key_filter)
+    target_dict.update(localized_pairs)
+    return target_dict
+
+
+async def generate_localized_pairs(
+        llm_context: LLMContext,
+        source_dict: Catalogue,
+        nom_keys: set[str],
+        target_dict: Catalogue,
+        target_language_full_name: str,
+        context: str = '',
+        tone: str = '',
+        glossary: dict[str, str] | None = None,
+        compact_prompts: bool = False,
+        previous_source_values: Mapping[str, str] | None = None,
+        translation_memory: TranslationMemory | None = None,
+        key_filter: Callable[[str], bool] | None = None,
+) -> dict[str, str]:
+    """
+        Finds the keys of the target dict that need localization and localizes them, the target dict is left as it is.
+        The existing translations of keys with a previous source value are edited instead of translated from scratch.
+        With a translation memory, keys whose source value equals that of a translated key after normalization get its
+        translation without an LLM call, and the translations of similar source values are sent along with the others
+        as hints. With a key filter, only the keys that pass it are localized, e.g. those of a shard.
+
+        Returns:
+            The pairs localized or reused by this call. Keys the LLM did not answer are not in it.
+
+        Raises:
+            LocalizationFileAlreadyUpToDateError: If no key needs localization
+            LocalizationFailedError: If the localization process fails
+        """
+    outdated_keys: set[str] = retrieve_keys_to_be_localized(source_dict, target_dict, nom_keys)
+    keys_to_be_localized = outdated_keys
+    if key_filter is not None:
+        keys_to_be_localized = {k for k in outdated_keys if key_filter(k)}
 
     if not keys_to_be_localized:
         raise LocalizationFileAlreadyUpToDateError()
 
     logging.info(f"{len(keys_to_be_localized)} keys will be localized to {target_language_full_name}")
+    # languages with less to do are done first
+    scheduling.prioritize(len(keys_to_be_localized))
     pairs_to_be_localized: dict[str, str] = unsafe_subdict(source_dict, keys_to_be_localized)
+    reused_pairs: dict[str, str] = {}
+    hints = None
+    # a target without any translation has nothing to remember
+    if translation_memory is not None and len(target_dict) > 0:
+        hints = _apply_translation_memory(translation_memory, pairs_to_be_localized, reused_pairs, target_dict,
+                                          outdated_keys)
+        if not pairs_to_be_localized:
+            return reused_pairs
+
+    edits = None
+    if previous_source_values:
+        edits = {k: (previous_source_values[k], target_dict[k]) for k in keys_to_be_localized
+                 if k in previous_source_values and k in target_dict}
 
     localized_pairs = await localize(llm_context=llm_context,
                                      pairs=pairs_to_be_localized,
@@ -142,7 +394,69 @@ async def generate_localized_dictionary(
                                      context=context,
                                      tone=tone,
                                      glossary=glossary,
-                                     chunk_size=50)
-    target_dict.update(localized_pairs)
+                                     chunk_size=CHUNK_SIZE,
+                                     compact=compact_prompts,
+                                     edits=edits,
+                                     hints=hints)
+    # the answer might contain keys that were not asked for
+    reused_pairs.update((k, v) for k, v in localized_pairs.items() if k in source_dict)
+    return reused_pairs
 
-    return target_dict
+
+def _apply_translation_memory(translation_memory: TranslationMemory,
+                              pairs_to_be_localized: dict[str, str],
+                              reused_pairs: dict[str, str],
+                              target_dict: Catalogue,
+                              outdated_keys: set[str]) -> dict[str, list[tuple[str, str]]]:
+    """
+    Moves the pairs whose translation is reused from pairs_to_be_localized into reused_pairs, with their translation.
+
+    :return: the hints of the remaining pairs
+    """
+    reused_keys = []
+    for key, value in pairs_to_be_localized.items():
+        translation = translation_memory.find_exact(value, target_dict, outdated_keys)
+        if translation is not None:
+            reused_pairs[key] = translation
+            reused_keys.append(key)
+    for key in reused_keys:
+        del pairs_to_be_localized[key]
+    if reused_keys:
+        logging.info(f"Reused the existing translations of {len(reused_keys)} keys with the same source value")
+
+    hints = {}
+    for key, value in pairs_to_be_localized.items():
+        similar = translation_memory.find_similar(value, target_dict, outdated_keys)
+        if similar:
+            hints[key] = similar
+    return hints
+
+
+def _retrieve_target_language_full_name(target_path: str, target_lang_code: str) -> str:
+    if not target_path.strip():
+        raise ValueError("Target path cannot be empty")
+
+    if not is_valid_two_letter_lang_code(target_lang_code):
+        raise ValueError(f'Language Code={target_lang_code} is not a valid two letter language code.')
+
+    return retrieve_lang_full_name(target_lang_code)
+
+
+async def _read_target_catalogue(target_dict_path: str,
+                                 source_dict: Catalogue,
+                                 parse_cache: ParseCache | None) -> Catalogue:
+    # the parsed dict, with its own copy of every key, is dropped as soon as the catalogue is built
+    try:
+        if parse_cache:
+            target_dict = await parse_cache.parse(target_dict_path)
+        else:
+            target_dict = await parsing.parse(file_path=target_dict_path)
+    except FileNotFoundError:
+        target_dict = {}
+    return Catalogue.from_pairs(target_dict, key_table=source_dict.key_table)
+
+
+def _as_source_catalogue(source_dict: Mapping[str, str]) -> Catalogue:
+    if isinstance(source_dict, Catalogue):
+        return source_dict
+    return Catalogue.from_pairs(source_dict)
@@ -0,0 +1,198 @@
+import re
+from collections import namedtuple, OrderedDict
+from collections.abc import Mapping, Iterator
+from itertools import batched
+
+from locawise.errors import ParseError
+
+# start and end delimit the logical line without its line terminator, line_end includes the terminator
+PropertiesLine = namedtuple('PropertiesLine', ['key', 'start', 'end', 'line_end'])
+
+_NATURAL_LINE = re.compile(r'[^\r\n]*(?:\r\n|\r|\n)?')
+
+_LINE_TERMINATOR = re.compile(r'\r\n|\r|\n')
+
+_TRAILING_BACKSLASHES = re.compile(r'\\+$')
+
+_LEADING_WHITESPACE = ' \t\f'
+
+# the key ends at the first unescaped whitespace, ':' or '=', the separator is one of those surrounded by whitespace
+_KEY_VALUE = re.compile(r'((?:[^\\:= \t\f\r\n]|\\.?)*)[ \t\f]*[:=]?[ \t\f]*', re.DOTALL)
+
+_ESCAPE = re.compile(r'\\(u.{0,4}|.?)', re.DOTALL)
+
+_HEX_DIGITS = re.compile('[0-9a-fA-F]{4}')
+
+_SIMPLE_ESCAPES = {'t': '\t', 'n': '\n', 'r': '\r', 'f': '\f'}
+
+_SURROGATE = re.compile('[\ud800-\udfff]')
+
+_PAIRS_PER_CHUNK = 1024
+
+_ESCAPED_CHARACTERS = {'\r': '\\r', '\n': '\\n', '\f': '\\f', '\t': '\\t', '\\': '\\\\', '#': '\\#', '!': '\\!',
+                       '=': '\\=', ':': '\\:', ' ': '\\ '}
+
+# a regex substitution beats str.translate, which is slow on text with non-ASCII characters, and most values have nothing
+# to escape at all
+_KEY_SPECIAL = re.compile(r'[\r\n\f\t\\#!=: ]')
+
+_VALUE_SPECIAL = re.compile(r'[\r\n\f\t\\#!=:]')
+
+
+def parse_properties(content: str) -> dict[str, str]:
+    """
+    Parses a .properties document in a single pass, with the same result as jproperties: comments and blank lines are
+    skipped, lines ending with an odd number of backslashes continue on the next line, keys are separated from values
+    by '=', ':' or whitespace, and \\t, \\n, \\r, \\f and \\uXXXX escapes are decoded. Later duplicates override the
+    value of a key but keep its position. Like java.util.Properties, and unlike jproperties, lines are joined before the
+    separator is looked for, so it may follow a continuation.
+
+    :raises ParseError: invalid unicode escape
+    """
+    result: dict[str, str] = OrderedDict()
+    lines = _LINE_TERMINATOR.split(content)
+    index = 0
+    while index < len(lines):
+        line = lines[index].lstrip(_LEADING_WHITESPACE)
+        index += 1
+        if not line or line[0] in '#!':
+            continue
+
+        if line[-1] == '\\' and _is_continued(line):
+            parts = [line[:-1]]
+            while index < len(lines):
+                # leading whitespace of a continuation line is not part of the value
+                line = lines[index].lstrip(_LEADING_WHITESPACE)
+                index += 1
+                if not line or line[-1] != '\\' or not _is_continued(line):
+                    parts.append(line)
+                    break
+                parts.append(line[:-1])
+            line = ''.join(parts)
+
+        key_value = _KEY_VALUE.match(line)
+        key = key_value.group(1)
+        value = line[key_value.end():]
+        result[unescape(key) if '\\' in key else key] = unescape(value) if '\\' in value else value
+
+    return result
+
+
+def unescape(text: str) -> str:
+    """
+    :raises ParseError: invalid unicode escape
+    """
+    text = _ESCAPE.sub(_replace_escape, text)
+    if _SURROGATE.search(text):
+        # characters outside the basic multilingual plane are escaped as surrogate pairs
+        try:
+            text = text.encode('utf-16', 'surrogatepass').decode('utf-16')
+        except UnicodeDecodeError as e:
+            raise ParseError('Unicode escape with an unpaired surrogate') from e
+    return text
+
+
+def _replace_escape(match: re.Match) -> str:
+    escape = match.group(1)
+    if not escape:
+        # a stray backslash at the end of the document
+        return ''
+
+    if escape[0] == 'u':
+        try:
+            # int() would accept whitespace and underscores
+            if not _HEX_DIGITS.fullmatch(escape, 1):
+                raise ValueError(escape)
+            return chr(int(escape[1:], 16))
+        except ValueError as e:
+            raise ParseError(f'Invalid unicode escape \\{escape}') from e
+
+    return _SIMPLE_ESCAPES.get(escape, escape)
+
+
+def serialize_properties(pairs: Mapping[str, str]) -> str:
+    """
+    Writes pairs in the same format as jproperties with strict=True, strip_meta=True and timestamp=False: one key=value
+    line per pair, separators, comment markers, backslashes and control whitespace are escaped, as are every space in
+    keys and a leading space in values.
+    """
+    return ''.join(iter_serialized_properties(pairs))
+
+
+def iter_serialized_properties(pairs: Mapping[str, str], chunk_size: int = _PAIRS_PER_CHUNK) -> Iterator[str]:
+    """
+    Yields serialize_properties(pairs) in chunks of chunk_size lines.
+    """
+    for batch in batched(pairs.items(), chunk_size):
+        chunk = ''.join([f'{_escape_key(key)}={_escape_value(value)}\n' for key, value in batch])
+        if _SURROGATE.search(chunk):
+            # unpaired surrogates cannot be encoded
+            chunk = _SURROGATE.sub(lambda match: f'\\u{ord(match.group()):04x}', chunk)
+        yield chunk
+
+
+def serialize_properties_line(key: str, value: str) -> str:
+    """
+    Returns the line, without line terminator, that serialize_properties writes for the pair.
+    """
+    return serialize_properties({key: value})[:-1]
+
+
+def _escape_key(key: str) -> str:
+    key = str(key)
+    return _KEY_SPECIAL.sub(_escape_character, key) if _KEY_SPECIAL.search(key) else key
+
+
+def _escape_value(value: str) -> str:
+    value = str(value)
+    escaped = _VALUE_SPECIAL.sub(_escape_character, value) if _VALUE_SPECIAL.search(value) else value
+    return '\\' + escaped if escaped[:1] == ' ' else escaped
+
+
+def _escape_character(match: re.Match) -> str:
+    return _ESCAPED_CHARACTERS[match.group()]
+
+
+def _is_continued(line: str) -> bool:
+    backslashes = _TRAILING_BACKSLASHES.search(line)
+    return backslashes is not None and len(backslashes.group()) % 2 == 1
+
+
+def scan_properties_lines(content: str) -> list[PropertiesLine]:
+    """
+    Locates the logical lines holding key-value pairs in a .properties document, in the order they appear. Comments and
+    blank lines are skipped, lines continued with a trailing backslash are merged into one logical line.
+    """
+    lines: list[PropertiesLine] = []
+    position = 0
+    while position < len(content):
+        start = position
+        line = _NATURAL_LINE.match(content, position)
+        position = line.end()
+        stripped = content[start:position].lstrip(_LEADING_WHITESPACE)
+        if not stripped.rstrip('\r\n') or stripped[0] in '#!':
+            continue
+
+        end = _strip_line_terminator(content, start, position)
+        while _is_continued(content[start:end]) and position < len(content):
+            line = _NATURAL_LINE.match(content, position)
+            position = line.end()
+            end = _strip_line_terminator(content, start, position)
+
+        lines.append(PropertiesLine(_read_key(content[start:end]), start, end, position))
+
+    return lines
+
+
+def _strip_line_terminator(content: str, start: int, end: int) -> int:
+    while end > start and content[end - 1] in '\r\n':
+        end -= 1
+    return end
+
+
+def _read_key(logical_line: str) -> str:
+    raw_key = _KEY_VALUE.match(logical_line.lstrip(_LEADING_WHITESPACE)).group(1)
+    if '\\' not in raw_key:
+        return raw_key
+    # escapes and continuations in keys are rare
+    return next(iter(parse_properties(logical_line)), '')
@@ -0,0 +1,246 @@
+import asyncio
+import contextlib
+import contextvars
+import heapq
+import itertools
+import json
+import logging
+import math
+import os
+import time
+from typing import AsyncIterator
+
+from locawise.errors import DeadlineExceededError
+from locawise.fileutils import read_file, write_to_file
+
+# weight of the latest call in the expected call duration
+_LATENCY_SMOOTHING = 0.2
+
+_INITIAL_ADAPTIVE_LIMIT = 8
+
+# the default connection pool size of the LLM clients
+_MAX_ADAPTIVE_LIMIT = 100
+
+_DECREASE_FACTOR = 0.5
+
+# latencies are rising when their recent average exceeds their long-term average by this factor
+_LATENCY_TOLERANCE = 2.0
+
+_RECENT_LATENCY_SMOOTHING = 0.3
+
+_BASELINE_LATENCY_SMOOTHING = 0.02
+
+# set by prioritize so that calls made by child tasks, e.g. the chunks of a language, share the priority of their parent
+_current_priority: contextvars.ContextVar[tuple] = contextvars.ContextVar('llm_priority', default=())
+
+
+def prioritize(*keys):
+    """
+    Refines the priority of the LLM calls made by the current task and by the tasks it creates from now on. Calls are
+    ordered by the keys set so far, then by these, lower first. E.g. a run sets the configured priority of each
+    language and the processor adds the number of keys to localize, so that small languages of the same priority go
+    first.
+    """
+    _current_priority.set(_current_priority.get() + keys)
+
+
+class PriorityLimiter:
+    """
+    Limits the number of concurrent LLM calls. Waiting calls are admitted in order of their priority, calls of the same
+    priority in the order they arrived, so the work of one language is done before the work of the next one starts
+    instead of every language progressing slowly.
+
+    With a deadline no call is admitted when it is not expected to finish in time, i.e. when less time is left than
+    calls have recently taken. Those calls raise DeadlineExceededError, calls that are already running are not
+    interrupted.
+    """
+
+    def __init__(self, max_concurrency: int | None = None, deadline: float | None = None):
+        """
+        :param max_concurrency: None for no limit
+        :param deadline: time.monotonic() value
+        """
+        if max_concurrency is not None and max_concurrency < 1:
+            raise ValueError('max_concurrency must be at least 1')
+        self.max_concurrency = max_concurrency
+        self.deadline = deadline
+        self.in_flight = 0
+        self.expected_latency: float | None = None
+        # (priority, arrival, future) of the calls waiting for a slot
+        self._waiters: list[tuple[tuple, int, asyncio.Future]] = []
+        self._arrivals = itertools.count()
+
+    @contextlib.asynccontextmanager
+    async def acquire(self, priority: tuple | None = None) -> AsyncIterator[None]:
+        """
+        Holds a slot for the duration of a call.
+
+        :param priority: the priority set with prioritize by default
+        :raises DeadlineExceededError: the call would not finish before the deadline
+        """
+        self._check_deadline()
+        if self._has_free_slot() and not self._waiters:
+            self.in_flight += 1
+        else:
+            await self._wait(_current_priority.get() if priority is None else priority)
+
+        start = time.monotonic()
+        try:
+            yield
+            self._record_latency(time.monotonic() - start)
+        finally:
+            self._release()
+
+    def try_acquire(self) -> bool:
+        """
+        Takes a slot without waiting, for calls that are only worth making while the limit is not reached, e.g. hedged
+        calls. Calls waiting for a slot come first. The slot is given back with release.
+
+        :return: whether a slot was taken
+        """
+        try:
+            self._check_deadline()
+        except DeadlineExceededError:
+            return False
+        if self._has_free_slot() and not self._waiters:
+            self.in_flight += 1
+            return True
+        return False
+
+    def release(self):
+        """
+        Gives back a slot taken with try_acquire.
+        """
+        self._release()
+
+    async def _wait(self, priority: tuple):
+        future = asyncio.get_running_loop().create_future()
+        waiter = (priority, next(self._arrivals), future)
+        heapq.heappush(self._waiters, waiter)
+        try:
+            if self.deadline is None:
+                await future
+            else:
+                async with asyncio.timeout(max(0.0, self.deadline - time.monotonic())):
+                    await future
+        except BaseException as e:
+            if future.done() and not future.cancelled():
+                # the slot was handed over right before the wait was given up
+                self._release()
+            elif waiter in self._waiters:
+                self._waiters.remove(waiter)
+                heapq.heapify(self._waiters)
+            if isinstance(e, TimeoutError):
+                raise DeadlineExceededError('The deadline passed before the LLM call could start') from e
+            raise
+        # a slot might have been handed over while the deadline came closer
+        try:
+            self._check_deadline()
+        except DeadlineExceededError:
+            self._release()
+            raise
+
+    def set_max_concurrency(self, max_concurrency: int | None):
+        """
+        Changes the limit, waiting calls are admitted right away when it grows. Calls in flight above a lowered limit
+        are not interrupted.
+        """
+        if max_concurrency is not None and max_concurrency < 1:
+            raise ValueError('max_concurrency must be at least 1')
+        self.max_concurrency = max_concurrency
+        self._admit_waiters()
+
+    def _release(self):
+        self.in_flight -= 1
+        self._admit_waiters()
+
+    def _admit_waiters(self):
+        while self._waiters and self._has_free_slot():
+            _, _, future = heapq.heappop(self._waiters)
+            # the waiting call might have been cancelled without having removed itself yet
+            if not future.done():
+                self.in_flight += 1
+                future.set_result(None)
+
+    def _has_free_slot(self) -> bool:
+        return self.max_concurrency is None or self.in_flight < self.max_concurrency
+
+    def _check_deadline(self):
+        if self.deadline is None:
+            return
+        remaining = self.deadline - time.monotonic()
+        if remaining <= 0 or (self.expected_latency is not None and remaining < self.expected_latency):
+            raise DeadlineExceededError(f'The LLM call would not finish before the deadline, {remaining:.0f} seconds '
+                                        f'are left')
+
+    def _record_latency(self, latency: float):
+        if self.expected_latency is None:
+            self.expected_latency = latency
+        else:
+            self.expected_latency += _LATENCY_SMOOTHING * (latency - self.expected_latency)
+
+
+class AimdLimit:
+    """
+    A concurrency limit learned with additive increase and multiplicative decrease. Every successful call raises the
+    limit by 1 / limit, i.e. by one per round of calls, while latencies are stable. Signs of overload, rate limit and
+    server errors or latencies well above their long-term average, halve it. The calls that were in flight when the
+    limit was cut may still fail, so it is cut at most once per round of calls.
+    """
+
+    def __init__(self, limit: float | None = None, minimum: float = 1, maximum: float | None = None):
+        """
+        :param limit: the starting limit, e.g. the one learned in a previous run, clamped to minimum and maximum
+        :param maximum: the size of the connection pools by default
+        """
+        self.minimum = minimum
+        self.maximum = _MAX_ADAPTIVE_LIMIT if maximum is None else maximum
+        self.limit = min(max(_INITIAL_ADAPTIVE_LIMIT if limit is None else limit, minimum), self.maximum)
+        self._recent_latency: float | None = None
+        self._baseline_latency: float | None = None
+        self._calls_until_next_decrease = 0
+
+    def record_success(self, latency: float):
+        self._calls_until_next_decrease -= 1
+        if self._recent_latency is None:
+            self._recent_latency = self._baseline_latency = latency
+        else:
+            self._recent_latency += _RECENT_LATENCY_SMOOTHING * (latency - self._recent_latency)
+            self._baseline_latency += _BASELINE_LATENCY_SMOOTHING * (latency - self._baseline_latency)
+
+        if self._recent_latency > _LATENCY_TOLERANCE * self._baseline_latency:
+            self._decrease()
+        else:
+            self.limit = min(self.maximum, self.limit + 1 / self.limit)
+
+    def record_overload(self):
+        self._calls_until_next_decrease -= 1
+        self._decrease()
+
+    def _decrease(self):
+        if self._calls_until_next_decrease > 0:
+            return
+        self._calls_until_next_decrease = math.ceil(self.limit)
+        self.limit = max(self.minimum, self.limit * _DECREASE_FACTOR)
+
+
+async def read_learned_limits(file_path: str) -> dict[str, float]:
+    """
+    The concurrency limits a previous run learned, by strategy key. Empty when there are none or they are unreadable.
+    """
+    if not os.path.exists(file_path):
+        return {}
+    try:
+        limits = json.loads(await read_file(file_path))
+    except (OSError, ValueError):
+        logging.warning(f'Could not read the learned concurrency limits from {file_path}, starting over.')
+        return {}
+    if not isinstance(limits, dict):
+        return {}
+    return {key: float(limit) for key, limit in limits.items()
+            if isinstance(limit, (int, float)) and not isinstance(limit, bool) and limit > 0}
+
+
+async def write_learned_limits(file_path: str, limits: dict[str, float]):
+    os.makedirs(os.path.dirname(file_path), exist_ok=True)
+    await write_to_file(file_path, json.dumps(limits, indent=2, sort_keys=True))
@@ -1,18 +1,30 @@
-import io
-import json
 import logging
+from collections.abc import Mapping, Iterator
+from enum import Enum
 
-import jproperties
-
-from locawise.androidutils import serialize_to_xml
-from locawise.dictutils import unflatten_dict
+from locawise import cpupool
+from locawise.androidutils import serialize_to_xml, iter_serialized_xml
 from locawise.errors import FileSaveError, SerializationError
-from locawise.fileutils import write_to_file
+from locawise.fileutils import write_to_file, read_file, AtomicWriteBatch
+from locawise.jsonutils import iter_unflattened_json
 from locawise.localization.format import LocalizationFormat, detect_format
+from locawise.patching import patch
+from locawise.propertiesutils import serialize_properties, iter_serialized_properties
+
+
+class WriteMode(Enum):
+    # the file is serialized from scratch
+    REWRITE = 'rewrite'
+    # only the changed, added and removed keys of an existing file are edited, other formats are rewritten
+    PATCH = 'patch'
 
 
-async def serialize_and_save(key_value_pairs: dict[str, str], target_path: str):
+async def serialize_and_save(key_value_pairs: Mapping[str, str],
+                             target_path: str,
+                             write_mode: WriteMode = WriteMode.REWRITE,
+                             write_batch: AtomicWriteBatch | None = None):
     """
+    :param write_batch: the file is only staged in the batch when given, it is written once the batch is committed
     :raises LocalizationFormatError
     :raises FileSaveError
     :raises ValueError
@@ -22,15 +34,43 @@ async def serialize_and_save(key_value_pairs: dict[str, str], target_path: str):
         raise ValueError(f"Target path cannot be empty")
 
     localization_format = detect_format(target_path)
-    content = serialize(key_value_pairs, localization_format=localization_format)
+    current_content = None
+    if write_mode == WriteMode.PATCH:
+        try:
+            current_content = await read_file(target_path)
+        except FileNotFoundError:
+            pass
+    if current_content is not None or cpupool.is_enabled():
+        content = await cpupool.run(serialize_or_patch, key_value_pairs, localization_format, current_content)
+    else:
+        # serialized by the writer while it writes, the whole content is never held in memory
+        content = iter_serialized(key_value_pairs, localization_format)
 
     try:
-        await write_to_file(file_path=target_path, content=content)
+        if write_batch:
+            await write_batch.stage(target_path, content)
+        else:
+            await write_to_file(file_path=target_path, content=content)
+    except SerializationError:
+        raise
     except Exception as e:
         raise FileSaveError(f"Could not write content to target_path={target_path}") from e
 
 
-def serialize(key_value_map: dict[str, str], localization_format: LocalizationFormat) -> str:
+def serialize_or_patch(key_value_pairs: Mapping[str, str],
+                       localization_format: LocalizationFormat,
+                       current_content: str | None = None) -> str:
+    """
+    Patches current_content when given and patchable, serializes key_value_pairs from scratch otherwise.
+    """
+    if current_content is not None:
+        content = patch(current_content, key_value_pairs, localization_format)
+        if content is not None:
+            return content
+    return serialize(key_value_pairs, localization_format=localization_format)
+
+
+def serialize(key_value_map: Mapping[str, str], localization_format: LocalizationFormat) -> str:
     match localization_format:
         case LocalizationFormat.PROPERTIES:
             return serialize_to_properties_format(key_value_map)
@@ -42,27 +82,38 @@ def serialize(key_value_map: dict[str, str], localization_format: LocalizationFo
             raise ValueError(f"Serialization for {localization_format} is not implemented")
 
 
-def serialize_to_properties_format(key_value_map: dict[str, str]) -> str:
+def iter_serialized(key_value_map: Mapping[str, str], localization_format: LocalizationFormat) -> Iterator[str]:
+    """
+    Yields the same content as serialize in chunks, pair by pair, without building it or an intermediate tree whole.
+
+    :raises SerializationError: while iterating
+    :raises ValueError: unsupported format, while iterating
+    """
+    match localization_format:
+        case LocalizationFormat.PROPERTIES:
+            iter_chunks = iter_serialized_properties
+        case LocalizationFormat.JSON:
+            iter_chunks = iter_unflattened_json
+        case LocalizationFormat.XML:
+            iter_chunks = iter_serialized_xml
+        case _:
+            raise ValueError(f"Serialization for {localization_format} is not implemented")
+
+    try:
+        yield from iter_chunks(key_value_map)
+    except Exception as e:
+        raise SerializationError(f"Could not serialize to {localization_format.name} format") from e
+
+
+def serialize_to_properties_format(key_value_map: Mapping[str, str]) -> str:
     try:
-        with io.BytesIO() as output_stream:
-            # Call your function with the memory stream
-            encoding = 'utf-8'
-            properties = jproperties.Properties()
-            properties.properties = key_value_map
-            for k, _ in key_value_map.items():
-                properties._key_order.append(k)
-            properties.store(output_stream, encoding=encoding, strict=True, strip_meta=True, timestamp=False)
-            binary_content: bytes = output_stream.getvalue()
-
-            # Convert to string using the same encoding that was used for writing
-            return binary_content.decode(encoding=encoding)
+        return serialize_properties(key_value_map)
     except Exception as e:
         raise SerializationError("Could not serialize to properties format") from e
 
 
-def serialize_to_json(key_value_map: dict[str, str]) -> str:
+def serialize_to_json(key_value_map: Mapping[str, str]) -> str:
     try:
-        _dict = unflatten_dict(key_value_map)
-        return json.dumps(_dict, ensure_ascii=False, indent=2)
+        return ''.join(iter_unflattened_json(key_value_map))
     except Exception as e:
         raise SerializationError from e
@@ -0,0 +1,311 @@
+import asyncio
+import json
+import logging
+import uuid
+from collections import OrderedDict
+from http import HTTPStatus
+
+from locawise.errors import LocalizationError, LLMApiError
+from locawise.langutils import is_valid_two_letter_lang_code, retrieve_lang_full_name
+from locawise.llm import LLMContext
+from locawise.localization import localize
+
+_DEFAULT_COALESCING_WINDOW_SECONDS = 0.05
+
+_DEFAULT_CHUNK_SIZE = 50
+
+_DEFAULT_CACHE_SIZE = 100_000
+
+_MAX_JOBS = 10_000
+
+_MAX_BODY_SIZE = 16 * 1024 * 1024
+
+
+class TranslationCache:
+    """
+    LRU cache of translations keyed by target language code and source value.
+    """
+
+    def __init__(self, max_size: int = _DEFAULT_CACHE_SIZE):
+        self.max_size = max_size
+        self._entries: OrderedDict[tuple[str, str], str] = OrderedDict()
+
+    def get(self, lang_code: str, value: str) -> str | None:
+        key = (lang_code, value)
+        translation = self._entries.get(key)
+        if translation is not None:
+            self._entries.move_to_end(key)
+        return translation
+
+    def put(self, lang_code: str, value: str, translation: str):
+        key = (lang_code, value)
+        self._entries[key] = translation
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+
+class LocalizationCoalescer:
+    """
+    Merges the values requested by concurrent callers into shared LLM chunks.
+
+    Values are collected per target language for a short window, or until a chunk is full, and localized together.
+    Identical values requested by different callers are localized once, and cached translations skip the LLM entirely.
+    """
+
+    def __init__(self,
+                 llm_context: LLMContext,
+                 context: str = '',
+                 tone: str = '',
+                 glossary: dict[str, str] | None = None,
+                 cache: TranslationCache | None = None,
+                 window: float = _DEFAULT_COALESCING_WINDOW_SECONDS,
+                 chunk_size: int = _DEFAULT_CHUNK_SIZE,
+                 compact_prompts: bool = False):
+        self.llm_context = llm_context
+        self.context = context
+        self.tone = tone
+        self.glossary = glossary
+        self.cache = cache if cache is not None else TranslationCache()
+        self.window = window
+        self.chunk_size = chunk_size
+        self.compact_prompts = compact_prompts
+        self._pending: dict[str, dict[str, asyncio.Future]] = {}
+        self._flush_handles: dict[str, asyncio.TimerHandle] = {}
+        self._background_tasks: set[asyncio.Task] = set()
+
+    async def localize(self, pairs: dict[str, str], target_lang_code: str) -> dict[str, str]:
+        """
+        :raises ValueError: invalid language code
+        :raises LLMApiError:
+        :raises LocalizationError:
+        """
+        if not is_valid_two_letter_lang_code(target_lang_code):
+            raise ValueError(f'Language Code={target_lang_code} is not a valid two letter language code.')
+
+        result = {}
+        futures = {}
+        for key, value in pairs.items():
+            translation = self.cache.get(target_lang_code, value)
+            if translation is not None:
+                result[key] = translation
+            else:
+                futures[key] = self._enqueue(value, target_lang_code)
+
+        translations = await asyncio.gather(*futures.values())
+        result.update(zip(futures.keys(), translations))
+        return result
+
+    def _enqueue(self, value: str, target_lang_code: str) -> asyncio.Future:
+        pending = self._pending.setdefault(target_lang_code, {})
+        future = pending.get(value)
+        if future is not None:
+            return future
+
+        future = asyncio.get_running_loop().create_future()
+        pending[value] = future
+        if len(pending) >= self.chunk_size:
+            self._flush(target_lang_code)
+        elif target_lang_code not in self._flush_handles:
+            self._flush_handles[target_lang_code] = asyncio.get_running_loop().call_later(
+                self.window, self._flush, target_lang_code)
+        return future
+
+    def _flush(self, target_lang_code: str):
+        handle = self._flush_handles.pop(target_lang_code, None)
+        if handle is not None:
+            handle.cancel()
+
+        pending = self._pending.pop(target_lang_code, None)
+        if not pending:
+            return
+
+        task = asyncio.create_task(self._localize_chunk(pending, target_lang_code))
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+
+    async def _localize_chunk(self, pending: dict[str, asyncio.Future], target_lang_code: str):
+        values = list(pending.keys())
+        # values are sent under positional keys since they are unique per chunk while caller keys are not
+        pairs = {str(index): value for index, value in enumerate(values)}
+        try:
+            localized_pairs = await localize(llm_context=self.llm_context,
+                                             pairs=pairs,
+                                             target_language=retrieve_lang_full_name(target_lang_code),
+                                             context=self.context,
+                                             tone=self.tone,
+                                             glossary=self.glossary,
+                                             chunk_size=self.chunk_size,
+                                             compact=self.compact_prompts)
+        except Exception as e:
+            error = _unwrap_exception_group(e)
+            for future in pending.values():
+                if not future.done():
+                    future.set_exception(error)
+            return
+
+        for index, value in enumerate(values):
+            future = pending[value]
+            translation = localized_pairs.get(str(index))
+            if translation is None:
+                future.set_exception(LocalizationError(f'LLM output is missing the value {value}'))
+                continue
+            self.cache.put(target_lang_code, value, translation)
+            future.set_result(translation)
+
+
+class LocalizationServer:
+    """
+    Minimal HTTP/1.1 JSON API in front of a LocalizationCoalescer.
+
+    POST /v1/localize {"target-lang-code": "tr", "pairs": {"key": "value"}} responds with {"pairs": {...}} once the
+    pairs are localized. With "async": true it responds with 202 {"job-id": "..."} right away and the result can be
+    polled with GET /v1/jobs/<job-id>.
+    """
+
+    def __init__(self, coalescer: LocalizationCoalescer):
+        self.coalescer = coalescer
+        self._jobs: OrderedDict[str, asyncio.Task] = OrderedDict()
+
+    async def serve(self, host: str, port: int):
+        server = await asyncio.start_server(self._handle_connection, host, port)
+        logging.info(f'Serving localization API on {host}:{port}')
+        async with server:
+            await server.serve_forever()
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                request = await _read_request(reader)
+                if request is None:
+                    break
+                method, path, body, keep_alive = request
+                status, payload = await self.handle(method, path, body)
+                _write_response(writer, status, payload, keep_alive)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except _BadRequestError as e:
+            _write_response(writer, HTTPStatus.BAD_REQUEST, {'error': str(e)}, keep_alive=False)
+        finally:
+            writer.close()
+
+    async def handle(self, method: str, path: str, body: bytes) -> tuple[HTTPStatus, dict]:
+        if method == 'POST' and path == '/v1/localize':
+            return await self._handle_localize(body)
+        if method == 'GET' and path.startswith('/v1/jobs/'):
+            return self._handle_job(path.removeprefix('/v1/jobs/'))
+        if method == 'GET' and path == '/health':
+            return HTTPStatus.OK, {'status': 'ok'}
+        return HTTPStatus.NOT_FOUND, {'error': f'{method} {path} not found'}
+
+    async def _handle_localize(self, body: bytes) -> tuple[HTTPStatus, dict]:
+        try:
+            request = json.loads(body)
+            target_lang_code = request['target-lang-code']
+            pairs = request['pairs']
+            if not isinstance(pairs, dict) or not all(isinstance(v, str) for v in pairs.values()):
+                raise ValueError('pairs must be an object of strings')
+        except (ValueError, KeyError, TypeError) as e:
+            return HTTPStatus.BAD_REQUEST, {'error': f'Invalid request body. {e}'}
+
+        if not is_valid_two_letter_lang_code(target_lang_code):
+            return HTTPStatus.BAD_REQUEST, {'error': f'{target_lang_code} is not a valid language code'}
+
+        task = asyncio.create_task(self.coalescer.localize(pairs, target_lang_code))
+        if request.get('async'):
+            job_id = uuid.uuid4().hex
+            self._add_job(job_id, task)
+            return HTTPStatus.ACCEPTED, {'job-id': job_id}
+
+        await asyncio.wait([task])
+        return _create_result_response(task)
+
+    def _handle_job(self, job_id: str) -> tuple[HTTPStatus, dict]:
+        task = self._jobs.get(job_id)
+        if task is None:
+            return HTTPStatus.NOT_FOUND, {'error': f'Unknown job {job_id}'}
+        if not task.done():
+            return HTTPStatus.OK, {'status': 'pending'}
+
+        self._jobs.pop(job_id)
+        return _create_result_response(task)
+
+    def _add_job(self, job_id: str, task: asyncio.Task):
+        self._jobs[job_id] = task
+        while len(self._jobs) > _MAX_JOBS:
+            oldest_job_id = next(iter(self._jobs))
+            if not self._jobs[oldest_job_id].done():
+                break
+            self._jobs.pop(oldest_job_id)
+
+
+class _BadRequestError(Exception):
+    pass
+
+
+def _create_result_response(task: asyncio.Task) -> tuple[HTTPStatus, dict]:
+    error = task.exception()
+    if error is None:
+        return HTTPStatus.OK, {'status': 'completed', 'pairs': task.result()}
+
+    logging.error(f'Localization request failed. {error!r}')
+    if isinstance(error, (LLMApiError, LocalizationError)):
+        return HTTPStatus.BAD_GATEWAY, {'status': 'failed', 'error': 'Localization failed'}
+    return HTTPStatus.INTERNAL_SERVER_ERROR, {'status': 'failed', 'error': 'Internal error'}
+
+
+def _unwrap_exception_group(error: BaseException) -> BaseException:
+    # localize runs its chunks in a task group, which wraps their errors
+    while isinstance(error, BaseExceptionGroup):
+        error = error.exceptions[0]
+    return error
+
+
+async def _read_line(reader: asyncio.StreamReader) -> bytes:
+    try:
+        return await reader.readline()
+    except (ValueError, asyncio.LimitOverrunError):
+        raise _BadRequestError('Request line or header is too long')
+
+
+async def _read_request(reader: asyncio.StreamReader) -> tuple[str, str, bytes, bool] | None:
+    request_line = await _read_line(reader)
+    if not request_line:
+        return None
+
+    try:
+        method, path, version = request_line.decode('latin-1').split()
+    except ValueError:
+        raise _BadRequestError('Malformed request line')
+
+    headers = {}
+    while True:
+        line = await _read_line(reader)
+        if line in (b'\r\n', b'\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip()
+
+    try:
+        content_length = int(headers.get('content-length', 0))
+    except ValueError:
+        raise _BadRequestError('Invalid Content-Length')
+    if content_length > _MAX_BODY_SIZE:
+        raise _BadRequestError('Request body is too large')
+
+    body = await reader.readexactly(content_length) if content_length else b''
+    connection = headers.get('connection', '').lower()
+    keep_alive = connection != 'close' if version == 'HTTP/1.1' else connection == 'keep-alive'
+    return method.upper(), path.split('?')[0], body, keep_alive
+
+
+def _write_response(writer: asyncio.StreamWriter, status: HTTPStatus, payload: dict, keep_alive: bool):
+    body = json.dumps(payload, ensure_ascii=False).encode('UTF-8')
+    head = (f'HTTP/1.1 {status.value} {status.phrase}\r\n'
+            f'Content-Type: application/json; charset=utf-8\r\n'
+            f'Content-Length: {len(body)}\r\n'
+            f'Connection: {"keep-alive" if keep_alive else "close"}\r\n\r\n')
+    writer.write(head.encode('latin-1') + body)
@@ -0,0 +1,89 @@
+import json
+import os
+from collections import namedtuple
+
+import xxhash
+
+from locawise.errors import LocalizationError
+from locawise.fileutils import AtomicWriteBatch, read_file
+
+_SHARD_HASH_SEED = 321
+
+# a shard is the keys whose hash modulo count is index - 1, indexes are 1-based like the jobs of a CI matrix
+Shard = namedtuple('Shard', ['index', 'count'])
+
+
+def parse_shard(spec: str) -> Shard:
+    """
+    :param spec: i/N, e.g. 2/8
+    :raises ValueError: spec is not in the form i/N with 1 <= i <= N
+    """
+    index, separator, count = spec.partition('/')
+    try:
+        shard = Shard(int(index), int(count))
+    except ValueError:
+        raise ValueError(f'Invalid shard {spec}. Expected the form i/N, e.g. 2/8') from None
+    if not separator or shard.count < 1 or not 1 <= shard.index <= shard.count:
+        raise ValueError(f'Invalid shard {spec}. Expected the form i/N with 1 <= i <= N')
+    return shard
+
+
+def create_key_filter(shard: Shard):
+    """
+    Whether a key belongs to the shard. Keys are assigned by the hash of the key alone, so the shards of a key are the
+    same on every machine and for every language.
+    """
+    intdigest = xxhash.xxh64_intdigest
+    index = shard.index - 1
+    count = shard.count
+    return lambda key: intdigest(key, _SHARD_HASH_SEED) % count == index
+
+
+def create_source_digest(source_hashes: list[str]) -> str:
+    """
+    Identifies the version of the source file a shard was localized from, so that results of another version are not
+    merged.
+
+    :param source_hashes: the lock file digests of the source pairs
+    """
+    return xxhash.xxh64_hexdigest('\n'.join(source_hashes))
+
+
+def create_shard_results_path(shard_directory: str, shard: Shard, lang_code: str) -> str:
+    return os.path.join(shard_directory, f'{shard.index}-of-{shard.count}', f'{lang_code}.json')
+
+
+async def write_shard_results(shard_directory: str,
+                              shard: Shard,
+                              lang_code: str,
+                              source_digest: str,
+                              pairs: dict[str, str],
+                              write_batch: AtomicWriteBatch):
+    content = json.dumps({'source': source_digest, 'pairs': pairs}, ensure_ascii=False, separators=(',', ':'))
+    await write_batch.stage(create_shard_results_path(shard_directory, shard, lang_code), content)
+
+
+async def read_shard_results(shard_directory: str, shard_count: int, lang_code: str, source_digest: str) \
+        -> dict[str, str]:
+    """
+    The pairs every shard localized for the language.
+
+    :raises LocalizationError: the results of a shard are missing or were localized from another source
+    """
+    pairs = {}
+    for index in range(1, shard_count + 1):
+        shard = Shard(index, shard_count)
+        file_path = create_shard_results_path(shard_directory, shard, lang_code)
+        try:
+            results = json.loads(await read_file(file_path))
+        except FileNotFoundError:
+            raise LocalizationError(f'Shard {index}/{shard_count} has no results for {lang_code} in '
+                                    f'{file_path}') from None
+        except ValueError as e:
+            raise LocalizationError(f'Could not read the results of shard {index}/{shard_count} from '
+                                    f'{file_path}') from e
+        if results.get('source') != source_digest:
+            raise LocalizationError(f'Shard {index}/{shard_count} was localized from another version of the source '
+                                    f'file')
+        pairs.update(results['pairs'])
+    return pairs
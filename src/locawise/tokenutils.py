@@ -0,0 +1,38 @@
+import functools
+import math
+
+try:
+    import tiktoken
+except ImportError:  # optional dependency, token counts are estimated from the text length without it
+    tiktoken = None
+
+_DEFAULT_ENCODING = 'o200k_base'
+
+# the average length of a token of English text and JSON for the OpenAI and Gemini tokenizers
+_CHARACTERS_PER_TOKEN = 4
+
+
+def estimate_token_count(text: str, model: str | None = None) -> int:
+    """
+    Counts the tokens of text with the tokenizer of model when tiktoken is installed, with a generic OpenAI tokenizer
+    for models tiktoken does not know, e.g. Gemini models. Without tiktoken the count is estimated from the length of
+    the text.
+    """
+    if not text:
+        return 0
+    encoding = _get_encoding(model)
+    if encoding is None:
+        return math.ceil(len(text) / _CHARACTERS_PER_TOKEN)
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+@functools.lru_cache(maxsize=8)
+def _get_encoding(model: str | None):
+    if tiktoken is None:
+        return None
+    if model:
+        try:
+            return tiktoken.encoding_for_model(model)
+        except KeyError:
+            pass
+    return tiktoken.get_encoding(_DEFAULT_ENCODING)
@@ -0,0 +1,75 @@
+import asyncio
+import logging
+import os
+from typing import AsyncIterator
+
+try:
+    import watchfiles
+except ImportError:  # optional dependency, polling is used without it
+    watchfiles = None
+
+_DEFAULT_DEBOUNCE_SECONDS = 0.5
+
+_DEFAULT_POLL_INTERVAL_SECONDS = 0.5
+
+
+class FileWatcher:
+    """
+    Notifies about changes of a single file. Uses OS file notifications (inotify on Linux) when watchfiles is installed
+    and falls back to polling the file's size and modification time otherwise.
+    A burst of changes, e.g. an editor saving through a temporary file, is reported once after it settles.
+    """
+
+    def __init__(self,
+                 file_path: str,
+                 debounce: float = _DEFAULT_DEBOUNCE_SECONDS,
+                 poll_interval: float = _DEFAULT_POLL_INTERVAL_SECONDS,
+                 use_polling: bool = False):
+        self.file_path = os.path.abspath(file_path)
+        self.debounce = debounce
+        self.poll_interval = poll_interval
+        self.use_polling = use_polling or watchfiles is None
+
+    async def changes(self) -> AsyncIterator[None]:
+        if self.use_polling:
+            logging.info(f'Watching {self.file_path} by polling')
+            async for _ in self._poll():
+                yield
+        else:
+            logging.info(f'Watching {self.file_path}')
+            async for _ in self._notify():
+                yield
+
+    async def _notify(self) -> AsyncIterator[None]:
+        # the directory is watched since editors often replace the file instead of writing to it
+        async for _ in watchfiles.awatch(os.path.dirname(self.file_path),
+                                         debounce=int(self.debounce * 1000),
+                                         watch_filter=lambda _, path: os.path.abspath(path) == self.file_path):
+            yield
+
+    async def _poll(self) -> AsyncIterator[None]:
+        last_stat_key = _create_stat_key(self.file_path)
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            stat_key = _create_stat_key(self.file_path)
+            if stat_key == last_stat_key:
+                continue
+
+            while True:
+                await asyncio.sleep(self.debounce)
+                settled_stat_key = _create_stat_key(self.file_path)
+                if settled_stat_key == stat_key:
+                    break
+                stat_key = settled_stat_key
+
+            last_stat_key = stat_key
+            if stat_key is not None:
+                yield
+
+
+def _create_stat_key(file_path: str) -> tuple[int, int] | None:
+    try:
+        stat = os.stat(file_path)
+    except FileNotFoundError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
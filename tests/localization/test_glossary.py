@@ -0,0 +1,103 @@
+import pytest
+
+from locawise import llm
+from locawise.llm import LLMContext
+from locawise.localization import localize
+from locawise.localization.glossary import GlossaryIndex
+from locawise.localization.prompts import generate_user_prompt
+
+_GLOSSARY = {
+    'Workspace': 'Çalışma Alanı',
+    'app': 'uygulama',
+    'Pull Request': 'Çekme İsteği',
+    'request': 'istek',
+    'C++': 'C++',
+}
+
+
+def test_select_matches_terms_case_insensitively_in_glossary_order():
+    index = GlossaryIndex(_GLOSSARY)
+
+    assert index.select(['Open the pull request', 'Your WORKSPACE']) == {
+        'Workspace': 'Çalışma Alanı',
+        'Pull Request': 'Çekme İsteği',
+        'request': 'istek',
+    }
+
+
+def test_select_matches_at_the_start_of_words_only():
+    index = GlossaryIndex(_GLOSSARY)
+
+    assert index.select(['Download the webapp', 'subrequest', 'myworkspace']) == {}
+    assert index.select(['app.', '(app)', 'the app']) == {'app': 'uygulama'}
+
+
+@pytest.mark.parametrize('text', ['Delete files?', 'The files were deleted', "Deleted the file's copy"])
+def test_select_matches_inflected_forms(text):
+    index = GlossaryIndex({'file': 'dosya', 'delete': 'sil'})
+
+    assert index.select([text]) == {'file': 'dosya', 'delete': 'sil'}
+
+
+def test_select_matches_plurals_of_multi_word_terms():
+    index = GlossaryIndex(_GLOSSARY)
+
+    assert index.select(['Open pull requests', 'Your workspaces']) == {
+        'Workspace': 'Çalışma Alanı',
+        'Pull Request': 'Çekme İsteği',
+        'request': 'istek',
+    }
+
+
+def test_select_terms_ending_with_symbols():
+    index = GlossaryIndex(_GLOSSARY)
+
+    assert index.select(['Written in C++.']) == {'C++': 'C++'}
+
+
+def test_select_overlapping_terms():
+    index = GlossaryIndex({'she': '1', 'he': '2', 'hers': '3', 'ushers': '4', 'his': '5'})
+
+    assert index.select(['ushers']) == {'ushers': '4'}
+    assert index.select(['he said hers, she said his']) == {'she': '1', 'he': '2', 'hers': '3', 'his': '5'}
+
+
+@pytest.mark.parametrize('glossary', [{}, {'  ': 'blank'}])
+def test_select_without_terms(glossary):
+    index = GlossaryIndex(glossary)
+
+    assert len(index) == 0
+    assert index.select(['anything']) == {}
+
+
+def test_user_prompt_lists_one_entry_per_line():
+    prompt = generate_user_prompt({'key': 'Open the app'}, 'tr', glossary={'app': 'uygulama', 'open': 'aç'})
+
+    assert '\napp=uygulama\nopen=aç\n' in prompt
+
+
+def test_user_prompt_without_glossary():
+    prompt = generate_user_prompt({'key': 'Open the app'}, 'tr')
+
+    assert 'Glossary' not in prompt
+
+
+@pytest.mark.asyncio
+async def test_localize_sends_the_glossary_entries_of_each_chunk():
+    prompts = []
+
+    class RecordingStrategy(llm.MockLLMStrategy):
+        async def call(self, system_prompt: str, user_prompt: str) -> dict[str, str]:
+            prompts.append((system_prompt, user_prompt))
+            return await super().call(system_prompt, user_prompt)
+
+    pairs = {'k1': 'Create a workspace', 'k2': 'Close the app', 'k3': 'Nothing here'}
+
+    result = await localize(LLMContext(RecordingStrategy()), pairs, 'tr', glossary=_GLOSSARY, chunk_size=1)
+
+    assert result == {key: f'TRANSLATED_{value}' for key, value in pairs.items()}
+    # the chunks are sent concurrently, the prompts are sorted by the key they hold
+    user_prompts = sorted(user_prompt for _, user_prompt in prompts)
+    assert [('Çalışma Alanı' in prompt, 'uygulama' in prompt) for prompt in user_prompts] == [
+        (True, False), (False, True), (False, False)]
+    assert all('Glossary' not in system_prompt for system_prompt, _ in prompts)
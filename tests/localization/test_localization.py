@@ -1,3 +1,4 @@
+import json
 import os
 import pytest
 from tenacity import wait_none
@@ -118,3 +119,61 @@ async def test_localize_with_real_gemini_technical_content():
         assert len(result) == len(pairs)
         assert all(isinstance(v, str) for v in result.values())
         assert all(len(v) > 0 for v in result.values())
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("chunk_size", [1, 2, 50])
+async def test_localize_with_compact_prompts(chunk_size):
+    user_prompts = []
+
+    class RecordingStrategy(llm.MockLLMStrategy):
+        async def call(self, system_prompt: str, user_prompt: str) -> dict[str, str]:
+            user_prompts.append(user_prompt)
+            return await super().call(system_prompt, user_prompt)
+
+    pairs = {
+        'settings_/account_/profile_/title': 'Profile',
+        'settings_/account_/profile_/subtitle': 'Edit your "profile"',
+        'settings_/account_/security_/title': 'Security',
+    }
+
+    result = await localize(LLMContext(RecordingStrategy()), pairs, 'tr', chunk_size=chunk_size, compact=True)
+
+    assert result == {key: f'TRANSLATED_{value}' for key, value in pairs.items()}
+    assert not any('settings' in prompt for prompt in user_prompts)
+    assert any('{"0":"Profile"' in prompt for prompt in user_prompts)
+
+
+@pytest.mark.asyncio
+async def test_localize_with_compact_prompts_ignores_unknown_ids():
+    class UnknownIdStrategy(llm.LLMStrategy):
+        async def call(self, system_prompt: str, user_prompt: str) -> dict[str, str]:
+            return {'0': 'first', '7': 'unknown', 'key': 'unknown', '-1': 'unknown'}
+
+    result = await localize(LLMContext(UnknownIdStrategy()), {'a': 'A', 'b': 'B'}, 'tr', compact=True)
+
+    assert result == {'a': 'first'}
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("compact", [False, True])
+async def test_localize_edits_existing_translations(compact):
+    user_prompts = []
+
+    class EditingStrategy(llm.LLMStrategy):
+        async def call(self, system_prompt: str, user_prompt: str) -> dict[str, str]:
+            user_prompts.append(user_prompt)
+            pairs = json.loads(user_prompt[user_prompt.index('{'):user_prompt.rindex('}') + 1])
+            return {k: f'EDITED_{v["previous_translation"]}' if isinstance(v, dict) else f'TRANSLATED_{v}'
+                    for k, v in pairs.items()}
+
+    pairs = {'save': 'Save the file.', 'open': 'Open'}
+    edits = {'save': ('Save the fiel', 'Dosyayı kaydet'), 'removed': ('Removed', 'Kaldırıldı')}
+
+    result = await localize(LLMContext(EditingStrategy()), pairs, 'Turkish', compact=compact, edits=edits)
+
+    assert result == {'save': 'EDITED_Dosyayı kaydet', 'open': 'TRANSLATED_Open'}
+    assert len(user_prompts) == 2
+    edit_prompt = next(prompt for prompt in user_prompts if 'previous_translation' in prompt)
+    assert 'Save the fiel' in edit_prompt
+    assert 'Open' not in edit_prompt
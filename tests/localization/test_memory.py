@@ -0,0 +1,113 @@
+import pytest
+
+from locawise import llm
+from locawise.llm import LLMContext
+from locawise.localization import localize
+from locawise.localization.memory import TranslationMemory, normalize
+
+SOURCE = {
+    'delete_file': 'Delete file?',
+    'delete_folder': 'Delete folder?',
+    'rename_file': 'Rename file',
+    'save': 'Save',
+    'save_copy': 'Save',
+    'settings': 'Settings',
+}
+
+TRANSLATIONS = {
+    'delete_file': 'Dosya silinsin mi?',
+    'rename_file': 'Dosyayı yeniden adlandır',
+    'save_copy': 'Kaydet',
+    'settings': 'Ayarlar',
+}
+
+
+def test_normalize():
+    assert normalize('Save\n  the\tfile') == 'Save the file'
+    assert normalize(' Save  the file\n') == ' Save the file\n'
+    assert normalize('Café') == 'Café'
+
+
+def test_find_exact_ignores_whitespace_between_words():
+    memory = TranslationMemory(SOURCE)
+
+    assert memory.find_exact('Rename  file', TRANSLATIONS, set()) == 'Dosyayı yeniden adlandır'
+    assert memory.find_exact('save', TRANSLATIONS, set()) is None
+    assert memory.find_exact('Unknown', TRANSLATIONS, set()) is None
+
+
+def test_find_exact_keeps_leading_and_trailing_whitespace():
+    memory = TranslationMemory({'name': 'Name:', 'name_label': 'Name: '})
+    translations = {'name': 'Ad:'}
+
+    assert memory.find_exact('Name:', translations, set()) == 'Ad:'
+    assert memory.find_exact('Name: ', translations, set()) is None
+    assert memory.find_similar('Name: ', translations, set()) == [('Name:', 'Ad:')]
+
+
+def test_find_exact_skips_outdated_and_untranslated_keys():
+    memory = TranslationMemory(SOURCE)
+
+    assert memory.find_exact('Settings', TRANSLATIONS, {'settings'}) is None
+    assert memory.find_exact('Delete folder?', TRANSLATIONS, set()) is None
+
+
+def test_find_similar():
+    memory = TranslationMemory(SOURCE)
+
+    result = memory.find_similar('Delete files?', TRANSLATIONS, set())
+
+    assert result[0] == ('Delete file?', 'Dosya silinsin mi?')
+    # delete_folder has no translation
+    assert all(source != 'Delete folder?' for source, _ in result)
+
+
+def test_find_similar_leaves_out_equal_and_dissimilar_values():
+    memory = TranslationMemory(SOURCE)
+
+    assert memory.find_similar('Delete file?', TRANSLATIONS, set()) == []
+    assert memory.find_similar('Log out', TRANSLATIONS, set()) == []
+    assert memory.find_similar('', TRANSLATIONS, set()) == []
+
+
+def test_find_similar_matches_brute_force():
+    source = {f'key{i}': f'Delete {word} number {i}?' for i, word in enumerate(['file', 'folder', 'tab', 'row'] * 25)}
+    translations = {key: f'translation of {key}' for key in source}
+    memory = TranslationMemory(source)
+
+    for text in ['Delete file number 7?', 'Delete rows number 12', 'Remove tab number 3?']:
+        result = memory.find_similar(text, translations, set(), limit=len(source), min_similarity=0.4)
+
+        expected = {value for value in source.values() if _jaccard(text, value) >= 0.4 and value != text}
+        assert {value for value, _ in result} == expected
+
+
+def _jaccard(first: str, second: str) -> float:
+    first_trigrams = _trigrams(first)
+    second_trigrams = _trigrams(second)
+    return len(first_trigrams & second_trigrams) / len(first_trigrams | second_trigrams)
+
+
+def _trigrams(text: str) -> set[str]:
+    padded = f'  {normalize(text).strip().casefold()} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+@pytest.mark.asyncio
+async def test_localize_sends_hints_of_the_chunk():
+    user_prompts = []
+
+    class RecordingStrategy(llm.MockLLMStrategy):
+        async def call(self, system_prompt: str, user_prompt: str) -> dict[str, str]:
+            user_prompts.append(user_prompt)
+            return await super().call(system_prompt, user_prompt)
+
+    pairs = {'delete_files': 'Delete files?', 'log_out': 'Log out'}
+    hints = {'delete_files': [('Delete file?', 'Dosya silinsin mi?')]}
+
+    result = await localize(LLMContext(RecordingStrategy()), pairs, 'Turkish', chunk_size=1, hints=hints)
+
+    assert result == {'delete_files': 'TRANSLATED_Delete files?', 'log_out': 'TRANSLATED_Log out'}
+    hinted_prompt, plain_prompt = sorted(user_prompts, key=lambda prompt: 'Log out' in prompt)
+    assert '{"Delete file?":"Dosya silinsin mi?"}' in hinted_prompt
+    assert 'Previous translations' not in plain_prompt
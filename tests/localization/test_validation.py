@@ -0,0 +1,86 @@
+import pytest
+
+from locawise import llm
+from locawise.errors import LLMApiError
+from locawise.llm import LLMContext
+from locawise.localization import localize
+from locawise.localization.validation import extract_placeholders, find_invalid_translations
+
+
+@pytest.mark.parametrize('text,expected', [
+    ('Hello {name}', ['{name}']),
+    ('Hello {{ name }} and {0}', ['{{ name }}', '{0}']),
+    ('%s has %d items, %1$s %2$.2f %(count)d %@', ['%s', '%d', '%1$s', '%2$.2f', '%(count)d', '%@']),
+    ('Pay ${amount} with $method, costs $5', ['${amount}', '$method']),
+    ('<b>Bold</B> <a href="x" title="Link">link</a><br/>', ['<b', '</b', '<a', '</a', '<br']),
+    ('<![CDATA[<i>x</i>]]>', ['<![CDATA[', '<i', '</i', ']]>']),
+    ('100% sure, 50 %', []),
+    ('{count, plural, one {# item} other {# items}}', []),
+])
+def test_extract_placeholders(text, expected):
+    assert sorted(extract_placeholders(text).elements()) == sorted(expected)
+
+
+def test_find_invalid_translations():
+    source = {
+        'kept': 'Hello {name}, you have %d <b>new</b> messages',
+        'reordered': '%1$s sent %2$s',
+        'dropped': 'Hello {name}',
+        'translated_placeholder': 'Hello {name}',
+        'duplicated': '<b>Bold</b>',
+        'missing_translation': '{x}',
+    }
+    translations = {
+        'kept': 'Merhaba {name}, %d <B>yeni</B> mesajınız var',
+        'reordered': '%2$s, %1$s tarafından gönderildi',
+        'dropped': 'Merhaba',
+        'translated_placeholder': 'Merhaba {isim}',
+        'duplicated': '<b>Kalın</b><b></b>',
+        'not_in_source': '{x}',
+    }
+
+    assert find_invalid_translations(source, translations) == {'dropped', 'translated_placeholder', 'duplicated'}
+
+
+class PlaceholderDroppingStrategy(llm.MockLLMStrategy):
+    """drops the placeholders of the first translation of every value"""
+
+    def __init__(self, retry_error: Exception | None = None):
+        super().__init__()
+        self.retry_error = retry_error
+        self.user_prompts = []
+
+    async def call(self, system_prompt: str, user_prompt: str) -> dict[str, str]:
+        self.user_prompts.append(user_prompt)
+        result = await super().call(system_prompt, user_prompt)
+        if len(self.user_prompts) == 1:
+            return {k: v.replace('{name}', '') for k, v in result.items()}
+        if self.retry_error:
+            raise self.retry_error
+        return result
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize('compact', [False, True])
+async def test_localize_translates_invalid_translations_again(compact):
+    strategy = PlaceholderDroppingStrategy()
+    pairs = {'greeting': 'Hello {name}', 'plain': 'Plain text', 'farewell': 'Bye {name}'}
+
+    result = await localize(LLMContext(strategy), pairs, 'tr', chunk_size=10, compact=compact)
+
+    assert result == {'greeting': 'TRANSLATED_Hello {name}', 'plain': 'TRANSLATED_Plain text',
+                      'farewell': 'TRANSLATED_Bye {name}'}
+    assert len(strategy.user_prompts) == 2
+    retry_prompt = strategy.user_prompts[1]
+    assert 'Bye {name}' in retry_prompt
+    assert 'Plain text' not in retry_prompt
+    assert 'placeholders' in retry_prompt
+
+
+@pytest.mark.asyncio
+async def test_localize_keeps_invalid_translations_when_retry_fails():
+    strategy = PlaceholderDroppingStrategy(retry_error=LLMApiError())
+
+    result = await localize(LLMContext(strategy), {'greeting': 'Hello {name}'}, 'tr')
+
+    assert result == {'greeting': 'TRANSLATED_Hello '}
@@ -1,8 +1,10 @@
 from collections import OrderedDict
 
 import pytest
+from lxml import etree
 
-from locawise.androidutils import serialize_to_xml
+from locawise.androidutils import serialize_to_xml, parse_xml_file_streaming, _extract_inner_content, \
+    _extract_inner_content_by_serializing, iter_serialized_xml
 from locawise.errors import MalformedAndroidStringsXMLError
 from tests.utils import get_absolute_path, parse_xml_file
 
@@ -459,3 +461,77 @@ def test_serialize_to_xml_mixed_with_cdata():
     <string name="sample_cdata"><![CDATA[hello world]]></string>
 </resources>"""
     assert actual == expected
+
+
+_ALL_XML_RESOURCES = [
+    'resources/androidxml/mixed.xml',
+    'resources/androidxml/mixed_with_cdata.xml',
+    'resources/androidxml/no_children.xml',
+    'resources/androidxml/only_plurals.xml',
+    'resources/androidxml/only_string_arrays.xml',
+    'resources/androidxml/only_strings.xml',
+    'resources/androidxml/strings_with_cdata.xml',
+]
+
+
+@pytest.mark.asyncio(loop_scope="module")
+@pytest.mark.parametrize('file_path', _ALL_XML_RESOURCES)
+async def test_parse_xml_file_streaming_matches_parse_xml_string(file_path):
+    absolute_path = get_absolute_path(file_path)
+
+    expected = await parse_xml_file(absolute_path)
+
+    assert parse_xml_file_streaming(absolute_path) == expected
+
+
+def test_parse_xml_file_streaming_invalid_tree():
+    with pytest.raises(MalformedAndroidStringsXMLError):
+        parse_xml_file_streaming(get_absolute_path('resources/androidxml/invalid.xml'))
+
+
+@pytest.mark.parametrize('node_content', [
+    'plain text',
+    'Help &amp; Support',
+    'escaped &lt;b&gt; and \r carriage return',
+    'Welcome <b>back</b>, <i>friend</i> &amp; more',
+    '<br/>',
+    '',
+    'text with <u>nested <b>tags</b></u> and tail',
+])
+def test_extract_inner_content_matches_serialization(node_content):
+    content = f'<resources><string name="a">{node_content}</string></resources>'
+    root = etree.fromstring(content.encode('UTF-8'), etree.XMLParser(remove_comments=True, strip_cdata=False))
+
+    fast = _extract_inner_content(root[0], may_contain_cdata=False)
+
+    assert fast == _extract_inner_content_by_serializing(root[0])
+
+
+def test_extract_inner_content_with_namespaced_children():
+    content = ('<resources xmlns:xliff="urn:oasis:names:tc:xliff:document:1.2">'
+               '<string name="a">Hello <xliff:g id="name">%s</xliff:g>!</string></resources>')
+    root = etree.fromstring(content.encode('UTF-8'), etree.XMLParser(remove_comments=True, strip_cdata=False))
+
+    assert _extract_inner_content(root[0], may_contain_cdata=False) == 'Hello <xliff:g id="name">%s</xliff:g>!'
+
+
+@pytest.mark.parametrize('pairs', [
+    {},
+    {'app_name': 'Locawise', 'escaped': 'a & b < c "quoted"', 'blank': ' ', 'cdata': '<![CDATA[<b>bold</b>]]>'},
+    {'first': '1', 'days___one': '%d day', 'days___other': '%d days', 'planets_/_0': 'Mercury', 'planets_/_1': 'Venus',
+     'last': '2'},
+    {'days___one': '%d day', 'planets_/_0': 'Mercury'},
+    # the items of a resource are not adjacent
+    {'days___one': '%d day', 'middle': 'x', 'days___other': '%d days'},
+])
+@pytest.mark.parametrize('chunk_size', [1, 1024])
+def test_iter_serialized_xml_matches_serialize_to_xml(pairs, chunk_size):
+    assert ''.join(iter_serialized_xml(pairs, chunk_size=chunk_size)) == serialize_to_xml(pairs)
+
+
+@pytest.mark.parametrize('file_name', ['mixed.xml', 'mixed_with_cdata.xml', 'only_plurals.xml',
+                                       'only_string_arrays.xml', 'only_strings.xml', 'strings_with_cdata.xml'])
+def test_iter_serialized_xml_matches_serialize_to_xml_for_files(file_name):
+    pairs = parse_xml_file_streaming(get_absolute_path(f'resources/androidxml/{file_name}'))
+
+    assert ''.join(iter_serialized_xml(pairs, chunk_size=3)) == serialize_to_xml(pairs)
@@ -0,0 +1,105 @@
+import asyncio
+import os
+
+import pytest
+from aiofiles import tempfile
+
+from locawise.batch import BatchLLMStrategy, LocalBatchBackend, BatchStatus, create_batch_input_content, \
+    parse_batch_output_content, BatchRequest
+from locawise.errors import BatchJobError
+from locawise.llm import LLMContext, MockLLMStrategy
+from locawise.localization import localize
+
+
+class _CountingLocalBatchBackend(LocalBatchBackend):
+    def __init__(self, directory: str):
+        super().__init__(directory, MockLLMStrategy())
+        self.submitted_job_ids = []
+
+    async def submit(self, requests: list[BatchRequest]) -> str:
+        job_id = await super().submit(requests)
+        self.submitted_job_ids.append(job_id)
+        return job_id
+
+
+def _create_pairs(prefix: str, count: int) -> dict[str, str]:
+    return {f'{prefix}{i}': f'value{i}' for i in range(count)}
+
+
+@pytest.mark.asyncio
+async def test_batch_strategy_submits_all_producers_in_one_job():
+    async with tempfile.TemporaryDirectory() as temp_dir:
+        backend = _CountingLocalBatchBackend(temp_dir)
+        strategy = BatchLLMStrategy(backend, poll_interval=0)
+        context = LLMContext(strategy)
+
+        async with asyncio.TaskGroup() as tg:
+            tasks = [
+                tg.create_task(strategy.track(localize(context, _create_pairs('a', 7), 'Turkish', chunk_size=2))),
+                tg.create_task(strategy.track(localize(context, _create_pairs('b', 3), 'German', chunk_size=2))),
+                tg.create_task(strategy.track(asyncio.sleep(0))),
+            ]
+            tg.create_task(strategy.run())
+
+        assert len(backend.submitted_job_ids) == 1
+        assert tasks[0].result() == {f'a{i}': f'TRANSLATED_value{i}' for i in range(7)}
+        assert tasks[1].result() == {f'b{i}': f'TRANSLATED_value{i}' for i in range(3)}
+        assert os.path.exists(os.path.join(temp_dir, f'{backend.submitted_job_ids[0]}.output.jsonl'))
+
+
+@pytest.mark.asyncio
+async def test_batch_strategy_resumes_job_without_resubmitting():
+    async with tempfile.TemporaryDirectory() as temp_dir:
+        pairs = _create_pairs('a', 5)
+        backend = _CountingLocalBatchBackend(temp_dir)
+        strategy = BatchLLMStrategy(backend, poll_interval=0)
+        async with asyncio.TaskGroup() as tg:
+            tg.create_task(strategy.track(localize(LLMContext(strategy), pairs, 'Turkish', chunk_size=2)))
+            tg.create_task(strategy.run())
+        job_id = backend.submitted_job_ids[0]
+
+        resumed_backend = _CountingLocalBatchBackend(temp_dir)
+        resumed_strategy = BatchLLMStrategy(resumed_backend, job_id=job_id, poll_interval=0)
+        async with asyncio.TaskGroup() as tg:
+            task = tg.create_task(resumed_strategy.track(
+                localize(LLMContext(resumed_strategy), pairs, 'Turkish', chunk_size=2)))
+            tg.create_task(resumed_strategy.run())
+
+        assert resumed_backend.submitted_job_ids == []
+        assert task.result() == {f'a{i}': f'TRANSLATED_value{i}' for i in range(5)}
+
+
+@pytest.mark.asyncio
+async def test_local_batch_backend_unknown_job():
+    async with tempfile.TemporaryDirectory() as temp_dir:
+        backend = LocalBatchBackend(temp_dir, MockLLMStrategy())
+        with pytest.raises(BatchJobError):
+            await backend.retrieve_status('unknown')
+
+
+@pytest.mark.asyncio
+async def test_local_batch_backend_status_transitions():
+    async with tempfile.TemporaryDirectory() as temp_dir:
+        backend = LocalBatchBackend(temp_dir, MockLLMStrategy())
+        job_id = await backend.submit([BatchRequest('id1', 'system', 'user {"k": "v"}')])
+
+        assert await backend.retrieve_status(job_id) == BatchStatus.COMPLETED
+        assert await backend.retrieve_results(job_id) == {'id1': '{"k": "TRANSLATED_v"}'}
+
+
+def test_parse_batch_output_content_skips_failed_requests():
+    content = '\n'.join([
+        '{"custom_id": "ok", "response": {"status_code": 200, "body": {"output": [{"type": "message", '
+        '"content": [{"type": "output_text", "text": "{}"}]}]}}, "error": null}',
+        '{"custom_id": "failed", "response": {"status_code": 500, "body": {}}, "error": null}',
+        '{"custom_id": "expired", "response": null, "error": {"code": "batch_expired"}}',
+    ])
+
+    assert parse_batch_output_content(content) == {'ok': '{}'}
+
+
+def test_create_batch_input_content():
+    content = create_batch_input_content([BatchRequest('id1', 'system', 'user')], model='gpt-4.1-mini')
+
+    assert content == ('{"custom_id": "id1", "method": "POST", "url": "/v1/responses", "body": {"model": '
+                       '"gpt-4.1-mini", "instructions": "system", "input": "user", "temperature": 0}}\n')
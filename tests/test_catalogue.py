@@ -0,0 +1,101 @@
+import pickle
+
+import pytest
+
+from locawise.catalogue import Catalogue, KeyTable
+from locawise.diffutils import retrieve_keys_to_be_localized
+from locawise.serialization import serialize, LocalizationFormat
+
+
+@pytest.fixture
+def source() -> Catalogue:
+    return Catalogue.from_pairs({'b': 'B', 'a': 'A', 'c': 'C'})
+
+
+def test_key_table_duplicate_keys():
+    with pytest.raises(ValueError):
+        KeyTable(['a', 'b', 'a'])
+
+
+def test_from_pairs_keeps_source_order(source):
+    assert list(source) == ['b', 'a', 'c']
+    assert list(source.items()) == [('b', 'B'), ('a', 'A'), ('c', 'C')]
+    assert list(source.values()) == ['B', 'A', 'C']
+    assert len(source) == 3
+    assert source == {'a': 'A', 'b': 'B', 'c': 'C'}
+
+
+def test_from_pairs_with_key_table_follows_table_order_and_drops_unknown_keys(source):
+    target = Catalogue.from_pairs({'c': 'C2', 'outdated': 'X', 'b': 'B2'}, key_table=source.key_table)
+
+    assert list(target.items()) == [('b', 'B2'), ('c', 'C2')]
+    assert 'a' not in target
+    assert 'outdated' not in target
+    assert target.get('a') is None
+    assert len(target) == 2
+
+
+def test_target_shares_key_strings_with_source(source):
+    target = Catalogue.from_pairs({''.join(['a']): 'A2'}, key_table=source.key_table)
+
+    assert next(iter(target)) is source.key_table.keys[1]
+
+
+def test_set_and_delete(source):
+    target = Catalogue(source.key_table)
+    assert len(target) == 0
+
+    target['a'] = 'A2'
+    target.update({'c': 'C2'})
+    target['a'] = 'A3'
+    assert list(target.items()) == [('a', 'A3'), ('c', 'C2')]
+    assert len(target) == 2
+
+    del target['a']
+    assert list(target) == ['c']
+    assert len(target) == 1
+    with pytest.raises(KeyError):
+        del target['a']
+
+
+def test_set_unknown_key(source):
+    with pytest.raises(KeyError):
+        source['unknown'] = 'value'
+
+
+def test_copy_is_independent(source):
+    copy = source.copy()
+    copy['a'] = 'changed'
+
+    assert source['a'] == 'A'
+    assert copy.key_table is source.key_table
+
+
+def test_missing_keys(source):
+    target = Catalogue.from_pairs({'a': 'A2'}, key_table=source.key_table)
+
+    assert source.missing_keys(target) == {'b', 'c'}
+    assert source.missing_keys({'a': 'A2', 'c': 'C2'}) == {'b'}
+
+
+def test_retrieve_keys_to_be_localized_with_catalogues(source):
+    target = Catalogue.from_pairs({'a': 'A2', 'b': 'B2'}, key_table=source.key_table)
+
+    assert retrieve_keys_to_be_localized(source, target, {'a'}) == {'a', 'c'}
+
+
+def test_pickle_round_trip(source):
+    restored = pickle.loads(pickle.dumps(source))
+
+    assert list(restored.items()) == list(source.items())
+    assert restored.key_table.get_id('c') == 2
+    restored['c'] = 'C2'
+    assert len(restored) == 3
+
+
+@pytest.mark.parametrize('localization_format', [LocalizationFormat.PROPERTIES, LocalizationFormat.JSON])
+def test_serialize_catalogue_like_dict(localization_format):
+    pairs = {'menu_/title': 'Title', 'menu_/items_/first': 'First', 'footer': 'Footer'}
+    catalogue = Catalogue.from_pairs(pairs)
+
+    assert serialize(catalogue, localization_format) == serialize(pairs, localization_format)
@@ -0,0 +1,61 @@
+import os
+
+import pytest
+from aiofiles import tempfile
+
+from locawise import cpupool
+from locawise.fileutils import read_file, write_to_file
+from locawise.parsing import parse
+from locawise.serialization import serialize_and_save
+
+_FILES = {
+    'en.properties': 'greeting=Hello\nmulti=first \\\n    second\n',
+    'en.json': '{"general": {"greeting": "Hello"}, "bye": "Bye"}',
+    'strings.xml': '<resources><string name="greeting">Hello <b>you</b></string></resources>',
+}
+
+
+@pytest.fixture
+def workers():
+    cpupool.configure(2)
+    yield
+    cpupool.shutdown()
+
+
+async def _parse_and_serialize(file_path: str, suffix: str) -> tuple[dict[str, str], str]:
+    pairs = await parse(file_path)
+    output_path = f'{file_path}.{suffix}.{file_path.split(".")[-1]}'
+    await serialize_and_save(pairs, output_path)
+    return pairs, await read_file(output_path)
+
+
+@pytest.mark.asyncio
+async def test_parse_and_serialize_on_workers_match_inline():
+    async with tempfile.TemporaryDirectory() as temp_dir:
+        file_paths = []
+        for file_name, content in _FILES.items():
+            file_paths.append(os.path.join(temp_dir, file_name))
+            await write_to_file(file_paths[-1], content)
+        expected = [await _parse_and_serialize(file_path, 'inline') for file_path in file_paths]
+
+        cpupool.configure(2)
+        try:
+            assert cpupool.is_enabled()
+            actual = [await _parse_and_serialize(file_path, 'workers') for file_path in file_paths]
+        finally:
+            cpupool.shutdown()
+
+        assert actual == expected
+
+
+@pytest.mark.asyncio
+async def test_errors_are_raised_from_workers(workers):
+    async with tempfile.TemporaryDirectory() as temp_dir:
+        with pytest.raises(FileNotFoundError):
+            await parse(os.path.join(temp_dir, 'missing.json'))
+
+
+@pytest.mark.asyncio
+async def test_run_inline_without_workers():
+    assert not cpupool.is_enabled()
+    assert await cpupool.run(sorted, [2, 1]) == [1, 2]
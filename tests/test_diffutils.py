@@ -125,3 +125,13 @@ def test_retrieve_keys_to_be_translated_with_nom_keys(source_dict: set[str],
 
     result = retrieve_keys_to_be_localized(d1, d2, nom_keys=nom_keys)
     assert expected == result
+
+
+def test_retrieve_nom_source_keys_uses_given_source_hashes(mocker):
+    hash_key_value_pairs = mocker.patch('locawise.diffutils.hash_key_value_pairs')
+    source_dict = {'a': 'b', 'c': 'd'}
+
+    result = retrieve_nom_source_keys({'hash1'}, source_dict, source_hashes=['hash1', 'hash2'])
+
+    assert result == {'c'}
+    hash_key_value_pairs.assert_not_called()
@@ -0,0 +1,118 @@
+import os
+import stat
+
+import pytest
+from aiofiles import tempfile
+
+from locawise.fileutils import AtomicWriteBatch, read_file, write_to_file
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize('fsync', [False, True])
+async def test_write_to_file_replaces_content(fsync):
+    async with tempfile.TemporaryDirectory() as temp_dir:
+        file_path = os.path.join(temp_dir, 'nested', 'file.json')
+
+        await write_to_file(file_path, 'first', fsync=fsync)
+        await write_to_file(file_path, 'second', fsync=fsync)
+
+        assert await read_file(file_path) == 'second'
+        assert os.listdir(os.path.dirname(file_path)) == ['file.json']
+
+
+@pytest.mark.asyncio
+async def test_write_to_file_keeps_permissions():
+    async with tempfile.TemporaryDirectory() as temp_dir:
+        file_path = os.path.join(temp_dir, 'file.json')
+        await write_to_file(file_path, 'first')
+        os.chmod(file_path, 0o640)
+
+        await write_to_file(file_path, 'second')
+
+        assert stat.S_IMODE(os.stat(file_path).st_mode) == 0o640
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize('fsync', [False, True])
+async def test_atomic_write_batch_commit(fsync):
+    async with tempfile.TemporaryDirectory() as temp_dir:
+        first_path = os.path.join(temp_dir, 'first.json')
+        second_path = os.path.join(temp_dir, 'second.json')
+        await write_to_file(first_path, 'old')
+        committed = []
+
+        async with AtomicWriteBatch(fsync=fsync) as batch:
+            await batch.stage(first_path, 'new')
+            await batch.stage(second_path, 'created')
+            batch.after_commit(lambda: committed.append(True))
+
+            assert await read_file(first_path) == 'old'
+            assert not os.path.exists(second_path)
+
+            await batch.commit()
+
+        assert await read_file(first_path) == 'new'
+        assert await read_file(second_path) == 'created'
+        assert committed == [True]
+        assert sorted(os.listdir(temp_dir)) == ['first.json', 'second.json']
+
+
+@pytest.mark.asyncio
+async def test_atomic_write_batch_awaits_async_callbacks():
+    async with tempfile.TemporaryDirectory() as temp_dir:
+        committed = []
+
+        async def callback():
+            committed.append(True)
+
+        async with AtomicWriteBatch() as batch:
+            await batch.stage(os.path.join(temp_dir, 'file.json'), 'new')
+            batch.after_commit(callback)
+            await batch.commit()
+
+        assert committed == [True]
+
+
+@pytest.mark.asyncio
+async def test_atomic_write_batch_discards_uncommitted_files_on_error():
+    async with tempfile.TemporaryDirectory() as temp_dir:
+        file_path = os.path.join(temp_dir, 'file.json')
+        await write_to_file(file_path, 'old')
+
+        with pytest.raises(RuntimeError):
+            async with AtomicWriteBatch() as batch:
+                await batch.stage(file_path, 'new')
+                batch.after_commit(lambda: pytest.fail('must not be called'))
+                raise RuntimeError()
+
+        assert await read_file(file_path) == 'old'
+        assert os.listdir(temp_dir) == ['file.json']
+
+
+@pytest.mark.asyncio
+async def test_atomic_write_batch_commits_in_staging_order(mocker):
+    async with tempfile.TemporaryDirectory() as temp_dir:
+        replaced = []
+        original_replace = os.replace
+        mocker.patch('locawise.fileutils.os.replace',
+                     side_effect=lambda src, dst: replaced.append(os.path.basename(dst)) or original_replace(src, dst))
+
+        async with AtomicWriteBatch() as batch:
+            await batch.stage(os.path.join(temp_dir, 'b.json'), 'b')
+            await batch.stage(os.path.join(temp_dir, 'i18n.lock'), 'lock')
+            await batch.stage(os.path.join(temp_dir, 'a.json'), 'a')
+            # staging a file again moves it to the end
+            await batch.stage(os.path.join(temp_dir, 'i18n.lock'), 'lock')
+            await batch.commit()
+
+        assert replaced == ['b.json', 'a.json', 'i18n.lock']
+
+
+@pytest.mark.asyncio
+async def test_read_file_translates_line_endings():
+    async with tempfile.TemporaryDirectory() as temp_dir:
+        file_path = os.path.join(temp_dir, 'file.properties')
+        with open(file_path, 'wb') as f:
+            f.write('a=ç\r\nb=2\rc=3\n'.encode('UTF-8'))
+
+        assert await read_file(file_path) == 'a=ç\nb=2\nc=3\n'
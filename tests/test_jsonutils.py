@@ -0,0 +1,126 @@
+import io
+import json
+
+import pytest
+
+from locawise.dictutils import flatten_dict, unflatten_dict
+from locawise.errors import UnsupportedLocalizationKeyError, DuplicateJsonObjectKeyError
+from locawise.jsonutils import iter_flattened_json, scan_json_spans, iter_unflattened_json
+
+_DOCUMENTS = [
+    '{}',
+    '{"a": "b"}',
+    '  {\n  "a" : "b" ,\n  "c":"d"\n}\n  ',
+    '{"general": {"app_name": "Locawise", "welcome": "Welcome \\"home\\""}, "footer": "Bye"}',
+    '{"a": {"b": {"c": {"d": "deep"}}, "e": "shallow"}, "f": {}}',
+    '{"unicode": "\\u00e7\\u0131 \\ud83d\\ude00 ğüş", "escaped": "line\\nbreak\\ttab\\\\"}',
+    '{"number": 12345, "float": -1.5e10, "true": true, "false": false, "null": null}',
+    '{"list": [1, "two", {"three": 3}], "nested": {"list": []}}',
+    '{"a": "first", "b": "x", "a": "second"}',
+]
+
+
+@pytest.mark.parametrize('document', _DOCUMENTS)
+@pytest.mark.parametrize('chunk_size', [1, 2, 3, 7, 1024])
+def test_iter_flattened_json_matches_flatten_dict(document, chunk_size):
+    result = list(iter_flattened_json(io.StringIO(document), chunk_size=chunk_size))
+
+    expected = flatten_dict(json.loads(document))
+    assert dict(result) == expected
+    assert list(dict(result).keys()) == list(expected.keys())
+
+
+@pytest.mark.parametrize('document', [
+    '',
+    '[]',
+    '{"a": "b",}',
+    '{"a" "b"}',
+    '{"a": "b"',
+    '{"a": "b"} {}',
+    '{"a": tru}',
+    '{"a": "unterminated}',
+    '{a: "b"}',
+    '{"a": ',
+    '{"a": 1',
+])
+@pytest.mark.parametrize('chunk_size', [1, 1024])
+def test_iter_flattened_json_invalid_documents(document, chunk_size):
+    with pytest.raises(ValueError):
+        list(iter_flattened_json(io.StringIO(document), chunk_size=chunk_size))
+
+
+@pytest.mark.parametrize('document', [
+    '{"a": {"b": "c"}, "a": {"d": "e"}}',
+    '{"a": {"b": "c"}, "a": "d"}',
+    '{"x": {"a": "d", "a": {"b": "c"}}}',
+])
+def test_iter_flattened_json_duplicate_object_keys(document):
+    with pytest.raises(DuplicateJsonObjectKeyError):
+        list(iter_flattened_json(io.StringIO(document)))
+
+
+def test_iter_flattened_json_level_separator_in_key():
+    with pytest.raises(UnsupportedLocalizationKeyError):
+        list(iter_flattened_json(io.StringIO('{"a_/b": "c"}')))
+
+
+@pytest.mark.parametrize('document', _DOCUMENTS[:-1])
+def test_scan_json_spans_matches_flatten_dict(document):
+    leaves, _ = scan_json_spans(document)
+
+    expected = flatten_dict(json.loads(document))
+    assert {key: member.value for key, member in leaves.items()} == expected
+    for key, member in leaves.items():
+        assert json.loads(document[member.value_start:member.end]) == expected[key]
+        assert document[member.start:member.end].startswith('"')
+
+
+def test_scan_json_spans_objects():
+    document = '{\n  "a": "x",\n  "b": {\n    "c": 1\n  }\n}'
+
+    leaves, objects = scan_json_spans(document)
+
+    assert objects.keys() == {'', 'b_/'}
+    assert document[objects['b_/'].open:objects['b_/'].close + 1] == '{\n    "c": 1\n  }'
+    assert document[objects['b_/'].member.start:objects['b_/'].member.end] == '"b": {\n    "c": 1\n  }'
+    assert [m.key for m in objects[''].members] == ['a', 'b']
+    assert leaves['b_/c'].separator == '\n    '
+    assert leaves['b_/c'].parent == 'b_/'
+
+
+@pytest.mark.parametrize('document', [
+    '{"a": "first", "b": "x", "a": "second"}',
+    '{"a": {"b": "c"}, "a": "d"}',
+    '{"a": "d", "a": {"b": "c"}}',
+    '{"a": "b",}',
+    '{"a": "b"} {}',
+    '[]',
+])
+def test_scan_json_spans_invalid_or_ambiguous_documents(document):
+    with pytest.raises(ValueError):
+        scan_json_spans(document)
+
+
+@pytest.mark.parametrize('pairs', [
+    {},
+    {'a': 'b'},
+    {'general_/app_name': 'Locawise', 'general_/welcome': 'Welcome "home"', 'footer': 'Bye'},
+    {'a_/b_/c_/d': 'deep', 'a_/e': 'shallow', 'f': 'çğü 😀\n\t\\'},
+    # not adjacent, a key that is both a value and an object, not a string
+    {'a_/b': '1', 'c': '2', 'a_/d': '3'},
+    {'a_/b': '1', 'a': '2'},
+    {'a': '1', 'b_/c': 2},
+])
+@pytest.mark.parametrize('chunk_size', [1, 1024])
+def test_iter_unflattened_json_matches_json_dumps(pairs, chunk_size):
+    expected = json.dumps(unflatten_dict(pairs), ensure_ascii=False, indent=2)
+
+    assert ''.join(iter_unflattened_json(pairs, chunk_size=chunk_size)) == expected
+
+
+def test_iter_unflattened_json_round_trips_documents():
+    for document in _DOCUMENTS:
+        pairs = flatten_dict(json.loads(document))
+        if all(isinstance(value, str) for value in pairs.values()):
+            content = ''.join(iter_unflattened_json(pairs, chunk_size=2))
+            assert content == json.dumps(unflatten_dict(pairs), ensure_ascii=False, indent=2)
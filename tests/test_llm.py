@@ -0,0 +1,210 @@
+import asyncio
+import importlib.util
+
+import pytest
+
+from locawise.errors import LLMApiError
+from locawise.llm import LLMContext, LLMStrategy, create_strategies, create_http_client_args, OpenAiLLMStrategy, \
+    GeminiLLMStrategy
+from locawise.scheduling import PriorityLimiter
+
+
+class _SleepingStrategy(LLMStrategy):
+    def __init__(self, name: str, delay: float, fail: bool = False):
+        self.name = name
+        self.delay = delay
+        self.fail = fail
+        self.call_count = 0
+
+    async def call(self, system_prompt: str, user_prompt: str) -> dict[str, str]:
+        self.call_count += 1
+        await asyncio.sleep(self.delay)
+        if self.fail:
+            raise LLMApiError
+        return {'answered_by': self.name}
+
+
+@pytest.mark.asyncio
+async def test_llm_context_single_strategy():
+    strategy = _SleepingStrategy('a', 0)
+    context = LLMContext(strategy)
+
+    result = await context.call('system', 'user')
+
+    assert result == {'answered_by': 'a'}
+    assert context.strategy is strategy
+
+
+def test_llm_context_empty_pool():
+    with pytest.raises(ValueError):
+        LLMContext([])
+
+
+@pytest.mark.asyncio
+async def test_llm_context_fails_over_to_next_strategy():
+    failing = _SleepingStrategy('failing', 0, fail=True)
+    healthy = _SleepingStrategy('healthy', 0)
+    context = LLMContext([failing, healthy])
+
+    result = await context.call('system', 'user')
+
+    assert result == {'answered_by': 'healthy'}
+    assert failing.call_count == 1
+
+
+@pytest.mark.asyncio
+async def test_llm_context_raises_when_all_strategies_fail():
+    context = LLMContext([_SleepingStrategy('a', 0, fail=True), _SleepingStrategy('b', 0, fail=True)])
+
+    with pytest.raises(LLMApiError):
+        await context.call('system', 'user')
+
+
+@pytest.mark.asyncio
+async def test_llm_context_routes_to_faster_strategy():
+    slow = _SleepingStrategy('slow', 0.05)
+    fast = _SleepingStrategy('fast', 0)
+    context = LLMContext([slow, fast])
+
+    # explore both strategies concurrently, afterward the faster one should be preferred
+    await asyncio.gather(context.call('system', 'user'), context.call('system', 'user'))
+    results = [await context.call('system', 'user') for _ in range(5)]
+
+    assert all(result == {'answered_by': 'fast'} for result in results)
+
+
+@pytest.mark.asyncio
+async def test_llm_context_routes_away_from_failing_strategy():
+    failing = _SleepingStrategy('failing', 0, fail=True)
+    healthy = _SleepingStrategy('healthy', 0.01)
+    context = LLMContext([failing, healthy])
+
+    for _ in range(5):
+        await context.call('system', 'user')
+
+    assert failing.call_count == 1
+
+
+@pytest.mark.asyncio
+async def test_llm_context_hedges_slow_calls():
+    primary = _SleepingStrategy('primary', 0.01)
+    secondary = _SleepingStrategy('secondary', 0.02)
+    context = LLMContext([primary, secondary], hedge=True)
+    for _ in range(10):
+        await context.call('system', 'user')
+    secondary_call_count = secondary.call_count
+
+    primary.delay = 5
+    result = await asyncio.wait_for(context.call('system', 'user'), timeout=2)
+
+    assert result == {'answered_by': 'secondary'}
+    assert secondary.call_count == secondary_call_count + 1
+
+
+@pytest.mark.asyncio
+async def test_llm_context_hedges_with_a_slot_of_the_limiter():
+    primary = _SleepingStrategy('primary', 0.01)
+    secondary = _SleepingStrategy('secondary', 0.02)
+    limiter = PriorityLimiter(max_concurrency=2)
+    context = LLMContext([primary, secondary], hedge=True, limiter=limiter)
+    for _ in range(10):
+        await context.call('system', 'user')
+    secondary_call_count = secondary.call_count
+
+    primary.delay = 0.5
+    call = asyncio.create_task(context.call('system', 'user'))
+    while secondary.call_count == secondary_call_count:
+        await asyncio.sleep(0.01)
+
+    assert limiter.in_flight == 2
+    assert await call == {'answered_by': 'secondary'}
+    assert limiter.in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_llm_context_does_not_hedge_without_a_free_slot():
+    primary = _SleepingStrategy('primary', 0.01)
+    secondary = _SleepingStrategy('secondary', 0.02)
+    context = LLMContext([primary, secondary], hedge=True, limiter=PriorityLimiter(max_concurrency=1))
+    for _ in range(10):
+        await context.call('system', 'user')
+    secondary_call_count = secondary.call_count
+
+    primary.delay = 0.2
+    result = await context.call('system', 'user')
+
+    assert result == {'answered_by': 'primary'}
+    assert secondary.call_count == secondary_call_count
+    assert context.limiter.in_flight == 0
+
+
+@pytest.mark.parametrize('model_specs', [
+    ['gpt-4.1-mini'],
+    ['unknown:model'],
+    ['openai:'],
+])
+def test_create_strategies_invalid_specs(model_specs):
+    with pytest.raises(ValueError):
+        create_strategies(model_specs, location=None)
+
+
+def test_create_http_client_args(monkeypatch):
+    monkeypatch.setattr(importlib.util, 'find_spec', lambda name: None)
+
+    args = create_http_client_args()
+
+    assert args['limits'].max_connections == 100
+    assert args['limits'].max_keepalive_connections == 100
+    assert args['http2'] is False
+
+
+def test_create_http_client_args_sized_to_concurrency_with_http2(monkeypatch):
+    monkeypatch.setattr(importlib.util, 'find_spec', lambda name: object() if name == 'h2' else None)
+
+    args = create_http_client_args(max_connections=8)
+
+    assert args['limits'].max_connections == 8
+    assert args['limits'].max_keepalive_connections == 8
+    assert args['http2'] is True
+
+
+@pytest.mark.asyncio
+async def test_llm_context_close_closes_every_strategy():
+    class ClosingStrategy(_SleepingStrategy):
+        closed = False
+
+        async def close(self):
+            self.closed = True
+
+    strategies = [ClosingStrategy('a', 0), ClosingStrategy('b', 0)]
+
+    await LLMContext(strategies).close()
+
+    assert all(strategy.closed for strategy in strategies)
+
+
+@pytest.mark.asyncio
+async def test_openai_strategy_pool_and_close(monkeypatch):
+    monkeypatch.setenv('OPENAI_API_KEY', 'test-key')
+    strategy = OpenAiLLMStrategy(max_connections=7)
+    http_client = strategy.client._client
+
+    assert http_client._transport._pool._max_connections == 7
+    await strategy.close()
+    assert http_client.is_closed
+
+
+@pytest.mark.asyncio
+async def test_gemini_strategy_calls_async_client_and_closes(monkeypatch, mocker):
+    monkeypatch.setenv('GEMINI_API_KEY', 'test-key')
+    strategy = GeminiLLMStrategy(max_connections=5)
+    generate_content = mocker.patch.object(strategy.client.aio.models, 'generate_content',
+                                           mocker.AsyncMock(return_value=mocker.Mock(text='{"key": "value"}')))
+
+    result = await strategy.call('system', 'user')
+
+    assert result == {'key': 'value'}
+    generate_content.assert_awaited_once()
+    assert strategy.http_client._transport._pool._max_connections == 5
+    await strategy.close()
+    assert strategy.http_client.is_closed
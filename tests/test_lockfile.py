@@ -1,7 +1,8 @@
-from locawise.lockfile import create_lock_file_content
+from locawise.lockfile import create_lock_file_content, create_language_lock_file_path, hash_key_value_pair, \
+    hash_key_value_pairs, update_key_value_hashes
 
 
-def test_create_lock_file_content(mocker):
+def test_create_lock_file_content():
     input_map = {
         'name': 'ahmet',
         'age': '19',
@@ -9,13 +10,40 @@ def test_create_lock_file_content(mocker):
         'location': 'istanbul'
     }
 
-    def hash_key_value_pair(key, value):
-        return f'{key}={value}'
-
-    mocker.patch('locawise.lockfile.hash_key_value_pair', side_effect=hash_key_value_pair)
-
     result = create_lock_file_content(input_map)
 
-    expected_output = "name=ahmet\nage=19\nfrank=jordan\nlocation=istanbul\n"
+    expected_output = ''.join(f'{hash_key_value_pair(k, v)}\n' for k, v in input_map.items())
 
     assert result == expected_output
+
+
+def test_create_lock_file_content_empty():
+    assert create_lock_file_content({}) == ''
+
+
+def test_create_lock_file_content_uses_given_hashes():
+    result = create_lock_file_content({'a': 'b', 'c': 'd'}, key_value_hashes=['hash1', 'hash2'])
+
+    assert result == 'hash1\nhash2\n'
+
+
+def test_hash_key_value_pairs():
+    input_map = {'name': 'ahmet', 'age': '19', 'unicode': 'çğü 😀', 'empty': ''}
+
+    result = hash_key_value_pairs(input_map)
+
+    assert result == [hash_key_value_pair(k, v) for k, v in input_map.items()]
+
+
+def test_update_key_value_hashes_reuses_unchanged_digests():
+    previous_pairs = {'a': '1', 'b': '2', 'c': '3'}
+    previous_hashes = ['kept', 'stale', 'removed']
+    new_pairs = {'b': 'changed', 'a': '1', 'd': 'new'}
+
+    result = update_key_value_hashes(previous_hashes, previous_pairs, new_pairs)
+
+    assert result == [hash_key_value_pair('b', 'changed'), 'kept', hash_key_value_pair('d', 'new')]
+
+
+def test_create_language_lock_file_path():
+    assert create_language_lock_file_path('/project/i18n.lock', 'tr') == '/project/i18n.tr.lock'
@@ -1,6 +1,11 @@
+import os
+
 import pytest
+from aiofiles import tempfile
 
-from locawise.lockfile import read_lock_file
+from locawise.fileutils import write_to_file
+from locawise.lockfile import read_lock_file, read_previous_source_values, write_source_values_file, \
+    hash_key_value_pair
 from tests.utils import get_absolute_path
 
 
@@ -25,3 +30,28 @@ async def test_read_lock_file(file_path, expected_output):
     content = await read_lock_file(file_path)
 
     assert content == expected_output
+
+
+@pytest.mark.asyncio
+async def test_read_previous_source_values_of_the_lock_file():
+    async with tempfile.TemporaryDirectory() as temp_dir:
+        file_path = os.path.join(temp_dir, '.locawise', 'source-values.json')
+        assert await read_previous_source_values(file_path, ['greeting'], set()) == {}
+
+        await write_source_values_file(file_path, {'greeting': 'Helo', 'farewell': 'Bye', 'title': 'Title'})
+        # the lock file records another value of title, e.g. the source values file is out of date
+        key_value_hashes = {hash_key_value_pair('greeting', 'Helo'), hash_key_value_pair('farewell', 'Bye'),
+                            hash_key_value_pair('title', 'Headline')}
+
+        result = await read_previous_source_values(file_path, ['greeting', 'title', 'missing'], key_value_hashes)
+
+        assert result == {'greeting': 'Helo'}
+
+
+@pytest.mark.asyncio
+async def test_read_previous_source_values_of_an_invalid_file():
+    async with tempfile.TemporaryDirectory() as temp_dir:
+        file_path = os.path.join(temp_dir, 'source-values.json')
+        await write_to_file(file_path, '{')
+
+        assert await read_previous_source_values(file_path, ['greeting'], set()) == {}
@@ -0,0 +1,138 @@
+import os
+
+import pytest
+from aiofiles import tempfile
+
+from locawise import parsing
+from locawise.catalogue import Catalogue
+from locawise.fileutils import write_to_file
+from locawise.parsecache import ParseCache
+
+
+@pytest.mark.asyncio
+async def test_parse_cache_returns_cached_pairs_for_unchanged_file(mocker):
+    async with tempfile.TemporaryDirectory() as temp_dir:
+        file_path = os.path.join(temp_dir, 'tr.properties')
+        await write_to_file(file_path, 'a=b\n')
+        cache = ParseCache()
+        parse_spy = mocker.spy(parsing, 'parse')
+
+        first = await cache.parse(file_path)
+        first['mutated'] = 'value'
+        second = await cache.parse(file_path)
+
+        assert second == {'a': 'b'}
+        assert parse_spy.call_count == 1
+
+
+@pytest.mark.asyncio
+async def test_parse_cache_parses_modified_file_again():
+    async with tempfile.TemporaryDirectory() as temp_dir:
+        file_path = os.path.join(temp_dir, 'tr.properties')
+        await write_to_file(file_path, 'a=b\n')
+        cache = ParseCache()
+        await cache.parse(file_path)
+
+        await write_to_file(file_path, 'a=changed\nc=d\n')
+
+        assert await cache.parse(file_path) == {'a': 'changed', 'c': 'd'}
+
+
+@pytest.mark.asyncio
+async def test_parse_cache_put_records_written_content(mocker):
+    async with tempfile.TemporaryDirectory() as temp_dir:
+        file_path = os.path.join(temp_dir, 'tr.properties')
+        await write_to_file(file_path, 'a=b\n')
+        cache = ParseCache()
+        await cache.put(file_path, {'a': 'b'})
+        parse_mock = mocker.patch('locawise.parsing.parse')
+
+        assert await cache.parse(file_path) == {'a': 'b'}
+        parse_mock.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_parse_cache_put_keeps_catalogues(mocker):
+    async with tempfile.TemporaryDirectory() as temp_dir:
+        file_path = os.path.join(temp_dir, 'tr.properties')
+        await write_to_file(file_path, 'a=b\n')
+        catalogue = Catalogue.from_pairs({'a': 'b'})
+        cache = ParseCache(cache_dir=os.path.join(temp_dir, 'cache'))
+        await cache.put(file_path, catalogue)
+        catalogue['a'] = 'mutated'
+        mocker.patch('locawise.parsing.parse')
+
+        cached = await cache.parse(file_path)
+
+        assert isinstance(cached, Catalogue)
+        assert cached.key_table is catalogue.key_table
+        assert cached == {'a': 'b'}
+        assert await ParseCache(cache_dir=os.path.join(temp_dir, 'cache')).parse(file_path) == {'a': 'b'}
+
+
+@pytest.mark.asyncio
+async def test_parse_cache_missing_file():
+    cache = ParseCache()
+    with pytest.raises(FileNotFoundError):
+        await cache.parse('missing.properties')
+
+
+@pytest.mark.asyncio
+async def test_parse_cache_persists_entries_between_instances(mocker):
+    async with tempfile.TemporaryDirectory() as temp_dir:
+        file_path = os.path.join(temp_dir, 'tr.properties')
+        cache_dir = os.path.join(temp_dir, '.locawise', 'cache')
+        await write_to_file(file_path, 'a=b\n')
+        await ParseCache(cache_dir=cache_dir).parse(file_path)
+        parse_spy = mocker.spy(parsing, 'parse')
+
+        result = await ParseCache(cache_dir=cache_dir).parse(file_path)
+
+        assert result == {'a': 'b'}
+        parse_spy.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_parse_cache_uses_content_hash_when_only_mtime_changed(mocker):
+    async with tempfile.TemporaryDirectory() as temp_dir:
+        file_path = os.path.join(temp_dir, 'tr.properties')
+        cache_dir = os.path.join(temp_dir, 'cache')
+        await write_to_file(file_path, 'a=b\n')
+        await ParseCache(cache_dir=cache_dir).parse(file_path)
+        os.utime(file_path, ns=(1, 1))
+        parse_spy = mocker.spy(parsing, 'parse')
+
+        result = await ParseCache(cache_dir=cache_dir).parse(file_path)
+
+        assert result == {'a': 'b'}
+        parse_spy.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_parse_cache_parses_file_with_changed_content_again():
+    async with tempfile.TemporaryDirectory() as temp_dir:
+        file_path = os.path.join(temp_dir, 'tr.properties')
+        cache_dir = os.path.join(temp_dir, 'cache')
+        await write_to_file(file_path, 'a=b\n')
+        await ParseCache(cache_dir=cache_dir).parse(file_path)
+        await write_to_file(file_path, 'a=c\n')
+        os.utime(file_path, ns=(1, 1))
+
+        result = await ParseCache(cache_dir=cache_dir).parse(file_path)
+
+        assert result == {'a': 'c'}
+
+
+@pytest.mark.asyncio
+async def test_parse_cache_ignores_corrupted_entries():
+    async with tempfile.TemporaryDirectory() as temp_dir:
+        file_path = os.path.join(temp_dir, 'tr.properties')
+        cache_dir = os.path.join(temp_dir, 'cache')
+        await write_to_file(file_path, 'a=b\n')
+        await ParseCache(cache_dir=cache_dir).parse(file_path)
+        for name in os.listdir(cache_dir):
+            await write_to_file(os.path.join(cache_dir, name), 'corrupted')
+
+        result = await ParseCache(cache_dir=cache_dir).parse(file_path)
+
+        assert result == {'a': 'b'}
@@ -1,5 +1,7 @@
 import pytest
 
+from locawise import parsing
+from locawise.errors import ParseError
 from locawise.parsing import parse_java_properties_file, read_file
 from tests.parsing_fixtures import expected_dict_for_default_java_properties
 from tests.parsing_fixtures import expected_dict_for_multiline_java_properties
@@ -47,3 +49,45 @@ async def test_java_properties_with_multiline_parsing(
 
     assert len(properties) == len(expected_dict_for_multiline_java_properties)
     assert properties == expected_dict_for_multiline_java_properties
+
+
+@pytest.mark.asyncio(loop_scope="module")
+async def test_parse_large_json_file_streaming(mocker, tmp_path):
+    mocker.patch('locawise.parsing._STREAMING_JSON_PARSE_THRESHOLD_BYTES', 1)
+    streaming_spy = mocker.spy(parsing, '_parse_json_file_streaming')
+    file_path = tmp_path / 'en.json'
+    file_path.write_text('{"general": {"app_name": "Locawise"}, "footer": "Bye"}', encoding='UTF-8')
+
+    result = await parsing.parse(str(file_path))
+
+    assert result == {'general_/app_name': 'Locawise', 'footer': 'Bye'}
+    assert streaming_spy.call_count == 1
+
+
+@pytest.mark.asyncio(loop_scope="module")
+@pytest.mark.parametrize('content', [
+    '{"a": "first", "b": {"c": "x"}, "a": "second"}',
+    '{"a": {"b": "c", "d": "e"}, "f": "g", "a": {"h": "i"}}',
+    '{"a": "b", "a": {"c": "d"}}',
+    '{"a": {"c": "d"}, "a": "b"}',
+])
+async def test_parse_json_duplicate_keys_same_with_and_without_streaming(mocker, tmp_path, content):
+    file_path = tmp_path / 'en.json'
+    file_path.write_text(content, encoding='UTF-8')
+    expected = await parsing.parse(str(file_path))
+
+    mocker.patch('locawise.parsing._STREAMING_JSON_PARSE_THRESHOLD_BYTES', 1)
+    result = await parsing.parse(str(file_path))
+
+    assert result == expected
+    assert list(result) == list(expected)
+
+
+@pytest.mark.asyncio(loop_scope="module")
+async def test_parse_large_invalid_json_file_streaming(mocker, tmp_path):
+    mocker.patch('locawise.parsing._STREAMING_JSON_PARSE_THRESHOLD_BYTES', 1)
+    file_path = tmp_path / 'en.json'
+    file_path.write_text('{"footer": ', encoding='UTF-8')
+
+    with pytest.raises(ParseError):
+        await parsing.parse(str(file_path))
@@ -0,0 +1,133 @@
+import json
+import random
+
+import pytest
+
+from locawise.dictutils import flatten_dict
+from locawise.localization.format import LocalizationFormat
+from locawise.parsing import parse_java_properties_content
+from locawise.patching import patch, patch_json, patch_properties
+from locawise.serialization import serialize_to_properties_format
+
+
+def test_patch_json_changes_only_the_value():
+    content = '{\n    "title": "Old",\n    "nested": {\n        "body": "Same"\n    }\n}\n'
+
+    result = patch_json(content, {'title': 'New', 'nested_/body': 'Same'})
+
+    assert result == '{\n    "title": "New",\n    "nested": {\n        "body": "Same"\n    }\n}\n'
+
+
+def test_patch_json_inserts_after_the_preceding_key():
+    content = '{\n  "a": "1",\n  "c": "3"\n}'
+
+    result = patch_json(content, {'a': '1', 'b': '2', 'c': '3', 'd': '4'})
+
+    assert result == '{\n  "a": "1",\n  "b": "2",\n  "c": "3",\n  "d": "4"\n}'
+
+
+def test_patch_json_inserts_before_the_first_key():
+    content = '{"b": "2"}'
+
+    result = patch_json(content, {'a': '1', 'b': '2'})
+
+    assert result == '{"a": "1", "b": "2"}'
+
+
+@pytest.mark.parametrize('pairs, expected', [
+    ({'b': '2', 'c': '3'}, '{\n  "b": "2",\n  "c": "3"\n}'),
+    ({'a': '1', 'c': '3'}, '{\n  "a": "1",\n  "c": "3"\n}'),
+    ({'a': '1', 'b': '2'}, '{\n  "a": "1",\n  "b": "2"\n}'),
+    ({'b': '2'}, '{\n  "b": "2"\n}'),
+    ({}, '{\n  \n}'),
+])
+def test_patch_json_removes_keys(pairs, expected):
+    content = '{\n  "a": "1",\n  "b": "2",\n  "c": "3"\n}'
+
+    assert patch_json(content, pairs) == expected
+
+
+def test_patch_json_removes_emptied_objects():
+    content = '{\n  "a": "1",\n  "section": {\n    "b": "2"\n  }\n}'
+
+    result = patch_json(content, {'a': '1'})
+
+    assert result == '{\n  "a": "1"\n}'
+
+
+@pytest.mark.parametrize('pairs', [
+    {'a': '1', 'new_/b': '2'},
+    {'a': '1', 'section': 'replaces the object'},
+])
+def test_patch_json_gives_up_on_structural_changes(pairs):
+    content = '{"a": "1", "section": {"c": "3"}}'
+
+    assert patch_json(content, pairs) is None
+
+
+def test_patch_properties_keeps_comments_and_formatting():
+    content = '# Greetings\ngreeting = Hello\n\n# Farewells\nbye=Bye\nold=Old\n'
+
+    result = patch_properties(content, {'greeting': 'Hi', 'new': 'New', 'bye': 'Bye'})
+
+    assert result == '# Greetings\ngreeting=Hi\nnew=New\n\n# Farewells\nbye=Bye\n'
+
+
+def test_patch_properties_last_line_without_line_terminator():
+    content = 'a=1\r\nb=2'
+
+    result = patch_properties(content, {'a': '1', 'b': '2', 'c': '3'})
+
+    assert result == 'a=1\r\nb=2\r\nc=3'
+
+
+def test_patch_properties_gives_up_on_duplicate_keys():
+    assert patch_properties('a=1\na=2\n', {'a': '3'}) is None
+
+
+def test_patch_falls_back_for_xml_and_invalid_content():
+    assert patch('<resources/>', {'a': 'b'}, LocalizationFormat.XML) is None
+    assert patch('{invalid', {'a': 'b'}, LocalizationFormat.JSON) is None
+
+
+def _random_nested_dict(rng: random.Random, depth: int = 0) -> dict:
+    result = {}
+    for index in range(rng.randint(1, 6)):
+        if depth < 2 and rng.random() < 0.3:
+            result[f'group{index}'] = _random_nested_dict(rng, depth + 1)
+        else:
+            result[f'key{index}'] = rng.choice(['plain', 'with "quotes"', 'çğü', 'multi\nline', ''])
+    return result
+
+
+def _random_edit(rng: random.Random, pairs: dict[str, str]) -> dict[str, str]:
+    result = {}
+    for key, value in pairs.items():
+        if rng.random() < 0.2:
+            continue
+        result[key] = f'{value} changed' if rng.random() < 0.3 else value
+        if rng.random() < 0.2:
+            result[f'{key}new'] = 'added'
+    return result
+
+
+@pytest.mark.parametrize('seed', range(200))
+def test_patch_json_matches_rewrite(seed):
+    rng = random.Random(seed)
+    content = json.dumps(_random_nested_dict(rng), ensure_ascii=False, indent=rng.choice([None, 2, 4]))
+    pairs = _random_edit(rng, flatten_dict(json.loads(content)))
+
+    result = patch_json(content, pairs)
+
+    assert flatten_dict(json.loads(result)) == pairs
+
+
+@pytest.mark.parametrize('seed', range(100))
+def test_patch_properties_matches_rewrite(seed):
+    rng = random.Random(seed)
+    content = serialize_to_properties_format(flatten_dict(_random_nested_dict(rng)))
+    pairs = _random_edit(rng, dict(parse_java_properties_content(content)))
+
+    result = patch_properties(content, pairs)
+
+    assert dict(parse_java_properties_content(result)) == pairs
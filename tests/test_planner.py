@@ -0,0 +1,87 @@
+import os
+
+import pytest
+from aiofiles import tempfile
+
+from locawise.fileutils import write_to_file
+from locawise.llm import MockLLMStrategy, LLMContext
+from locawise.planner import create_localization_plan, LocalizationPlan, LanguageEstimate
+from locawise.processor import SourceProcessor
+
+_SOURCE = {f'settings_/section{i}_/title': f'Title of section {i}' for i in range(120)}
+
+
+def create_processor(compact_prompts: bool = False) -> SourceProcessor:
+    return SourceProcessor(LLMContext(MockLLMStrategy()), _SOURCE, nom_keys={'settings_/section0_/title'},
+                           compact_prompts=compact_prompts)
+
+
+@pytest.mark.asyncio
+async def test_create_localization_plan_counts_pending_keys_per_language():
+    async with tempfile.TemporaryDirectory() as temp_dir:
+        # tr has the first 100 keys, one of which was modified in the source
+        tr_path = os.path.join(temp_dir, 'tr.json')
+        await write_to_file(tr_path, '{"settings": {' + ', '.join(
+            f'"section{i}": {{"title": "Bölüm {i}"}}' for i in range(100)) + '}}')
+        target_paths = {'tr': tr_path, 'de': os.path.join(temp_dir, 'de.json')}
+
+        plan = await create_localization_plan(create_processor(), target_paths, model='gpt-4.1-mini')
+
+    languages = {language.lang_code: language for language in plan.languages}
+    assert languages['tr'].key_count == 21
+    assert languages['tr'].request_count == 1
+    assert languages['de'].key_count == 120
+    assert languages['de'].request_count == 3
+    assert languages['de'].input_tokens > languages['tr'].input_tokens > 0
+    assert languages['de'].output_tokens > languages['tr'].output_tokens > 0
+    assert plan.key_count == 141
+    assert plan.total_tokens == plan.input_tokens + plan.output_tokens
+    assert plan.cost == pytest.approx((plan.input_tokens * 0.40 + plan.output_tokens * 1.60) / 1_000_000)
+
+
+@pytest.mark.asyncio
+async def test_create_localization_plan_with_compact_prompts_has_fewer_tokens():
+    async with tempfile.TemporaryDirectory() as temp_dir:
+        target_paths = {'de': os.path.join(temp_dir, 'de.json')}
+
+        regular = await create_localization_plan(create_processor(), target_paths)
+        compact = await create_localization_plan(create_processor(compact_prompts=True), target_paths)
+
+    assert compact.key_count == regular.key_count
+    assert compact.total_tokens < regular.total_tokens
+
+
+@pytest.mark.parametrize('model,expected', [
+    ('gpt-4.1', 2.00 + 8.00),
+    ('gpt-4.1-mini-2025-04-14', 0.40 + 1.60),
+    ('gemini-2.5-flash-lite', 0.10 + 0.40),
+    ('unknown-model', None),
+    (None, None),
+])
+def test_cost(model, expected):
+    plan = LocalizationPlan(model, [LanguageEstimate('tr', 10, 1, 1_000_000, 1_000_000)])
+
+    assert plan.cost == (pytest.approx(expected) if expected is not None else None)
+
+
+def test_find_budget_violations():
+    plan = LocalizationPlan('gpt-4.1', [LanguageEstimate('tr', 10, 1, 600_000, 400_000),
+                                        LanguageEstimate('de', 10, 1, 600_000, 400_000)])
+
+    assert plan.find_budget_violations() == []
+    assert plan.find_budget_violations(max_tokens=2_000_000, max_cost=100) == []
+    assert plan.find_budget_violations(max_tokens=1_999_999, max_cost=8.79) == [
+        '2,000,000 tokens exceed max-tokens of 1,999,999',
+        '$8.80 exceeds max-cost of $8.79',
+    ]
+    assert LocalizationPlan(None, plan.languages).find_budget_violations(max_cost=0.01) == []
+
+
+def test_describe():
+    plan = LocalizationPlan('unknown-model', [LanguageEstimate('tr', 1_500, 30, 60_000, 40_000)])
+
+    description = plan.describe()
+
+    assert 'tr' in description
+    assert '1,500' in description
+    assert 'unknown-model is unknown' in description
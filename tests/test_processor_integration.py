@@ -5,9 +5,9 @@ from collections import OrderedDict
 import pytest
 from aiofiles import tempfile
 
-from locawise.fileutils import read_file, write_to_file
+from locawise.fileutils import read_file, write_to_file, AtomicWriteBatch
 from locawise.llm import MockLLMStrategy, LLMContext
-from locawise.lockfile import create_lock_file_content
+from locawise.lockfile import create_lock_file_content, hash_key_value_pairs, write_source_values_file
 from locawise.processor import SourceProcessor, create_source_processor
 from tests.utils import compare_ignoring_white_space
 
@@ -577,7 +577,109 @@ async def test_create_source_processor_with_xml_and_lock_file():
 def _assert_processor_properties(processor: SourceProcessor, expected_dict: dict[str, str],
                                  expected_nom_keys: set[str], context: str, tone: str, glossary: dict[str, str]):
     assert processor.source_dict == expected_dict
+    assert processor.source_hashes == hash_key_value_pairs(expected_dict)
     assert processor.nom_keys == expected_nom_keys
     assert processor.context == context
     assert processor.tone == tone
     assert processor.glossary == glossary
+
+
+def test_source_processor_update_source_adds_changed_keys_to_nom_keys(source_processor: SourceProcessor):
+    source_processor.nom_keys = {'key5'}
+    new_source_dict = OrderedDict(source_processor.source_dict)
+    new_source_dict['key1'] = 'changed'
+    new_source_dict['key6'] = 'value6'
+    new_source_dict.pop('key2')
+
+    source_processor.update_source(new_source_dict)
+
+    assert source_processor.nom_keys == {'key1', 'key5', 'key6'}
+    assert source_processor.source_dict == new_source_dict
+    assert source_processor.source_hashes == hash_key_value_pairs(new_source_dict)
+
+
+@pytest.mark.asyncio
+async def test_localize_to_target_language_with_write_batch(source_processor):
+    async with tempfile.TemporaryDirectory() as temp_dir:
+        target_path = os.path.join(temp_dir, "test_localization.properties")
+
+        async with AtomicWriteBatch() as write_batch:
+            await source_processor.localize_to_target_language(target_path, 'tr', write_batch=write_batch)
+            assert not os.path.exists(target_path)
+            await write_batch.commit()
+
+        content = await read_file(target_path)
+        assert content.startswith('key3=TRANSLATED_value3\n')
+
+
+@pytest.mark.asyncio
+async def test_create_source_processor_edits_translations_of_modified_keys():
+    user_prompts = []
+
+    class RecordingStrategy(MockLLMStrategy):
+        async def call(self, system_prompt: str, user_prompt: str) -> dict[str, str]:
+            user_prompts.append(user_prompt)
+            return {'greeting': 'Merhaba!'} if 'previous_translation' in user_prompt else \
+                await super().call(system_prompt, user_prompt)
+
+    async with tempfile.TemporaryDirectory() as temp_dir:
+        source_path = os.path.join(temp_dir, 'en.json')
+        target_path = os.path.join(temp_dir, 'tr.json')
+        lock_path = os.path.join(temp_dir, 'i18n.lock')
+        source_values_path = os.path.join(temp_dir, '.locawise', 'source-values.json')
+        previous_source = {'greeting': 'Hello', 'title': 'Title'}
+        await write_to_file(lock_path, create_lock_file_content(previous_source))
+        await write_source_values_file(source_values_path, previous_source)
+        await write_to_file(target_path, json.dumps({'greeting': 'Merhaba', 'title': 'Başlık'}))
+        await write_to_file(source_path, json.dumps({'greeting': 'Hello!', 'title': 'Title', 'new': 'New'}))
+
+        processor = await create_source_processor(LLMContext(RecordingStrategy()), source_path, lock_path,
+                                                  source_values_path=source_values_path)
+        await processor.localize_to_target_language(target_path, 'tr')
+
+        assert processor.previous_source_values == {'greeting': 'Hello'}
+        assert json.loads(await read_file(target_path)) == {'greeting': 'Merhaba!', 'title': 'Başlık',
+                                                            'new': 'TRANSLATED_New'}
+        edit_prompt = next(prompt for prompt in user_prompts if 'previous_translation' in prompt)
+        assert '"previous_source": "Hello"' in edit_prompt
+        assert '"previous_translation": "Merhaba"' in edit_prompt
+
+
+def test_source_processor_update_source_keeps_previous_source_values(source_processor: SourceProcessor):
+    source_processor.previous_source_values = {'key5': 'older5'}
+    source_processor.nom_keys = {'key5'}
+    new_source_dict = OrderedDict(source_processor.source_dict)
+    new_source_dict['key1'] = 'changed'
+    new_source_dict['key5'] = 'changed'
+    new_source_dict['key6'] = 'value6'
+
+    source_processor.update_source(new_source_dict)
+
+    assert source_processor.previous_source_values == {'key1': 'value1', 'key5': 'older5'}
+
+
+@pytest.mark.asyncio
+async def test_localize_to_target_language_with_translation_memory():
+    user_prompts = []
+
+    class RecordingStrategy(MockLLMStrategy):
+        async def call(self, system_prompt: str, user_prompt: str) -> dict[str, str]:
+            user_prompts.append(user_prompt)
+            return await super().call(system_prompt, user_prompt)
+
+    async with tempfile.TemporaryDirectory() as temp_dir:
+        target_path = os.path.join(temp_dir, 'tr.json')
+        await write_to_file(target_path, json.dumps({'delete_file': 'Dosya silinsin mi?', 'save': 'Kaydet'}))
+        source_dict = {'delete_file': 'Delete file?', 'save': 'Save', 'save_copy': 'Save', 'save_label': 'Save ',
+                       'delete_files': 'Delete files?'}
+        processor = SourceProcessor(LLMContext(RecordingStrategy()), source_dict, nom_keys=set(),
+                                    translation_memory=True)
+
+        await processor.localize_to_target_language(target_path, 'tr')
+
+        assert json.loads(await read_file(target_path)) == {'delete_file': 'Dosya silinsin mi?', 'save': 'Kaydet',
+                                                            'save_copy': 'Kaydet',
+                                                            'save_label': 'TRANSLATED_Save ',
+                                                            'delete_files': 'TRANSLATED_Delete files?'}
+        assert len(user_prompts) == 1
+        assert '"Delete file?":"Dosya silinsin mi?"' in user_prompts[0]
@@ -0,0 +1,167 @@
+import io
+import random
+import re
+
+import jproperties
+import pytest
+
+from locawise.errors import ParseError
+from locawise.propertiesutils import scan_properties_lines, serialize_properties_line, parse_properties, \
+    serialize_properties
+from locawise.serialization import serialize_to_properties_format
+
+
+def _parse_with_jproperties(content: str) -> dict[str, str]:
+    properties = jproperties.Properties()
+    properties.load(content, encoding='UTF-8')
+    return {key: value for key, (value, _) in properties.items()}
+
+
+def _serialize_with_jproperties(pairs: dict[str, str]) -> str:
+    # the way serialize_to_properties_format used jproperties
+    properties = jproperties.Properties()
+    properties.properties = pairs
+    properties._key_order.extend(pairs)
+    with io.BytesIO() as output_stream:
+        properties.store(output_stream, encoding='utf-8', strict=True, strip_meta=True, timestamp=False)
+        return output_stream.getvalue().decode('utf-8')
+
+
+_MALFORMED_UNICODE_ESCAPE = re.compile(r'(?<!\\)(?:\\\\)*\\u(?![0-9a-fA-F]{4})')
+
+_WHITESPACE_BEFORE_CONTINUATION = re.compile(r'[ \t\f]\\(?:\r\n|\r|\n)')
+
+# pieces of .properties lines, the escapes are written out as they appear in a file
+_FRAGMENTS = ['a', 'key', 'değer', '😀', ' ', '  ', '\t', '\f', '=', ':', ' = ', '\t:', '#', '!',
+              r'\t', r'\\', r'\ ', r'\=', r'\:', r'\n', r'ç', r'😀', r'\u12', r'\q', '\\\n', '\\\n   ',
+              '\\\r\n\t']
+
+
+def _random_document(rng: random.Random) -> str:
+    lines = [''.join(rng.choice(_FRAGMENTS) for _ in range(rng.randint(0, 8))) for _ in range(rng.randint(0, 12))]
+    return rng.choice(['\n', '\r\n', '\r']).join(lines) + rng.choice(['', '\n', '\\'])
+
+
+def test_scan_properties_lines():
+    content = ('# comment\n'
+               '! another comment\n'
+               '\n'
+               'a=1\n'
+               '  b : 2\r\n'
+               'multi=first \\\n'
+               '    second\n'
+               'escaped\\ key=3\n'
+               'last 4')
+
+    lines = scan_properties_lines(content)
+
+    assert [line.key for line in lines] == ['a', 'b', 'multi', 'escaped key', 'last']
+    assert [content[line.start:line.end] for line in lines] == [
+        'a=1', '  b : 2', 'multi=first \\\n    second', 'escaped\\ key=3', 'last 4']
+    assert content[lines[1].end:lines[1].line_end] == '\r\n'
+    assert lines[-1].end == lines[-1].line_end == len(content)
+
+
+def test_scan_properties_lines_escaped_backslash_does_not_continue():
+    content = 'a=1\\\\\nb=2\n'
+
+    lines = scan_properties_lines(content)
+
+    assert [line.key for line in lines] == ['a', 'b']
+
+
+@pytest.mark.parametrize('key, value', [
+    ('a', 'b'),
+    ('key with spaces', 'value'),
+    ('a', 'multi\nline'),
+    ('unicode', 'çğü 😀'),
+    ('a', '  leading spaces'),
+])
+def test_serialize_properties_line(key, value):
+    assert serialize_properties_line(key, value) + '\n' == serialize_to_properties_format({key: value})
+
+
+@pytest.mark.parametrize('content', [
+    '',
+    'a=1\nb:2\nc 3\nd\n',
+    '   indented = value  \n',
+    'a = 1\na = 2\nb = 3',
+    '# comment\n! comment\n\n  \t\nkey=value',
+    'multi=first \\\n    second \\\n\tthird',
+    'multi=first \\\r\n    second\r\nnext=1\r\n',
+    'old=mac\rlines=1\r',
+    'escaped\\ key\\=x\\:y=v',
+    'unicode=\\u00e7\\u011f \\ud83d\\ude00',
+    'controls=\\t\\n\\r\\f\\a\\#',
+    'empty=\nno_separator\n=no_key\n:also_no_key',
+    'leading=\\  spaces',
+    'dangling=\\\n',
+    'ends with backslash\\',
+    'a=1\\\\\nb=2',
+    'raw=çğü 😀',
+])
+def test_parse_properties_matches_jproperties(content):
+    assert list(parse_properties(content).items()) == list(_parse_with_jproperties(content).items())
+
+
+def test_parse_properties_matches_jproperties_on_random_documents():
+    rng = random.Random(37)
+    matched = 0
+    for _ in range(500):
+        content = _random_document(rng)
+        try:
+            expected = _parse_with_jproperties(content)
+        except jproperties.ParseError:
+            # jproperties also rejects its own metadata comment syntax, which is an ordinary comment here
+            continue
+
+        try:
+            actual = parse_properties(content)
+        except ParseError:
+            # jproperties reads whitespace and the next lines as hex digits of a short unicode escape
+            assert _MALFORMED_UNICODE_ESCAPE.search(content), repr(content)
+            continue
+        if list(actual.items()) != list(expected.items()):
+            # jproperties stops looking for the separator at a continuation, see test_parse_properties_continued_separator
+            assert _WHITESPACE_BEFORE_CONTINUATION.search(content), repr(content)
+            continue
+        matched += 1
+    assert matched > 200
+
+
+def test_parse_properties_continued_separator():
+    # java.util.Properties joins the lines before looking for the separator, jproperties takes '=' as part of the value
+    assert parse_properties('key \\\n    = value') == {'key': 'value'}
+    assert _parse_with_jproperties('key \\\n    = value') == {'key': '= value'}
+
+
+@pytest.mark.parametrize('content', ['a=\\u12', 'a=\\u12 4', 'a=\\u1_23', 'a=\\uzzzz', 'a=\\ud83d'])
+def test_parse_properties_invalid_unicode_escape(content):
+    with pytest.raises(ParseError):
+        parse_properties(content)
+
+
+@pytest.mark.parametrize('pairs', [
+    {},
+    {'a': 'b', 'c.d': 'e f'},
+    {'key with spaces': ' leading and trailing ', 'tab\tkey': 'tab\tvalue'},
+    {'separators=:': 'in value = and :', 'comments#!': '#!'},
+    {'multi': 'first\nsecond\r\nthird', 'backslash': 'C:\\path\\'},
+    {'unicode': 'çğü 😀', 'form': 'feed\f'},
+])
+def test_serialize_properties_matches_jproperties(pairs):
+    assert serialize_properties(pairs) == _serialize_with_jproperties(pairs)
+
+
+def test_serialize_properties_round_trip_on_random_pairs():
+    rng = random.Random(37)
+    alphabet = ['a', 'Z', ' ', '\t', '\n', '\r', '\f', '=', ':', '#', '!', '\\', 'ç', '😀', '\\u']
+    for _ in range(300):
+        pairs = {''.join(rng.choice(alphabet) for _ in range(rng.randint(1, 6))):
+                     ''.join(rng.choice(alphabet) for _ in range(rng.randint(0, 10)))
+                 for _ in range(rng.randint(0, 5))}
+
+        content = serialize_properties(pairs)
+
+        assert content == _serialize_with_jproperties(pairs)
+        assert parse_properties(content) == pairs
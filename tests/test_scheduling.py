@@ -0,0 +1,420 @@
+import asyncio
+import json
+import os
+import time
+
+import pytest
+from aiofiles import tempfile
+from tenacity import wait_none
+
+from locawise import scheduling
+from locawise.__main__ import localize_each_language
+from locawise.errors import DeadlineExceededError, LocalizationError, TransientLLMApiError, InvalidLLMOutputError
+from locawise.fileutils import read_file, write_to_file
+from locawise.llm import LLMContext, LLMStrategy, MockLLMStrategy
+from locawise.localization.config import LocalizationConfig
+from locawise.lockfile import create_lock_file_content
+from locawise.processor import SourceProcessor, create_source_processor
+from locawise.scheduling import AimdLimit, PriorityLimiter, read_learned_limits, write_learned_limits
+
+
+async def hold_slot(limiter: PriorityLimiter, name: str, order: list[str], release: asyncio.Event,
+                    priority: tuple | None = None):
+    async with limiter.acquire(priority):
+        order.append(name)
+        await release.wait()
+
+
+@pytest.mark.asyncio
+async def test_limiter_admits_waiting_calls_by_priority_then_arrival():
+    limiter = PriorityLimiter(max_concurrency=1)
+    order = []
+    release = asyncio.Event()
+    release.set()
+    blocker = asyncio.Event()
+
+    async with asyncio.TaskGroup() as tg:
+        tg.create_task(hold_slot(limiter, 'first', order, blocker))
+        await asyncio.sleep(0)
+        for name, priority in [('low', (5,)), ('high_1', (1, 10)), ('high_2', (1, 10)), ('higher', (1, 2))]:
+            tg.create_task(hold_slot(limiter, name, order, release, priority))
+        await asyncio.sleep(0)
+        blocker.set()
+
+    assert order == ['first', 'higher', 'high_1', 'high_2', 'low']
+    assert limiter.in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_limiter_bounds_concurrency():
+    limiter = PriorityLimiter(max_concurrency=3)
+    peak = 0
+
+    async def call():
+        nonlocal peak
+        async with limiter.acquire():
+            peak = max(peak, limiter.in_flight)
+            await asyncio.sleep(0.001)
+
+    await asyncio.gather(*(call() for _ in range(20)))
+
+    assert peak == 3
+    assert limiter.in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_limiter_uses_priority_of_the_current_task():
+    limiter = PriorityLimiter(max_concurrency=1)
+    order = []
+    blocker = asyncio.Event()
+    release = asyncio.Event()
+    release.set()
+
+    async def prioritized_call(name: str, *keys):
+        scheduling.prioritize(*keys)
+        scheduling.prioritize(0)
+        await hold_slot(limiter, name, order, release)
+
+    async with asyncio.TaskGroup() as tg:
+        tg.create_task(hold_slot(limiter, 'first', order, blocker))
+        await asyncio.sleep(0)
+        tg.create_task(prioritized_call('b', 2))
+        tg.create_task(prioritized_call('a', 1))
+        await asyncio.sleep(0)
+        blocker.set()
+
+    assert order == ['first', 'a', 'b']
+
+
+@pytest.mark.asyncio
+async def test_limiter_releases_the_slot_of_cancelled_waiters():
+    limiter = PriorityLimiter(max_concurrency=1)
+    order = []
+    blocker = asyncio.Event()
+
+    holder = asyncio.create_task(hold_slot(limiter, 'first', order, blocker))
+    await asyncio.sleep(0)
+    waiter = asyncio.create_task(hold_slot(limiter, 'cancelled', order, blocker))
+    await asyncio.sleep(0)
+    waiter.cancel()
+    blocker.set()
+    await holder
+
+    release = asyncio.Event()
+    release.set()
+    await hold_slot(limiter, 'last', order, release)
+    assert order == ['first', 'last']
+    assert limiter.in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_limiter_refuses_calls_after_the_deadline():
+    limiter = PriorityLimiter(deadline=time.monotonic() - 1)
+
+    with pytest.raises(DeadlineExceededError):
+        async with limiter.acquire():
+            pass
+    assert limiter.in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_limiter_refuses_calls_expected_to_finish_after_the_deadline():
+    limiter = PriorityLimiter(deadline=time.monotonic() + 60)
+    limiter.expected_latency = 120
+
+    with pytest.raises(DeadlineExceededError):
+        async with limiter.acquire():
+            pass
+
+
+@pytest.mark.asyncio
+async def test_limiter_gives_up_waiting_at_the_deadline():
+    limiter = PriorityLimiter(max_concurrency=1, deadline=time.monotonic() + 0.05)
+    blocker = asyncio.Event()
+    holder = asyncio.create_task(hold_slot(limiter, 'first', [], blocker))
+    await asyncio.sleep(0)
+
+    with pytest.raises(DeadlineExceededError):
+        async with limiter.acquire():
+            pass
+
+    blocker.set()
+    await holder
+    assert limiter.in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_llm_context_with_limiter():
+    class CountingStrategy(LLMStrategy):
+        peak = 0
+        in_flight = 0
+
+        async def call(self, system_prompt: str, user_prompt: str) -> dict[str, str]:
+            self.in_flight += 1
+            self.peak = max(self.peak, self.in_flight)
+            await asyncio.sleep(0.001)
+            self.in_flight -= 1
+            return {}
+
+    strategy = CountingStrategy()
+    context = LLMContext(strategy, limiter=PriorityLimiter(max_concurrency=2))
+
+    await asyncio.gather(*(context.call('system', 'user') for _ in range(10)))
+
+    assert strategy.peak == 2
+
+
+@pytest.mark.asyncio
+async def test_limiter_admits_waiting_calls_when_the_limit_grows():
+    limiter = PriorityLimiter(max_concurrency=1)
+    order = []
+    release = asyncio.Event()
+
+    async with asyncio.TaskGroup() as tg:
+        for name in ['first', 'second', 'third']:
+            tg.create_task(hold_slot(limiter, name, order, release))
+        await asyncio.sleep(0)
+        assert order == ['first']
+
+        limiter.set_max_concurrency(3)
+        await asyncio.sleep(0)
+        assert order == ['first', 'second', 'third']
+        release.set()
+
+    assert limiter.in_flight == 0
+
+
+def test_aimd_limit_grows_by_one_per_round_of_successful_calls():
+    limit = AimdLimit(limit=4)
+
+    for _ in range(4):
+        limit.record_success(1.0)
+
+    assert 4.9 < limit.limit < 5
+
+
+def test_aimd_limit_halves_once_per_round_of_overloads():
+    limit = AimdLimit(limit=16)
+
+    limit.record_overload()
+    assert limit.limit == 8
+
+    # the calls that were in flight with the old limit fail too
+    for _ in range(15):
+        limit.record_overload()
+    assert limit.limit == 8
+
+    limit.record_overload()
+    assert limit.limit == 4
+
+
+def test_aimd_limit_halves_on_rising_latency():
+    limit = AimdLimit(limit=16)
+    for _ in range(10):
+        limit.record_success(1.0)
+    grown_limit = limit.limit
+
+    for _ in range(5):
+        limit.record_success(10.0)
+
+    assert limit.limit < grown_limit / 2 + 1
+
+
+def test_aimd_limit_stays_within_bounds():
+    assert AimdLimit(limit=500, maximum=10).limit == 10
+    assert AimdLimit(limit=0.1).limit == 1
+
+    limit = AimdLimit(limit=1)
+    limit.record_overload()
+    assert limit.limit == 1
+
+
+@pytest.mark.asyncio
+async def test_llm_context_adapts_concurrency_to_overloads(mocker):
+    mocker.patch('locawise.llm._TRANSIENT_ERROR_WAIT', wait_none())
+
+    class RateLimitedStrategy(LLMStrategy):
+        model = 'model'
+        calls = 0
+
+        async def call(self, system_prompt: str, user_prompt: str) -> dict[str, str]:
+            self.calls += 1
+            if self.calls % 2 == 0:
+                raise TransientLLMApiError
+            return {}
+
+    context = LLMContext(RateLimitedStrategy(), concurrency_limits=[AimdLimit(limit=8)])
+    assert context.limiter.max_concurrency == 8
+
+    await context.call('system', 'user')
+    await context.call('system', 'user')
+
+    assert context.limiter.max_concurrency == 4
+    assert context.learned_limits() == {'RateLimitedStrategy:model': context.concurrency_limits[0].limit}
+
+
+@pytest.mark.asyncio
+async def test_llm_context_retries_transient_errors_with_reduced_limit(mocker):
+    mocker.patch('locawise.llm._TRANSIENT_ERROR_WAIT', wait_none())
+
+    class RateLimitedOnceStrategy(LLMStrategy):
+        def __init__(self):
+            self.max_concurrencies = []
+
+        async def call(self, system_prompt: str, user_prompt: str) -> dict[str, str]:
+            self.max_concurrencies.append(context.limiter.max_concurrency)
+            if len(self.max_concurrencies) == 1:
+                # a 429
+                raise TransientLLMApiError
+            return {'greeting': 'Merhaba'}
+
+    strategy = RateLimitedOnceStrategy()
+    context = LLMContext(strategy, concurrency_limits=[AimdLimit(limit=8)])
+
+    assert await context.call('system', 'user') == {'greeting': 'Merhaba'}
+    assert strategy.max_concurrencies == [8, 4]
+
+
+@pytest.mark.asyncio
+async def test_llm_context_gives_up_on_persistent_transient_errors(mocker):
+    mocker.patch('locawise.llm._TRANSIENT_ERROR_WAIT', wait_none())
+
+    class UnavailableStrategy(LLMStrategy):
+        calls = 0
+
+        async def call(self, system_prompt: str, user_prompt: str) -> dict[str, str]:
+            self.calls += 1
+            raise TransientLLMApiError
+
+    strategy = UnavailableStrategy()
+    context = LLMContext(strategy)
+
+    with pytest.raises(TransientLLMApiError):
+        await context.call('system', 'user')
+
+    assert strategy.calls == 8
+
+
+@pytest.mark.asyncio
+async def test_llm_context_ignores_invalid_outputs_for_concurrency():
+    class InvalidOutputStrategy(LLMStrategy):
+        calls = 0
+
+        async def call(self, system_prompt: str, user_prompt: str) -> dict[str, str]:
+            self.calls += 1
+            raise InvalidLLMOutputError
+
+    strategy = InvalidOutputStrategy()
+    context = LLMContext(strategy, concurrency_limits=[AimdLimit(limit=8)])
+
+    # retried a few times without the backoff of rate limits
+    with pytest.raises(InvalidLLMOutputError):
+        await asyncio.wait_for(context.call('system', 'user'), timeout=1)
+
+    assert strategy.calls == 3
+    assert context.concurrency_limits[0].limit == 8
+
+
+def test_llm_context_caps_the_sum_of_concurrency_limits():
+    context = LLMContext([MockLLMStrategy(), MockLLMStrategy()],
+                         concurrency_limits=[AimdLimit(limit=8, maximum=10), AimdLimit(limit=8, maximum=10)],
+                         max_concurrency=10)
+
+    assert context.limiter.max_concurrency == 10
+
+
+@pytest.mark.asyncio
+async def test_learned_limits_round_trip():
+    async with tempfile.TemporaryDirectory() as temp_dir:
+        file_path = os.path.join(temp_dir, '.locawise', 'concurrency.json')
+        assert await read_learned_limits(file_path) == {}
+
+        await write_learned_limits(file_path, {'OpenAiLLMStrategy:gpt-4.1-mini': 12.5})
+        assert await read_learned_limits(file_path) == {'OpenAiLLMStrategy:gpt-4.1-mini': 12.5}
+
+        await write_to_file(file_path, '{')
+        assert await read_learned_limits(file_path) == {}
+
+
+@pytest.mark.asyncio
+async def test_localize_each_language_saves_finished_languages():
+    async with tempfile.TemporaryDirectory() as temp_dir:
+        config = LocalizationConfig(version='v1', source_lang_code='en', target_lang_codes={'tr', 'de'},
+                                    file_name_pattern='{language}.json', language_priorities={'tr': 1})
+        # de cannot be parsed
+        await write_to_file(os.path.join(temp_dir, 'de.json'), '{')
+        lock_file_path = os.path.join(temp_dir, 'i18n.lock')
+        processor = SourceProcessor(LLMContext(MockLLMStrategy()), {'greeting': 'Hello'}, nom_keys=set())
+
+        with pytest.raises(LocalizationError):
+            await localize_each_language(processor, config, temp_dir, lock_file_path)
+
+        assert json.loads(await read_file(os.path.join(temp_dir, 'tr.json'))) == {'greeting': 'TRANSLATED_Hello'}
+        assert await read_file(os.path.join(temp_dir, 'de.json')) == '{'
+        assert not os.path.exists(lock_file_path)
+
+
+@pytest.mark.asyncio
+async def test_localize_each_language_writes_lock_file_when_every_language_succeeds():
+    async with tempfile.TemporaryDirectory() as temp_dir:
+        config = LocalizationConfig(version='v1', source_lang_code='en', target_lang_codes={'tr', 'de'},
+                                    file_name_pattern='{language}.json')
+        lock_file_path = os.path.join(temp_dir, 'i18n.lock')
+        processor = SourceProcessor(LLMContext(MockLLMStrategy()), {'greeting': 'Hello'}, nom_keys=set())
+
+        await localize_each_language(processor, config, temp_dir, lock_file_path)
+
+        assert os.path.exists(os.path.join(temp_dir, 'de.json'))
+        assert os.path.exists(os.path.join(temp_dir, 'tr.json'))
+        assert (await read_file(lock_file_path)).strip() == processor.source_hashes[0]
+
+
+class _LanguageRecordingStrategy(MockLLMStrategy):
+    def __init__(self, late_language: str | None = None):
+        super().__init__()
+        self.late_language = late_language
+        self.languages = []
+
+    async def call(self, system_prompt: str, user_prompt: str) -> dict[str, str]:
+        language = 'German' if 'German' in user_prompt else 'Turkish'
+        if language == self.late_language:
+            raise DeadlineExceededError()
+        self.languages.append(language)
+        return await super().call(system_prompt, user_prompt)
+
+
+@pytest.mark.asyncio
+async def test_localize_each_language_resumes_only_unfinished_languages():
+    async with tempfile.TemporaryDirectory() as temp_dir:
+        config = LocalizationConfig(version='v1', source_lang_code='en', target_lang_codes={'tr', 'de'},
+                                    file_name_pattern='{language}.json', language_priorities={'tr': 1})
+        source_path = os.path.join(temp_dir, 'en.json')
+        await write_to_file(source_path, json.dumps({'greeting': 'Hello', 'farewell': 'Bye'}))
+        lock_file_path = os.path.join(temp_dir, 'i18n.lock')
+        old_lock_file_content = create_lock_file_content({'greeting': 'Hi', 'farewell': 'Bye'})
+        await write_to_file(lock_file_path, old_lock_file_content)
+        for lang_code in ['tr', 'de']:
+            await write_to_file(os.path.join(temp_dir, f'{lang_code}.json'),
+                                json.dumps({'greeting': f'{lang_code}_Hi', 'farewell': f'{lang_code}_Bye'}))
+
+        # the deadline passes before de is done
+        strategy = _LanguageRecordingStrategy(late_language='German')
+        processor = await create_source_processor(LLMContext(strategy), source_path, lock_file_path,
+                                                  target_lang_codes=config.target_lang_codes)
+        with pytest.raises(LocalizationError):
+            await localize_each_language(processor, config, temp_dir, lock_file_path)
+        assert await read_file(lock_file_path) == old_lock_file_content
+        assert os.path.exists(os.path.join(temp_dir, 'i18n.tr.lock'))
+
+        strategy = _LanguageRecordingStrategy()
+        processor = await create_source_processor(LLMContext(strategy), source_path, lock_file_path,
+                                                  target_lang_codes=config.target_lang_codes)
+        await localize_each_language(processor, config, temp_dir, lock_file_path)
+
+        assert strategy.languages == ['German']
+        assert json.loads(await read_file(os.path.join(temp_dir, 'tr.json'))) == \
+            {'greeting': 'TRANSLATED_Hello', 'farewell': 'tr_Bye'}
+        assert json.loads(await read_file(os.path.join(temp_dir, 'de.json'))) == \
+            {'greeting': 'TRANSLATED_Hello', 'farewell': 'de_Bye'}
+        assert await read_file(lock_file_path) == create_lock_file_content({'greeting': 'Hello', 'farewell': 'Bye'})
+        assert not os.path.exists(os.path.join(temp_dir, 'i18n.tr.lock'))
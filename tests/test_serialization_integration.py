@@ -3,8 +3,10 @@ import os
 import pytest
 from aiofiles import tempfile
 
-from locawise.fileutils import read_file
-from locawise.serialization import serialize_and_save
+from locawise.fileutils import read_file, write_to_file
+from locawise.errors import SerializationError
+from locawise.localization.format import detect_format
+from locawise.serialization import serialize_and_save, WriteMode, serialize
 
 
 @pytest.mark.asyncio
@@ -36,3 +38,57 @@ async def test_serialize_and_save_integration_valid_inputs(data, expected):
 async def test_serialize_and_save_integration_empty_path(path):
     with pytest.raises(ValueError):
         await serialize_and_save({}, path)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("file_name, current_content, data, expected", [
+    ('test.properties', '# header\na = a0\nold=x\n', {'a': 'a1', 'b': 'b1'}, '# header\na=a1\nb=b1\n'),
+    ('test.json', '{\n    "a": "a0",\n    "old": "x"\n}\n', {'a': 'a1', 'b': 'b1'},
+     '{\n    "a": "a1",\n    "b": "b1"\n}\n'),
+    ('test.json', '{"a": "a0", "nested": {"c": "c0"}}', {'a': 'a0', 'new_/c': 'c1'},
+     '{\n  "a": "a0",\n  "new": {\n    "c": "c1"\n  }\n}'),
+])
+async def test_serialize_and_save_integration_patch_mode(file_name, current_content, data, expected):
+    async with tempfile.TemporaryDirectory() as temp_dir:
+        test_file = os.path.join(temp_dir, file_name)
+        await write_to_file(test_file, current_content)
+
+        await serialize_and_save(data, test_file, write_mode=WriteMode.PATCH)
+
+        assert await read_file(test_file) == expected
+
+
+@pytest.mark.asyncio
+async def test_serialize_and_save_integration_patch_mode_new_file():
+    async with tempfile.TemporaryDirectory() as temp_dir:
+        test_file = os.path.join(temp_dir, "test.properties")
+
+        await serialize_and_save({'a': 'a1'}, test_file, write_mode=WriteMode.PATCH)
+
+        assert await read_file(test_file) == 'a=a1\n'
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize('file_name', ['messages.properties', 'messages.json', 'strings.xml'])
+async def test_serialize_and_save_integration_writes_streamed_content(file_name):
+    pairs = {f'section{i // 10}_/key{i}': f'value {i} & <b>{i}</b>' for i in range(3000)}
+    async with tempfile.TemporaryDirectory() as temp_dir:
+        test_file = os.path.join(temp_dir, file_name)
+
+        await serialize_and_save(pairs, test_file)
+
+        assert await read_file(test_file) == serialize(pairs, detect_format(test_file))
+
+
+@pytest.mark.asyncio
+async def test_serialize_and_save_integration_serialization_error_keeps_file(mocker):
+    mocker.patch('locawise.serialization.iter_serialized_properties', side_effect=TypeError('not a string'))
+    async with tempfile.TemporaryDirectory() as temp_dir:
+        test_file = os.path.join(temp_dir, 'messages.properties')
+        await write_to_file(test_file, 'a=old\n')
+
+        with pytest.raises(SerializationError):
+            await serialize_and_save({'a': 'new'}, test_file)
+
+        assert await read_file(test_file) == 'a=old\n'
+        assert os.listdir(temp_dir) == ['messages.properties']
@@ -0,0 +1,171 @@
+import asyncio
+import json
+from http import HTTPStatus
+
+import pytest
+
+from locawise.llm import LLMContext, MockLLMStrategy
+from locawise.server import LocalizationCoalescer, LocalizationServer, TranslationCache
+
+
+class _CountingMockLLMStrategy(MockLLMStrategy):
+    def __init__(self):
+        super().__init__()
+        self.call_count = 0
+
+    async def call(self, system_prompt: str, user_prompt: str) -> dict[str, str]:
+        self.call_count += 1
+        return await super().call(system_prompt, user_prompt)
+
+
+@pytest.fixture
+def strategy():
+    return _CountingMockLLMStrategy()
+
+
+@pytest.fixture
+def coalescer(strategy):
+    return LocalizationCoalescer(LLMContext(strategy), window=0.01)
+
+
+@pytest.mark.asyncio
+async def test_coalescer_merges_concurrent_requests_into_one_call(coalescer, strategy):
+    results = await asyncio.gather(
+        coalescer.localize({'title': 'Hello', 'body': 'World'}, 'tr'),
+        coalescer.localize({'greeting': 'Hello'}, 'tr'),
+        coalescer.localize({'other': 'Bye'}, 'tr'),
+    )
+
+    assert results == [
+        {'title': 'TRANSLATED_Hello', 'body': 'TRANSLATED_World'},
+        {'greeting': 'TRANSLATED_Hello'},
+        {'other': 'TRANSLATED_Bye'},
+    ]
+    assert strategy.call_count == 1
+
+
+@pytest.mark.asyncio
+async def test_coalescer_separates_languages(coalescer, strategy):
+    await asyncio.gather(coalescer.localize({'a': 'Hello'}, 'tr'), coalescer.localize({'a': 'Hello'}, 'de'))
+
+    assert strategy.call_count == 2
+
+
+@pytest.mark.asyncio
+async def test_coalescer_consults_cache_first(coalescer, strategy):
+    await coalescer.localize({'a': 'Hello'}, 'tr')
+    result = await coalescer.localize({'b': 'Hello'}, 'tr')
+
+    assert result == {'b': 'TRANSLATED_Hello'}
+    assert strategy.call_count == 1
+
+
+@pytest.mark.asyncio
+async def test_coalescer_flushes_full_chunks_immediately(strategy):
+    coalescer = LocalizationCoalescer(LLMContext(strategy), window=60, chunk_size=2)
+
+    result = await asyncio.wait_for(coalescer.localize({'a': 'Hello', 'b': 'World'}, 'tr'), timeout=2)
+
+    assert result == {'a': 'TRANSLATED_Hello', 'b': 'TRANSLATED_World'}
+
+
+@pytest.mark.asyncio
+async def test_coalescer_invalid_language(coalescer):
+    with pytest.raises(ValueError):
+        await coalescer.localize({'a': 'Hello'}, 'tren')
+
+
+def test_translation_cache_evicts_least_recently_used():
+    cache = TranslationCache(max_size=2)
+    cache.put('tr', 'a', 'A')
+    cache.put('tr', 'b', 'B')
+    cache.get('tr', 'a')
+    cache.put('tr', 'c', 'C')
+
+    assert cache.get('tr', 'a') == 'A'
+    assert cache.get('tr', 'b') is None
+    assert cache.get('tr', 'c') == 'C'
+
+
+@pytest.mark.asyncio
+async def test_server_localize(coalescer):
+    server = LocalizationServer(coalescer)
+    body = json.dumps({'target-lang-code': 'tr', 'pairs': {'a': 'Hello'}}).encode()
+
+    status, payload = await server.handle('POST', '/v1/localize', body)
+
+    assert status == HTTPStatus.OK
+    assert payload == {'status': 'completed', 'pairs': {'a': 'TRANSLATED_Hello'}}
+
+
+@pytest.mark.asyncio
+async def test_server_async_job(coalescer):
+    server = LocalizationServer(coalescer)
+    body = json.dumps({'target-lang-code': 'tr', 'pairs': {'a': 'Hello'}, 'async': True}).encode()
+
+    status, payload = await server.handle('POST', '/v1/localize', body)
+    assert status == HTTPStatus.ACCEPTED
+    job_path = f"/v1/jobs/{payload['job-id']}"
+
+    assert await server.handle('GET', job_path, b'') == (HTTPStatus.OK, {'status': 'pending'})
+    await asyncio.sleep(0.05)
+    assert await server.handle('GET', job_path, b'') == (HTTPStatus.OK, {'status': 'completed',
+                                                                         'pairs': {'a': 'TRANSLATED_Hello'}})
+    assert (await server.handle('GET', job_path, b''))[0] == HTTPStatus.NOT_FOUND
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize('body', [
+    b'not json',
+    b'{"pairs": {"a": "b"}}',
+    b'{"target-lang-code": "tr", "pairs": ["a"]}',
+    b'{"target-lang-code": "tren", "pairs": {"a": "b"}}',
+])
+async def test_server_invalid_request(coalescer, body):
+    status, _ = await LocalizationServer(coalescer).handle('POST', '/v1/localize', body)
+
+    assert status == HTTPStatus.BAD_REQUEST
+
+
+@pytest.mark.asyncio
+async def test_server_llm_failure(coalescer):
+    body = json.dumps({'target-lang-code': 'tr', 'pairs': {'a': 'THROW_LLM_API_ERROR'}}).encode()
+
+    status, payload = await LocalizationServer(coalescer).handle('POST', '/v1/localize', body)
+
+    assert status == HTTPStatus.BAD_GATEWAY
+    assert payload == {'status': 'failed', 'error': 'Localization failed'}
+
+
+@pytest.mark.asyncio
+async def test_server_over_http(coalescer):
+    server = LocalizationServer(coalescer)
+    tcp_server = await asyncio.start_server(server._handle_connection, '127.0.0.1', 0)
+    port = tcp_server.sockets[0].getsockname()[1]
+    async with tcp_server:
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        body = json.dumps({'target-lang-code': 'tr', 'pairs': {'a': 'Hello'}}).encode()
+        writer.write(b'POST /v1/localize HTTP/1.1\r\nHost: localhost\r\nConnection: close\r\n'
+                     b'Content-Length: ' + str(len(body)).encode() + b'\r\n\r\n' + body)
+        response = await reader.read()
+        writer.close()
+
+    head, _, response_body = response.partition(b'\r\n\r\n')
+    assert head.startswith(b'HTTP/1.1 200 OK')
+    assert json.loads(response_body) == {'status': 'completed', 'pairs': {'a': 'TRANSLATED_Hello'}}
+
+
+@pytest.mark.asyncio
+async def test_server_over_http_rejects_too_long_header(coalescer):
+    server = LocalizationServer(coalescer)
+    tcp_server = await asyncio.start_server(server._handle_connection, '127.0.0.1', 0, limit=1024)
+    port = tcp_server.sockets[0].getsockname()[1]
+    async with tcp_server:
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        writer.write(b'GET /health HTTP/1.1\r\nX-Long: ' + b'a' * 4096 + b'\r\n\r\n')
+        response = await reader.read()
+        writer.close()
+
+    head, _, response_body = response.partition(b'\r\n\r\n')
+    assert head.startswith(b'HTTP/1.1 400 Bad Request')
+    assert json.loads(response_body) == {'error': 'Request line or header is too long'}
@@ -0,0 +1,133 @@
+import json
+import os
+
+import pytest
+from aiofiles import tempfile
+
+from locawise import parsing
+from locawise.__main__ import localize_shard, merge_shards
+from locawise.errors import LocalizationError
+from locawise.fileutils import read_file, write_to_file
+from locawise.llm import LLMContext, MockLLMStrategy
+from locawise.localization.config import LocalizationConfig
+from locawise.lockfile import create_lock_file_content
+from locawise.processor import create_source_processor
+from locawise.sharding import Shard, parse_shard, create_key_filter
+
+_SOURCE = {f'key{i}': f'Value {i}' for i in range(40)}
+
+
+@pytest.mark.parametrize('spec, expected', [('1/1', Shard(1, 1)), ('2/8', Shard(2, 8)), ('8/8', Shard(8, 8))])
+def test_parse_shard(spec, expected):
+    assert parse_shard(spec) == expected
+
+
+@pytest.mark.parametrize('spec', ['0/4', '5/4', '1/0', '2', 'a/b', '1/2/3', ''])
+def test_parse_shard_invalid(spec):
+    with pytest.raises(ValueError):
+        parse_shard(spec)
+
+
+def test_key_filters_partition_keys():
+    key_filters = [create_key_filter(Shard(index, 4)) for index in range(1, 5)]
+
+    shard_sizes = [sum(key_filter(key) for key in _SOURCE) for key_filter in key_filters]
+
+    assert all(sum(key_filter(key) for key_filter in key_filters) == 1 for key in _SOURCE)
+    assert all(size > 0 for size in shard_sizes)
+
+
+async def _create_project(temp_dir: str) -> tuple[LocalizationConfig, str]:
+    config = LocalizationConfig(version='v1', source_lang_code='en', target_lang_codes={'tr', 'de'},
+                                file_name_pattern='{language}.json')
+    await write_to_file(os.path.join(temp_dir, 'en.json'), json.dumps(_SOURCE))
+    # de is up to date except for a modified key
+    lock_file_path = os.path.join(temp_dir, 'i18n.lock')
+    await write_to_file(lock_file_path, create_lock_file_content(_SOURCE | {'key3': 'Old value'}))
+    await write_to_file(os.path.join(temp_dir, 'de.json'), json.dumps({k: f'DE_{v}' for k, v in _SOURCE.items()}))
+    return config, lock_file_path
+
+
+async def _create_processor(temp_dir: str, lock_file_path: str, llm_context: LLMContext | None):
+    return await create_source_processor(llm_context, os.path.join(temp_dir, 'en.json'), lock_file_path)
+
+
+@pytest.mark.asyncio
+async def test_merge_shards_assembles_target_files_and_lock_file():
+    async with tempfile.TemporaryDirectory() as temp_dir:
+        config, lock_file_path = await _create_project(temp_dir)
+        for index in range(1, 4):
+            processor = await _create_processor(temp_dir, lock_file_path, LLMContext(MockLLMStrategy()))
+            await localize_shard(processor, config, temp_dir, Shard(index, 3), 'shards')
+        assert not os.path.exists(os.path.join(temp_dir, 'tr.json'))
+
+        processor = await _create_processor(temp_dir, lock_file_path, None)
+        await merge_shards(processor, config, temp_dir, lock_file_path, 3, 'shards')
+
+        assert json.loads(await read_file(os.path.join(temp_dir, 'tr.json'))) == \
+            {k: f'TRANSLATED_{v}' for k, v in _SOURCE.items()}
+        assert json.loads(await read_file(os.path.join(temp_dir, 'de.json'))) == \
+            {k: f'TRANSLATED_{v}' if k == 'key3' else f'DE_{v}' for k, v in _SOURCE.items()}
+        assert await read_file(lock_file_path) == create_lock_file_content(_SOURCE)
+
+
+@pytest.mark.asyncio
+async def test_localize_shard_reads_target_file_once(mocker):
+    async with tempfile.TemporaryDirectory() as temp_dir:
+        config, lock_file_path = await _create_project(temp_dir)
+        config.target_lang_codes = {'de'}
+        processor = await _create_processor(temp_dir, lock_file_path, LLMContext(MockLLMStrategy()))
+        parse_spy = mocker.spy(parsing, 'parse')
+
+        await localize_shard(processor, config, temp_dir, Shard(1, 1), 'shards')
+
+        assert [call.args[0] if call.args else call.kwargs['file_path'] for call in parse_spy.call_args_list] == \
+            [os.path.join(temp_dir, 'de.json')]
+
+
+@pytest.mark.asyncio
+async def test_merge_shards_fails_when_a_shard_is_missing():
+    async with tempfile.TemporaryDirectory() as temp_dir:
+        config, lock_file_path = await _create_project(temp_dir)
+        processor = await _create_processor(temp_dir, lock_file_path, LLMContext(MockLLMStrategy()))
+        await localize_shard(processor, config, temp_dir, Shard(1, 2), 'shards')
+
+        with pytest.raises(LocalizationError):
+            await merge_shards(processor, config, temp_dir, lock_file_path, 2, 'shards')
+
+        assert not os.path.exists(os.path.join(temp_dir, 'tr.json'))
+        assert await read_file(lock_file_path) == create_lock_file_content(_SOURCE | {'key3': 'Old value'})
+
+
+@pytest.mark.asyncio
+async def test_merge_shards_fails_when_the_llm_left_out_a_modified_key():
+    class ForgetfulStrategy(MockLLMStrategy):
+        async def call(self, system_prompt: str, user_prompt: str) -> dict[str, str]:
+            pairs = await super().call(system_prompt, user_prompt)
+            return {k: v for k, v in pairs.items() if k != 'key3'}
+
+    async with tempfile.TemporaryDirectory() as temp_dir:
+        config, lock_file_path = await _create_project(temp_dir)
+        config.target_lang_codes = {'de'}
+        processor = await _create_processor(temp_dir, lock_file_path, LLMContext(ForgetfulStrategy()))
+        await localize_shard(processor, config, temp_dir, Shard(1, 1), 'shards')
+
+        processor = await _create_processor(temp_dir, lock_file_path, None)
+        with pytest.raises(LocalizationError):
+            await merge_shards(processor, config, temp_dir, lock_file_path, 1, 'shards')
+
+        assert json.loads(await read_file(os.path.join(temp_dir, 'de.json')))['key3'] == 'DE_Value 3'
+        assert await read_file(lock_file_path) == create_lock_file_content(_SOURCE | {'key3': 'Old value'})
+
+
+@pytest.mark.asyncio
+async def test_merge_shards_fails_when_the_source_changed():
+    async with tempfile.TemporaryDirectory() as temp_dir:
+        config, lock_file_path = await _create_project(temp_dir)
+        processor = await _create_processor(temp_dir, lock_file_path, LLMContext(MockLLMStrategy()))
+        await localize_shard(processor, config, temp_dir, Shard(1, 1), 'shards')
+        await write_to_file(os.path.join(temp_dir, 'en.json'), json.dumps(_SOURCE | {'key0': 'Changed'}))
+
+        processor = await _create_processor(temp_dir, lock_file_path, None)
+        with pytest.raises(LocalizationError):
+            await merge_shards(processor, config, temp_dir, lock_file_path, 1, 'shards')
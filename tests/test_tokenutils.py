@@ -0,0 +1,19 @@
+from locawise import tokenutils
+from locawise.tokenutils import estimate_token_count
+
+
+def test_estimate_token_count_without_tiktoken(monkeypatch):
+    monkeypatch.setattr(tokenutils, 'tiktoken', None)
+    tokenutils._get_encoding.cache_clear()
+
+    try:
+        assert estimate_token_count('') == 0
+        assert estimate_token_count('abc') == 1
+        assert estimate_token_count('a' * 9, model='gpt-4o') == 3
+    finally:
+        tokenutils._get_encoding.cache_clear()
+
+
+def test_estimate_token_count_grows_with_text():
+    assert 0 < estimate_token_count('Hello world') < estimate_token_count('Hello world, ' * 10)
+    assert estimate_token_count('Hello world', model='unknown-model') > 0
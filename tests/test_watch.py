@@ -0,0 +1,44 @@
+import asyncio
+import os
+
+import pytest
+from aiofiles import tempfile
+
+from locawise.fileutils import write_to_file
+from locawise.watch import FileWatcher
+
+
+async def _next_change(watcher: FileWatcher):
+    async for _ in watcher.changes():
+        return
+
+
+@pytest.mark.asyncio
+async def test_file_watcher_polling_reports_change():
+    async with tempfile.TemporaryDirectory() as temp_dir:
+        file_path = os.path.join(temp_dir, 'en.json')
+        await write_to_file(file_path, '{}')
+        watcher = FileWatcher(file_path, debounce=0.01, poll_interval=0.01, use_polling=True)
+
+        change = asyncio.create_task(_next_change(watcher))
+        await asyncio.sleep(0.05)
+        assert not change.done()
+
+        await write_to_file(file_path, '{"a": "b"}')
+        await asyncio.wait_for(change, timeout=2)
+
+
+@pytest.mark.asyncio
+async def test_file_watcher_polling_ignores_deleted_file():
+    async with tempfile.TemporaryDirectory() as temp_dir:
+        file_path = os.path.join(temp_dir, 'en.json')
+        await write_to_file(file_path, '{}')
+        watcher = FileWatcher(file_path, debounce=0.01, poll_interval=0.01, use_polling=True)
+
+        change = asyncio.create_task(_next_change(watcher))
+        os.remove(file_path)
+        await asyncio.sleep(0.1)
+        assert not change.done()
+
+        await write_to_file(file_path, '{"a": "b"}')
+        await asyncio.wait_for(change, timeout=2)